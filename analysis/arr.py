@@ -2,13 +2,62 @@
 
 Provide simple functions to compute MRR/ARR and top customers from normalized records.
 A record is a dict with keys: 'customer_id' (str), 'mrr' (float), 'signup_date' (date or None).
+
+Both functions also accept a Django QuerySet of subscription rows (a model with
+an `mrr` field and a `customer` foreign key). The aggregation is then pushed
+down to the database and only the result rows are fetched.
+
+They also accept columns instead of records: a dict of NumPy arrays (an
+importer column batch or `analysis.snapshots.snapshot_columns`) or a pyarrow
+Table. Those are reduced with vectorized NumPy operations, so memory-mapped
+snapshot buffers are read in place and no per-row Python objects are created.
 """
 from collections import defaultdict
-from typing import Iterable, Dict, Any, List, Tuple
+from typing import Callable, Iterable, Dict, Any, List, Tuple, Union
+import heapq
+
+import numpy as np
+import pandas as pd
+
+# Above this many distinct customers `top_customers_chunked` switches from an
+# exact per-customer dict to a two-pass count-min sketch (when it can re-read).
+DEFAULT_MAX_EXACT_CUSTOMERS = 2_000_000
+# Count-min sketch shape and how many candidates per requested leader to keep.
+SKETCH_WIDTH = 1 << 20
+SKETCH_DEPTH = 4
+SKETCH_OVERSAMPLE = 8
+# pandas.util.hash_array needs 16-character keys; one per sketch row.
+_SKETCH_KEYS = tuple(f'jarvis360-cms-{i:02d}' for i in range(16))
+
+
+def _is_queryset(records) -> bool:
+    # duck-typed so this module does not import Django for in-memory callers
+    return hasattr(records, 'aggregate') and hasattr(records, 'model')
+
+
+def _as_columns(records):
+    """Column dict for column-shaped input (dict of arrays or pyarrow Table), else None.
+
+    Arrow columns are kept as Arrow arrays; `mrr` converts without a copy when
+    the table has one null-free chunk (e.g. a memory-mapped compacted snapshot).
+    """
+    if isinstance(records, dict) and 'mrr' in records:
+        return records
+    if hasattr(records, 'column_names') and hasattr(records, 'column'):
+        out = {name: records.column(name) for name in ('customer_id', 'mrr') if name in records.column_names}
+        if 'mrr' in out:
+            out['mrr'] = out['mrr'].to_numpy()
+        return out
+    return None
 
 
 def compute_mrr_and_arr(records: Iterable[Dict[str, Any]]) -> Dict[str, float]:
     """Compute total MRR and ARR from records."""
+    if _is_queryset(records):
+        return compute_mrr_and_arr_db(records)
+    columns = _as_columns(records)
+    if columns is not None:
+        return compute_mrr_and_arr_columns(columns)
     total_mrr = 0.0
     for r in records:
         try:
@@ -23,6 +72,11 @@ def top_customers_by_mrr(records: Iterable[Dict[str, Any]], limit: int = 10) ->
 
     Each returned item: { 'customer_id': id, 'mrr': sum }
     """
+    if _is_queryset(records):
+        return top_customers_by_mrr_db(records, limit=limit)
+    columns = _as_columns(records)
+    if columns is not None:
+        return top_customers_by_mrr_columns(columns, limit=limit)
     by_id: Dict[str, float] = defaultdict(float)
     for r in records:
         cid = r.get('customer_id') or r.get('id') or r.get('name') or 'unknown'
@@ -30,5 +84,189 @@ def top_customers_by_mrr(records: Iterable[Dict[str, Any]], limit: int = 10) ->
             by_id[str(cid)] += float(r.get('mrr') or 0)
         except Exception:
             continue
-    out = sorted([{'customer_id': k, 'mrr': v} for k, v in by_id.items()], key=lambda x: x['mrr'], reverse=True)
-    return out[:limit]
+    return top_k_from_sums(by_id.items(), limit)
+
+
+def top_k_from_sums(sums: Iterable[Tuple[Any, float]], limit: int = 10) -> List[Dict[str, Any]]:
+    """Top `limit` (customer_id, mrr) pairs from already-aggregated per-customer sums.
+
+    Uses a bounded heap (O(limit) memory beyond the input), so `sums` may be a
+    generator over rollup or GROUP BY rows. Ties keep input order, as a stable
+    descending sort would.
+    """
+    leaders = heapq.nlargest(limit, sums, key=lambda item: item[1])
+    return [{'customer_id': k, 'mrr': v} for k, v in leaders]
+
+
+Chunks = Union[Iterable[Any], Callable[[], Iterable[Any]]]
+
+
+def top_customers_chunked(chunks: Chunks, limit: int = 10, max_exact_customers: int | None = DEFAULT_MAX_EXACT_CUSTOMERS) -> List[Dict[str, Any]]:
+    """`top_customers_by_mrr` over chunked input, e.g. `iter_normalized_chunks`.
+
+    Each chunk is a column batch or a list of records. Per-chunk sums are
+    computed column-wise and folded into one dict of per-customer totals, and
+    a heap then picks the leaders, so the exact answer costs one float per
+    distinct customer.
+
+    When `chunks` is a zero-argument callable returning a fresh iterator and
+    more than `max_exact_customers` distinct customers show up, the dict is
+    dropped and `top_customers_sketch` re-reads the input in two passes with
+    bounded memory. Plain iterables can only be read once and always stay exact.
+    """
+    rereadable = callable(chunks)
+    totals: Dict[str, float] = defaultdict(float)
+    for chunk in (chunks() if rereadable else chunks):
+        for cid, mrr in _chunk_sums(chunk).items():
+            totals[cid] += mrr
+        if rereadable and max_exact_customers is not None and len(totals) > max_exact_customers:
+            return top_customers_sketch(chunks, limit=limit)
+    return top_k_from_sums(totals.items(), limit)
+
+
+def top_customers_sketch(chunks: Callable[[], Iterable[Any]], limit: int = 10, width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH, oversample: int = SKETCH_OVERSAMPLE) -> List[Dict[str, Any]]:
+    """Approximate-then-exact top-K in two passes over re-readable chunked input.
+
+    Pass one adds every chunk's per-customer sums to a `depth` x `width`
+    count-min sketch and keeps the `limit * oversample` customers with the
+    highest sketch estimates seen so far. Sketch estimates never undercount
+    non-negative MRR, so the true leaders are very likely among the candidates.
+    Pass two sums MRR exactly for the candidates only, and the returned values
+    are exact. Memory is the sketch plus the candidate set, independent of the
+    number of distinct customers. Negative MRR weakens the guarantee.
+    """
+    depth = min(depth, len(_SKETCH_KEYS))
+    sketch = np.zeros((depth, width), dtype='float64')
+    keep = max(limit * oversample, limit)
+    candidates: Dict[str, float] = {}
+    for chunk in chunks():
+        sums = _chunk_sums(chunk)
+        if sums.empty:
+            continue
+        ids = sums.index.to_numpy(dtype=object)
+        slots = _sketch_slots(ids, depth, width)
+        estimate = None
+        for row in range(depth):
+            np.add.at(sketch[row], slots[row], sums.to_numpy())
+            row_est = sketch[row][slots[row]]
+            estimate = row_est if estimate is None else np.minimum(estimate, row_est)
+        if len(ids) > keep:
+            # only this chunk's `keep` highest estimates can displace a candidate
+            top = np.argpartition(estimate, -keep)[-keep:]
+            ids, estimate = ids[top], estimate[top]
+        candidates.update(zip(ids.tolist(), estimate.tolist()))
+        if len(candidates) > 2 * keep:
+            candidates = dict(heapq.nlargest(keep, candidates.items(), key=lambda item: item[1]))
+    if len(candidates) > keep:
+        candidates = dict(heapq.nlargest(keep, candidates.items(), key=lambda item: item[1]))
+
+    exact: Dict[str, float] = dict.fromkeys(candidates, 0.0)
+    for chunk in chunks():
+        sums = _chunk_sums(chunk)
+        hit = sums[sums.index.isin(exact.keys())]
+        for cid, mrr in hit.items():
+            exact[cid] += mrr
+    return top_k_from_sums(exact.items(), limit)
+
+
+def _chunk_sums(chunk) -> pd.Series:
+    """Per-customer MRR sums for one chunk, indexed by the record-style customer label."""
+    if isinstance(chunk, dict):
+        ids = pd.Series(chunk['customer_id'], dtype=object)
+        mrr = pd.Series(chunk['mrr'], dtype='float64')
+    else:
+        ids = pd.Series([r.get('customer_id') or r.get('id') or r.get('name') for r in chunk], dtype=object)
+        mrr = pd.to_numeric(pd.Series([r.get('mrr') for r in chunk], dtype=object), errors='coerce')
+    # same label fallback as top_customers_by_mrr
+    ids = ids.where(ids.notna() & (ids != ''), 'unknown').astype(str)
+    return mrr.fillna(0.0).groupby(ids.to_numpy(), sort=False).sum()
+
+
+def _sketch_slots(ids: np.ndarray, depth: int, width: int) -> np.ndarray:
+    """Column index of each id in every sketch row, from independent stable hashes."""
+    return np.stack([
+        (pd.util.hash_array(ids, hash_key=_SKETCH_KEYS[row], categorize=False) % np.uint64(width)).astype(np.int64)
+        for row in range(depth)
+    ])
+
+
+def compute_mrr_and_arr_columns(columns: Dict[str, Any]) -> Dict[str, float]:
+    """`compute_mrr_and_arr` over an 'mrr' column (NaN counts as 0)."""
+    total_mrr = float(np.nansum(np.asarray(columns['mrr'], dtype='float64')))
+    return {'MRR': total_mrr, 'ARR': total_mrr * 12}
+
+
+def top_customers_by_mrr_columns(columns: Dict[str, Any], limit: int = 10) -> List[Dict[str, Any]]:
+    """`top_customers_by_mrr` over 'customer_id' and 'mrr' columns.
+
+    Customers are factorized once and summed with `np.bincount`; only the
+    `limit` leaders are then selected (argpartition) and sorted.
+    """
+    codes, uniques = _customer_codes(columns['customer_id'])
+    if len(uniques) == 0:
+        return []
+    mrr = np.nan_to_num(np.asarray(columns['mrr'], dtype='float64'))
+    sums = np.bincount(codes, weights=mrr, minlength=len(uniques))
+    k = min(limit, len(sums))
+    if k <= 0:
+        return []
+    top = np.argpartition(-sums, k - 1)[:k] if k < len(sums) else np.arange(len(sums))
+    # stable order: by total descending, then first appearance (as the record path)
+    top = top[np.lexsort((top, -sums[top]))]
+    return [{'customer_id': uniques[i], 'mrr': float(sums[i])} for i in top]
+
+
+def _customer_codes(ids) -> Tuple[np.ndarray, np.ndarray]:
+    """(per-row codes, labels) for a customer id column, in first-seen order.
+
+    Raw ids are encoded first (`dictionary_encode` for Arrow, so string
+    columns are never turned into per-row Python objects) and only the
+    distinct values are mapped to labels; empty and missing ids become
+    'unknown', like the record path.
+    """
+    if hasattr(ids, 'dictionary_encode'):
+        if hasattr(ids, 'combine_chunks'):
+            ids = ids.combine_chunks()
+        encoded = ids.dictionary_encode(null_encoding='encode')
+        raw_codes = encoded.indices.to_numpy()
+        raw_uniques = encoded.dictionary.to_pylist()
+    else:
+        raw_codes, raw_uniques = pd.factorize(np.asarray(ids, dtype=object), use_na_sentinel=False)
+    raw_uniques = np.asarray(raw_uniques, dtype=object)
+    # pd.isna covers None, NaN and pd.NA (string dtype), which `u == u` cannot compare
+    missing = pd.isna(raw_uniques)
+    labels = np.array(['unknown' if m or u == '' else str(u) for u, m in zip(raw_uniques, missing)], dtype=object)
+    label_codes, uniques = pd.factorize(labels)
+    return label_codes[raw_codes], np.asarray(uniques, dtype=object)
+
+
+def compute_mrr_and_arr_db(queryset) -> Dict[str, float]:
+    """`compute_mrr_and_arr` as a single `SUM(mrr)` query."""
+    from django.db.models import Sum
+
+    total = queryset.order_by().aggregate(total=Sum('mrr'))['total']
+    total_mrr = float(total or 0)
+    return {'MRR': total_mrr, 'ARR': total_mrr * 12}
+
+
+def top_customers_by_mrr_db(queryset, limit: int = 10) -> List[Dict[str, Any]]:
+    """`top_customers_by_mrr` as one grouped query returning at most `limit` rows.
+
+    Customers are labelled by external id, then name, then primary key, the
+    same fallback the API uses when building records from subscriptions.
+    """
+    from django.db.models import Sum
+
+    rows = (
+        queryset.order_by()
+        .values('customer', 'customer__external_id', 'customer__name')
+        .annotate(total=Sum('mrr'))
+        .order_by('-total', 'customer')[:limit]
+    )
+    return [
+        {
+            'customer_id': r['customer__external_id'] or r['customer__name'] or str(r['customer']),
+            'mrr': float(r['total'] or 0),
+        }
+        for r in rows
+    ]
@@ -7,7 +7,9 @@ from __future__ import annotations
 
 from collections import defaultdict
 from datetime import date
-from typing import Dict, Iterable, List, Tuple
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
 
 
 def month_bucket(d: date) -> Tuple[int, int]:
@@ -19,7 +21,12 @@ def cohortize(signup_dates: Iterable[date]) -> Dict[Tuple[int, int], int]:
     """Given an iterable of signup dates, return counts per signup-month bucket.
 
     Returns a dict mapping (year, month) -> count.
+
+    A NumPy datetime64 array or a pyarrow date column (e.g. a memory-mapped
+    snapshot's 'start_date') is counted vectorized; nulls/NaT are skipped.
     """
+    if isinstance(signup_dates, np.ndarray) or hasattr(signup_dates, 'to_numpy'):
+        return cohortize_columns(signup_dates)
     counts: Dict[Tuple[int, int], int] = defaultdict(int)
     for d in signup_dates:
         if d is None:
@@ -29,6 +36,17 @@ def cohortize(signup_dates: Iterable[date]) -> Dict[Tuple[int, int], int]:
     return dict(counts)
 
 
+def cohortize_columns(signup_dates: Any) -> Dict[Tuple[int, int], int]:
+    """Column-oriented `cohortize` over an array (or Arrow column) of dates."""
+    if hasattr(signup_dates, 'type') and hasattr(signup_dates, 'to_numpy'):
+        # pyarrow Array / ChunkedArray; date columns with nulls need a copy
+        signup_dates = signup_dates.to_numpy(zero_copy_only=False)
+    months = np.asarray(signup_dates, dtype='datetime64[M]')
+    months = months[~np.isnat(months)]
+    cohort_months, counts = np.unique(months, return_counts=True)
+    return {month_bucket(m): int(c) for m, c in zip(cohort_months.astype(object), counts.tolist())}
+
+
 def retention_matrix(signup_dates_and_active_months: Iterable[Tuple[date, int]]) -> Dict[Tuple[int, int], List[int]]:
     """Build a retention matrix.
 
@@ -37,24 +55,94 @@ def retention_matrix(signup_dates_and_active_months: Iterable[Tuple[date, int]])
 
     Returns: mapping (signup_year, signup_month) -> list where index 0 is month-0 retention (should equal cohort size), index 1 is month-1 retention count, etc.
     """
-    # First, group by cohort
-    cohorts: Dict[Tuple[int, int], List[int]] = defaultdict(list)
-    for signup_date, active_months in signup_dates_and_active_months:
-        if signup_date is None:
-            continue
-        cohort = month_bucket(signup_date)
-        # We'll represent as the active months count for each member; later we convert to retention counts
-        cohorts[cohort].append(int(active_months))
+    pairs = list(signup_dates_and_active_months)
+    if not pairs:
+        return {}
+    signup_dates, active_months = zip(*pairs)
+    return retention_matrix_columns(signup_dates, active_months)
 
-    # Convert to retention counts per cohort
-    matrix: Dict[Tuple[int, int], List[int]] = {}
-    for cohort, members_active in cohorts.items():
-        max_months = max(members_active) if members_active else 0
-        # retention[i] = number of members with active_months > i
-        retention = [0] * max_months
-        for m in members_active:
-            for i in range(m):
-                retention[i] += 1
-        matrix[cohort] = retention
 
+def retention_matrix_columns(signup_dates: Any, active_months: Any) -> Dict[Tuple[int, int], List[int]]:
+    """Column-oriented `retention_matrix`.
+
+    `signup_dates` is an array of datetime64 values or dates (NaT/None rows are
+    skipped), e.g. the importer's 'signup_date' column, and `active_months` a
+    parallel array of ints. Cohorts are grouped in one pass with `np.unique`. A
+    single bincount over (cohort, lifetime) pairs plus a reverse cumulative sum
+    gives retention[i] = members with active_months > i. The cost is O(n + cohorts
+    x longest lifetime), independent of the sum of lifetimes. Returns the same
+    dict shape as `retention_matrix`.
+    """
+    months = np.asarray(signup_dates, dtype='datetime64[M]')
+    lifetimes = np.asarray(active_months, dtype='int64')
+    valid = ~np.isnat(months)
+    months = months[valid]
+    if months.size == 0:
+        return {}
+    lifetimes = np.clip(lifetimes[valid], 0, None)
+
+    cohort_months, cohort_idx = np.unique(months, return_inverse=True)
+    n_cohorts = len(cohort_months)
+    width = int(lifetimes.max()) + 1
+    # counts[c, k] = members of cohort c active for exactly k months
+    counts = np.bincount(cohort_idx * width + lifetimes, minlength=n_cohorts * width).reshape(n_cohorts, width)
+    # survivors[c, i] = members of cohort c active for more than i months
+    survivors = counts[:, ::-1].cumsum(axis=1)[:, ::-1][:, 1:]
+    longest = np.zeros(n_cohorts, dtype='int64')
+    np.maximum.at(longest, cohort_idx, lifetimes)
+
+    matrix: Dict[Tuple[int, int], List[int]] = {}
+    for month, row, length in zip(cohort_months.astype(object), survivors, longest.tolist()):
+        matrix[month_bucket(month)] = row[:length].tolist()
     return matrix
+
+
+def activity_retention(customer_ids: Any, months: Any, mrr: Any = None) -> Dict[str, Dict[Tuple[int, int], List[float]]]:
+    """Cohort retention from per-customer monthly activity rows.
+
+    Each row says customer `customer_ids[i]` was active in `months[i]` (dates or
+    datetime64, bucketed to the month) with revenue `mrr[i]`. Duplicate
+    (customer, month) rows are summed. A customer's cohort is its first active
+    month, and offsets count months since then.
+
+    Returns {'cohorts': {(y, m): size}, 'logos': {(y, m): [active customers
+    at offset 0, 1, ...]}, 'revenue': {(y, m): [MRR at offset 0, 1, ...]}}.
+    """
+    month_idx = np.asarray(months, dtype='datetime64[M]')
+    ids = np.asarray(customer_ids)
+    values = np.zeros(len(month_idx)) if mrr is None else np.asarray(mrr, dtype='float64')
+    valid = ~np.isnat(month_idx)
+    month_idx, ids, values = month_idx[valid].astype('int64'), ids[valid], values[valid]
+    if month_idx.size == 0:
+        return {'cohorts': {}, 'logos': {}, 'revenue': {}}
+
+    customers, customer_idx = np.unique(ids, return_inverse=True)
+    first = np.full(len(customers), np.iinfo('int64').max)
+    np.minimum.at(first, customer_idx, month_idx)
+    cohort_of_row = first[customer_idx]
+    offsets = month_idx - cohort_of_row
+
+    cohort_months, cohort_idx = np.unique(first, return_inverse=True)
+    row_cohort = cohort_idx[customer_idx]
+    n_cohorts = len(cohort_months)
+    width = int(offsets.max()) + 1
+    cells = row_cohort * width + offsets
+    revenue = np.bincount(cells, weights=values, minlength=n_cohorts * width).reshape(n_cohorts, width)
+    # count each customer once per (cohort, offset) even when it has several rows that month
+    unique_cells = np.unique(customer_idx * width + offsets)
+    logo_cells = cohort_idx[unique_cells // width] * width + unique_cells % width
+    logos = np.bincount(logo_cells, minlength=n_cohorts * width).reshape(n_cohorts, width)
+    sizes = np.bincount(cohort_idx, minlength=n_cohorts)
+    # a cohort's row runs up to the latest month any of its customers was seen
+    last = np.zeros(n_cohorts, dtype='int64')
+    np.maximum.at(last, row_cohort, offsets)
+
+    out = {'cohorts': {}, 'logos': {}, 'revenue': {}}
+    for month, size, logo_row, revenue_row, length in zip(
+        cohort_months.astype('datetime64[M]').astype(object), sizes.tolist(), logos, revenue, (last + 1).tolist()
+    ):
+        key = month_bucket(month)
+        out['cohorts'][key] = size
+        out['logos'][key] = logo_row[:length].tolist()
+        out['revenue'][key] = [round(v, 2) for v in revenue_row[:length].tolist()]
+    return out
@@ -0,0 +1,66 @@
+"""Monthly MRR movement series (new / expansion / contraction / churn).
+
+Server-side counterpart of the client's `computeMonthlySeries`: given one
+(customer, month, mrr) row per customer and month, each month is compared with
+the previous month that has data:
+
+- new:         MRR of customers absent from the previous month
+- expansion:   increases of customers present in both months
+- contraction: decreases of customers present in both months
+- churn:       previous-month MRR of customers that disappeared
+
+Everything is computed with pandas joins, never per customer in Python.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+MOVEMENT_FIELDS = ('total', 'new', 'expansion', 'contraction', 'churn')
+
+
+def mrr_movements(customer_ids: Any, months: Any, mrr: Any) -> List[Dict[str, Any]]:
+    """Return [{'period': 'YYYY-MM', 'total', 'new', 'expansion', 'contraction', 'churn'}, ...].
+
+    Inputs are parallel columns; `months` may hold dates or datetime64 values
+    and is bucketed to the month (rows without a month are ignored). Duplicate
+    (customer, month) rows are summed. Periods are the months present in the
+    data, oldest first; the first period counts all of its MRR as new.
+    """
+    df = pd.DataFrame({
+        'customer': np.asarray(customer_ids, dtype=object),
+        'month': np.asarray(months, dtype='datetime64[M]'),
+        'mrr': np.asarray(mrr, dtype='float64'),
+    }).dropna(subset=['month'])
+    if df.empty:
+        return []
+    df = df.groupby(['month', 'customer'], sort=False, as_index=False)['mrr'].sum()
+
+    periods = np.sort(df['month'].unique())
+    df['p'] = np.searchsorted(periods, df['month'].to_numpy())
+    prev = df[['customer', 'p', 'mrr']].assign(p=df['p'] + 1)
+    prev = prev[prev['p'] < len(periods)]
+    joined = df[['customer', 'p', 'mrr']].merge(prev, on=['customer', 'p'], how='outer', suffixes=('', '_prev'))
+    cur = joined['mrr'].fillna(0.0)
+    before = joined['mrr_prev'].fillna(0.0)
+    delta = cur - before
+    present = joined['mrr'].notna()
+    was_present = joined['mrr_prev'].notna()
+
+    moves = pd.DataFrame({
+        'p': joined['p'],
+        'total': cur,
+        'new': np.where(present & ~was_present, cur, 0.0),
+        'expansion': np.where(present & was_present & (delta > 0), delta, 0.0),
+        'contraction': np.where(present & was_present & (delta < 0), -delta, 0.0),
+        'churn': np.where(~present & was_present, before, 0.0),
+    })
+    sums = moves.groupby('p')[list(MOVEMENT_FIELDS)].sum().reindex(range(len(periods)), fill_value=0.0)
+
+    labels = pd.DatetimeIndex(periods).strftime('%Y-%m')
+    return [
+        {'period': label, **{field: round(float(row[field]), 2) for field in MOVEMENT_FIELDS}}
+        for label, (_, row) in zip(labels, sums.iterrows())
+    ]
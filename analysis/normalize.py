@@ -6,85 +6,262 @@ names (id, mrr/amount/revenue, date) and coerce values to numeric/date types.
 from __future__ import annotations
 
 import io
-from typing import List, Dict, Any
+from typing import IO, Any, Dict, Iterator, List
+import numpy as np
 import pandas as pd
 import re
-from datetime import date
+import warnings
 
 
 AMOUNT_CLEAN_RE = re.compile(r"[^0-9.\-]")
 
+# `raw` projection that keeps every source column on each record.
+RAW_ALL = '*'
 
-def _clean_amount(val: Any) -> float:
-    if val is None:
-        return 0.0
-    if isinstance(val, (int, float)):
-        return float(val)
-    s = str(val).strip()
-    if s == '':
-        return 0.0
-    # Remove common currency characters and commas
-    s = AMOUNT_CLEAN_RE.sub('', s)
+
+def _find_columns(columns) -> tuple:
+    """Return (id_col, mrr_col, date_col) for a set of CSV headers using name heuristics."""
+    cols = {str(c).lower(): c for c in columns}
+    def find(colnames):
+        for name in colnames:
+            ln = name.lower()
+            for c in cols:
+                if ln == c or ln in c or c in ln:
+                    return cols[c]
+        return None
+
+    id_col = find(['id', 'customer_id', 'customer', 'name'])
+    mrr_col = find(['mrr', 'revenue', 'amount', 'price', 'monthly_revenue', 'value'])
+    date_col = find(['date', 'signup_date', 'start_date', 'created_at', 'uploadedat'])
+    return id_col, mrr_col, date_col
+
+
+def _customer_id_column(series: pd.Series) -> np.ndarray:
+    """Stringify ids column-wise; missing ids become None."""
+    out = np.full(len(series), None, dtype=object)
+    mask = series.notna().to_numpy()
+    out[mask] = series[mask].astype(str).to_numpy()
+    return out
+
+
+def _amount_column(series: pd.Series) -> np.ndarray:
+    """Parse an amount column to float64; the one definition of amount cleaning.
+
+    Values that are already numeric (or parse as numbers) are kept; the rest get
+    currency symbols and thousands separators (`AMOUNT_CLEAN_RE`) stripped
+    before a second `pd.to_numeric` pass. Blank and still unparseable values
+    become 0.0.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        values = series.astype('float64')
+    else:
+        values = pd.to_numeric(series, errors='coerce')
+        retry = values.isna() & series.notna()
+        if retry.any():
+            cleaned = series[retry].astype(str).str.strip().str.replace(AMOUNT_CLEAN_RE.pattern, '', regex=True)
+            values[retry] = pd.to_numeric(cleaned, errors='coerce')
+    return values.fillna(0.0).to_numpy(dtype='float64')
+
+
+def _date_column(series: pd.Series) -> np.ndarray:
+    """Parse a date column once and return datetime64[D] values (NaT when unparseable).
+
+    The whole column is parsed with a single inferred format first; only values
+    that did not fit that format are re-parsed element-wise.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        try:
+            parsed = pd.to_datetime(series, errors='coerce')
+            retry = parsed.isna() & series.notna()
+            if retry.any():
+                parsed[retry] = pd.to_datetime(series[retry], errors='coerce', format='mixed')
+        except (ValueError, TypeError):
+            # e.g. mixed timezone offsets: fall back to per-value parsing
+            parsed = pd.Series(
+                [_parse_date(v) for v in series], index=series.index, dtype='datetime64[ns]'
+            )
+    if getattr(parsed.dt, 'tz', None) is not None:
+        parsed = parsed.dt.tz_localize(None)
+    return parsed.to_numpy(dtype='datetime64[D]')
+
+
+def _parse_date(val: Any):
     try:
-        return float(s)
+        dt = pd.to_datetime(val, errors='coerce')
     except Exception:
-        return 0.0
+        return pd.NaT
+    if pd.isna(dt):
+        return pd.NaT
+    return dt.tz_localize(None) if dt.tzinfo is not None else dt
 
 
-def normalize_csv_text(csv_text: str, sample_lines: int | None = None) -> List[Dict[str, Any]]:
-    """Parse CSV text into normalized billing records.
+def _project_raw(df: pd.DataFrame, raw: Any):
+    """Select the source columns to keep under 'raw': RAW_ALL, None/() for none, or a list of names.
 
-    Returns list of records with keys: 'customer_id', 'mrr', 'signup_date' (date or None), 'raw'
+    Named columns missing from the file are ignored.
     """
-    if not csv_text or not csv_text.strip():
-        return []
-    # Use pandas to read CSV robustly
+    if raw is None:
+        return None
+    if isinstance(raw, str):
+        if raw != RAW_ALL:
+            raise ValueError(f"raw must be None, {RAW_ALL!r} or a list of column names, got {raw!r}")
+        return df
+    keep = [c for c in raw if c in df.columns]
+    if not keep:
+        return None
+    return df[keep]
+
+
+def _normalize_frame_columns(df: pd.DataFrame, columns: tuple, raw: Any = RAW_ALL) -> Dict[str, Any]:
+    """Normalize an already-parsed DataFrame into a column batch.
+
+    Returns a dict of equal-length arrays: 'customer_id' (object, str or None),
+    'mrr' (float64) and 'signup_date' (datetime64[D], NaT when missing), plus
+    'raw': a DataFrame of the source columns selected by the `raw` projection
+    (see `_project_raw`), or None when nothing is kept.
+    """
+    id_col, mrr_col, date_col = columns
+    n = len(df)
+    return {
+        'customer_id': _customer_id_column(df[id_col]) if id_col else np.full(n, None, dtype=object),
+        'mrr': _amount_column(df[mrr_col]) if mrr_col else np.zeros(n, dtype='float64'),
+        'signup_date': _date_column(df[date_col]) if date_col else np.full(n, np.datetime64('NaT'), dtype='datetime64[D]'),
+        'raw': _project_raw(df, raw),
+    }
+
+
+def columns_to_records(batch: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Build the row-oriented record dicts for a column batch.
+
+    Records have keys 'customer_id', 'mrr', 'signup_date' (date or None), and
+    'raw' when the batch kept any source columns.
+    """
+    # datetime64[D] -> object yields datetime.date, and None for NaT
+    dates = batch['signup_date'].astype(object)
+    mrr = batch['mrr'].tolist()
+    if batch.get('raw') is None:
+        return [
+            {'customer_id': cid, 'mrr': m, 'signup_date': d}
+            for cid, m, d in zip(batch['customer_id'], mrr, dates)
+        ]
+    raw = batch['raw'].to_dict(orient='records')
+    return [
+        {'customer_id': cid, 'mrr': m, 'signup_date': d, 'raw': r}
+        for cid, m, d, r in zip(batch['customer_id'], mrr, dates, raw)
+    ]
+
+
+def _sniff(sample):
+    # imported lazily: analysis.schema builds on this module's column heuristics
+    from .schema import sniff_schema, DEFAULT_SAMPLE_BYTES
+    return sniff_schema(sample[:DEFAULT_SAMPLE_BYTES])
+
+
+def _schema_read_args(schema, raw):
+    """(read_csv kwargs, columns) for a schema; columns is None when they must be found from the frame."""
+    from .schema import read_csv_kwargs, frame_columns
+    if schema is None:
+        return {}, None
+    kwargs = read_csv_kwargs(schema, raw)
+    # without a projection (duplicate headers) pandas may rename columns
+    return kwargs, frame_columns(schema) if 'usecols' in kwargs else None
+
+
+def _read_csv_text(csv_text: str, sample_lines: int | None = None, schema=None, raw: Any = RAW_ALL):
+    """Parse CSV text, projected by `schema` when given; returns (df, columns) or (None, None)."""
+    kwargs, columns = _schema_read_args(schema, raw)
+    kwargs.pop('encoding', None)
     try:
-        df = pd.read_csv(io.StringIO(csv_text))
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            return pd.read_csv(io.StringIO(csv_text), nrows=sample_lines, **kwargs), columns
     except Exception:
         # fallback: try a more permissive read with python engine
         try:
-            df = pd.read_csv(io.StringIO(csv_text), engine='python')
+            return pd.read_csv(io.StringIO(csv_text), nrows=sample_lines, sep=kwargs.get('sep', ','), engine='python'), None
         except Exception:
-            return []
+            return None, None
 
-    # Heuristics for columns
-    cols = {c.lower(): c for c in df.columns}
-    def find(colnames):
-        for name in colnames:
-            ln = name.lower()
-            for c in cols:
-                if ln == c or ln in c or c in ln:
-                    return cols[c]
+
+def normalize_csv_columns(csv_text: str, sample_lines: int | None = None, raw: Any = RAW_ALL, schema=None) -> Dict[str, Any] | None:
+    """Parse CSV text into a normalized column batch (see `_normalize_frame_columns`).
+
+    `schema` is a dict from `analysis.schema.sniff_schema`; when omitted it is
+    sniffed from the start of the text. Only the columns the batch needs are
+    parsed, and at most `sample_lines` rows.
+
+    Returns None when the text is empty or cannot be parsed.
+    """
+    if not csv_text or not csv_text.strip():
         return None
+    if schema is None:
+        schema = _sniff(csv_text)
+    df, columns = _read_csv_text(csv_text, sample_lines=sample_lines, schema=schema, raw=raw)
+    if df is None:
+        return None
+    return _normalize_frame_columns(df, columns or _find_columns(df.columns), raw=raw)
 
-    id_col = find(['id', 'customer_id', 'customer', 'name'])
-    mrr_col = find(['mrr', 'revenue', 'amount', 'price', 'monthly_revenue', 'value'])
-    date_col = find(['date', 'signup_date', 'start_date', 'created_at', 'uploadedat'])
 
-    out = []
-    # Optionally limit rows if sample_lines provided
-    it = df.iterrows()
-    for idx, row in it:
-        if sample_lines is not None and idx >= sample_lines:
-            break
-        customer_id = None
-        if id_col:
-            customer_id = row.get(id_col)
-        if pd.isna(customer_id):
-            customer_id = None
-        mrr = 0.0
-        if mrr_col:
-            mrr = _clean_amount(row.get(mrr_col))
-        # If mrr looks like annual values (very large), we keep as-is — leave caller to decide
-        signup = None
-        if date_col:
-            try:
-                dt = pd.to_datetime(row.get(date_col), errors='coerce')
-                if not pd.isna(dt):
-                    signup = dt.date()
-            except Exception:
-                signup = None
-        out.append({'customer_id': str(customer_id) if customer_id is not None else None, 'mrr': float(mrr), 'signup_date': signup, 'raw': row.to_dict()})
+def normalize_csv_text(csv_text: str, sample_lines: int | None = None, raw: Any = RAW_ALL, schema=None) -> List[Dict[str, Any]]:
+    """Parse CSV text into normalized billing records.
 
-    return out
+    Returns list of records with keys: 'customer_id', 'mrr', 'signup_date' (date or None), 'raw'.
+    `raw` chooses which source columns each record keeps: RAW_ALL (default),
+    a list of column names, or None to drop 'raw' entirely.
+    """
+    batch = normalize_csv_columns(csv_text, sample_lines=sample_lines, raw=raw, schema=schema)
+    if batch is None:
+        return []
+    return columns_to_records(batch)
+
+
+def _sniff_source(source: IO):
+    """Sniff a schema from the head of a seekable file object, rewinding it; None otherwise."""
+    try:
+        from .schema import DEFAULT_SAMPLE_BYTES
+        start = source.tell()
+        sample = source.read(DEFAULT_SAMPLE_BYTES)
+        source.seek(start)
+    except Exception:
+        return None
+    return _sniff(sample) if sample else None
+
+
+def _next_chunk(reader):
+    with warnings.catch_warnings():
+        # parse_dates warns when it cannot infer one format; _date_column handles the rest
+        warnings.simplefilter('ignore', UserWarning)
+        return next(reader, None)
+
+
+def iter_normalized_chunks(source: IO, chunksize: int = 50000, sample_lines: int | None = None, columnar: bool = False, raw: Any = RAW_ALL, schema=None) -> Iterator[Any]:
+    """Stream normalized records from a CSV file object, one list per chunk.
+
+    With `columnar=True` each chunk is yielded as a column batch instead of a
+    list of record dicts, skipping per-row dict construction entirely.
+
+    `source` may be a text or binary file object. Only `chunksize` rows are held
+    in memory at a time, so this is the entry point for very large uploads.
+    Delimiter, encoding and column mapping come from `schema` (see
+    `analysis.schema`), sniffed from the head of `source` when omitted; columns
+    that neither the mapping nor the `raw` projection need are never parsed.
+    Undecodable bytes are ignored. Parse errors propagate to the caller.
+    """
+    if schema is None:
+        schema = _sniff_source(source)
+    kwargs, columns = _schema_read_args(schema, raw)
+    kwargs.setdefault('encoding', 'utf-8')
+    try:
+        reader = pd.read_csv(source, chunksize=chunksize, nrows=sample_lines, encoding_errors='ignore', **kwargs)
+    except pd.errors.EmptyDataError:
+        return
+    with reader:
+        while True:
+            df = _next_chunk(reader)
+            if df is None:
+                break
+            if columns is None:
+                columns = _find_columns(df.columns)
+            batch = _normalize_frame_columns(df, columns, raw=raw)
+            yield batch if columnar else columns_to_records(batch)
@@ -0,0 +1,147 @@
+"""Detect a CSV upload's layout from a bounded sample of its bytes.
+
+`sniff_schema` looks only at the first few KB of a file. It works out the
+delimiter, the encoding and which header maps to customer id / mrr / signup
+date. The result is a plain JSON-serializable dict, so it can be cached and
+shipped to worker processes. `read_csv_kwargs` turns it into `pd.read_csv`
+arguments, and columns the importer does not use are never materialized.
+
+Column dtypes are not forced: ids and mrr are left to the parser's
+inference. Ids then stringify exactly as in earlier imports ('007' -> '7',
+or '7.0' in a column with blanks), which existing `external_id`s and delta
+row matching depend on, and values such as '$1,200' further down a file
+than the sample still reach the mrr cleaning step.
+"""
+from __future__ import annotations
+
+import csv
+import hashlib
+from typing import Any, Dict, List
+
+from .normalize import RAW_ALL, _find_columns
+
+# Bytes read from the start of a file to detect its schema.
+DEFAULT_SAMPLE_BYTES = 64 * 1024
+
+SNIFF_DELIMITERS = ',;\t|'
+
+# Byte-order marks and the codec that strips them.
+_BOMS = (
+    (b'\xef\xbb\xbf', 'utf-8-sig'),
+    (b'\xff\xfe', 'utf-16'),
+    (b'\xfe\xff', 'utf-16'),
+)
+
+
+def detect_encoding(sample: bytes) -> str:
+    """Guess a codec for `sample`: a BOM wins, then utf-8, then cp1252."""
+    for bom, codec in _BOMS:
+        if sample.startswith(bom):
+            return codec
+    try:
+        sample.decode('utf-8')
+    except UnicodeDecodeError as exc:
+        # a multi-byte character cut off by the sample boundary is still utf-8
+        if exc.start < len(sample) - 3:
+            return 'cp1252'
+    return 'utf-8'
+
+
+def _decoded_lines(sample: bytes | str):
+    """(encoding, non-blank lines) of a sample, without a partial last line."""
+    if isinstance(sample, bytes):
+        encoding = detect_encoding(sample)
+        text = sample.decode(encoding, errors='ignore')
+    else:
+        encoding = 'utf-8'
+        text = sample
+    text = text.lstrip('\ufeff')
+    # drop a trailing partial line the sample boundary may have cut
+    lines = text.splitlines()
+    if len(lines) > 1 and not text.endswith(('\n', '\r')):
+        lines = lines[:-1]
+    return encoding, [ln for ln in lines if ln.strip()]
+
+
+def detect_delimiter(lines: List[str]) -> str:
+    try:
+        return csv.Sniffer().sniff('\n'.join(lines[:50]), delimiters=SNIFF_DELIMITERS).delimiter
+    except csv.Error:
+        return ','
+
+
+def header_key(sample: bytes | str) -> str:
+    """Stable fingerprint of a sample's dialect and header line, used as a schema cache key.
+
+    Encoding and delimiter are part of it, so two exports with the same
+    headers in different dialects do not share a schema.
+    """
+    encoding, lines = _decoded_lines(sample)
+    delimiter = detect_delimiter(lines) if lines else ','
+    header = lines[0] if lines else ''
+    return hashlib.sha256(f'{encoding}\0{delimiter}\0{header}'.encode('utf-8')).hexdigest()
+
+
+def sniff_schema(sample: bytes | str) -> Dict[str, Any] | None:
+    """Detect delimiter, encoding and header mapping from a leading sample.
+
+    `sample` is the start of a file, as bytes or already-decoded text. Returns
+    None when the sample has no header line. The returned dict has:
+
+    - 'delimiter', 'encoding'
+    - 'header': list of column names in file order
+    - 'columns': {'customer_id', 'mrr', 'signup_date'} -> header name or None
+    """
+    encoding, lines = _decoded_lines(sample)
+    if not lines:
+        return None
+
+    delimiter = detect_delimiter(lines)
+    header = next(csv.reader([lines[0]], delimiter=delimiter))
+    if not header:
+        return None
+
+    id_col, mrr_col, date_col = _find_columns(header)
+    columns = {'customer_id': id_col, 'mrr': mrr_col, 'signup_date': date_col}
+    return {
+        'delimiter': delimiter,
+        'encoding': encoding,
+        'header': header,
+        'columns': columns,
+    }
+
+
+def usecols(schema: Dict[str, Any], raw: Any = RAW_ALL) -> List[str] | None:
+    """Columns to parse: the mapped ones plus those kept under `raw`, in file order.
+
+    Returns None (parse everything) for `raw=RAW_ALL`.
+    """
+    if isinstance(raw, str) and raw == RAW_ALL:
+        return None
+    keep = {name for name in schema['columns'].values() if name is not None}
+    keep.update(raw or ())
+    return [name for name in schema['header'] if name in keep]
+
+
+def read_csv_kwargs(schema: Dict[str, Any], raw: Any = RAW_ALL) -> Dict[str, Any]:
+    """`pd.read_csv` keyword arguments for a file matching `schema`.
+
+    Headers with duplicate names are parsed unprojected, since
+    pandas renames the duplicates and name-based selection would be ambiguous.
+    """
+    kwargs = {'sep': schema['delimiter'], 'encoding': schema['encoding']}
+    header = schema['header']
+    if len(set(header)) != len(header):
+        return kwargs
+    cols = usecols(schema, raw) or None
+    kwargs['usecols'] = cols
+    date_col = schema['columns']['signup_date']
+    if date_col is not None:
+        kwargs['parse_dates'] = [date_col]
+    return kwargs
+
+
+def frame_columns(schema: Dict[str, Any]) -> tuple:
+    """The schema's (id_col, mrr_col, date_col), in `_find_columns` order."""
+    mapped = schema['columns']
+    return mapped['customer_id'], mapped['mrr'], mapped['signup_date']
@@ -0,0 +1,139 @@
+"""Columnar snapshots of normalized subscriptions (Arrow IPC files).
+
+A snapshot directory holds one Arrow IPC file per partition (the importer
+writes one per upload, see `api.snapshots`). Every file has the same schema:
+
+  customer_id  string   customer label (external id, name or pk)
+  customer_pk  int64
+  mrr          float64
+  start_date   date32   (null when unknown)
+
+Arrow IPC files can be memory-mapped, so loading a snapshot maps the file
+pages instead of copying them onto the heap. Readers scan the columns
+vectorized without touching the database.
+
+pyarrow is optional: `available()` reports whether it is installed and the
+other functions raise RuntimeError when it is not.
+"""
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except Exception:
+    pa = None
+    pa_ipc = None
+
+SNAPSHOT_SUFFIX = '.arrow'
+COLUMNS = ('customer_id', 'customer_pk', 'mrr', 'start_date')
+
+
+def available() -> bool:
+    return pa is not None
+
+
+def _require():
+    if pa is None:
+        raise RuntimeError('pyarrow is required for columnar snapshots')
+
+
+def schema():
+    _require()
+    return pa.schema([
+        ('customer_id', pa.string()),
+        ('customer_pk', pa.int64()),
+        ('mrr', pa.float64()),
+        ('start_date', pa.date32()),
+    ])
+
+
+def write_snapshot(path: str, customer_ids: Sequence[Any], customer_pks: Sequence[int], mrr: Sequence[float], start_dates: Sequence[Any],
+                   metadata: Dict[str, str] | None = None) -> int:
+    """Write one partition atomically (temp file + rename); returns the row count.
+
+    `metadata` is stored as schema metadata and read back by `snapshot_metadata`.
+    """
+    _require()
+    table = pa.table({
+        'customer_id': pa.array(customer_ids, type=pa.string()),
+        'customer_pk': pa.array(customer_pks, type=pa.int64()),
+        'mrr': pa.array(mrr, type=pa.float64()),
+        'start_date': pa.array(start_dates, type=pa.date32()),
+    }, schema=schema().with_metadata(metadata) if metadata else schema())
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f'{path}.tmp-{os.getpid()}'
+    with pa.OSFile(tmp, 'wb') as sink, pa_ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+    return table.num_rows
+
+
+def snapshot_metadata(path: str) -> Dict[str, str]:
+    """Schema metadata of one partition ({} when the file is missing or has none)."""
+    _require()
+    try:
+        with pa.memory_map(path, 'r') as source:
+            meta = pa_ipc.open_file(source).schema.metadata or {}
+    except FileNotFoundError:
+        return {}
+    return {k.decode('utf-8'): v.decode('utf-8') for k, v in meta.items()}
+
+
+def snapshot_paths(directory: str) -> List[str]:
+    """Partition files in a snapshot directory, sorted by name."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return [os.path.join(directory, n) for n in sorted(names) if n.endswith(SNAPSHOT_SUFFIX)]
+
+
+def load_snapshot(directory: str, columns: Sequence[str] | None = None, memory_map: bool = True):
+    """All partitions of a snapshot directory as one pyarrow Table.
+
+    With `memory_map=True` (default) buffers point into mapped file pages,
+    so processes reading the same snapshot share one page-cache copy.
+    """
+    _require()
+    tables = []
+    for path in snapshot_paths(directory):
+        source = pa.memory_map(path, 'r') if memory_map else pa.OSFile(path, 'rb')
+        table = pa_ipc.open_file(source).read_all()
+        tables.append(table.select(list(columns)) if columns else table)
+    if not tables:
+        empty = schema().empty_table()
+        return empty.select(list(columns)) if columns else empty
+    return pa.concat_tables(tables)
+
+
+def snapshot_columns(directory: str, columns: Sequence[str] = COLUMNS, memory_map: bool = True) -> Dict[str, np.ndarray]:
+    """Snapshot columns as NumPy arrays, shaped like the importer's column batches.
+
+    `mrr` and `customer_pk` are zero-copy views when a partition has no nulls.
+    `start_date` is datetime64[D] with NaT for nulls, and `customer_id` is an
+    object array.
+    """
+    table = load_snapshot(directory, columns=columns, memory_map=memory_map)
+    out = {}
+    for name in columns:
+        chunked = table.column(name)
+        if name == 'start_date':
+            out[name] = _concat([c.to_numpy(zero_copy_only=False) for c in chunked.chunks], 'datetime64[D]')
+        elif name == 'customer_id':
+            out[name] = _concat([c.to_numpy(zero_copy_only=False) for c in chunked.chunks], object)
+        else:
+            out[name] = _concat([c.to_numpy(zero_copy_only=c.null_count == 0) for c in chunked.chunks], None)
+    return out
+
+
+def _concat(parts: List[np.ndarray], dtype) -> np.ndarray:
+    if len(parts) == 1:
+        return parts[0] if dtype is None else parts[0].astype(dtype, copy=False)
+    if not parts:
+        return np.array([], dtype=dtype or 'float64')
+    return np.concatenate(parts).astype(dtype, copy=False) if dtype is not None else np.concatenate(parts)
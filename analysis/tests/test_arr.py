@@ -24,3 +24,56 @@ def test_top_customers():
     assert tops[0]['mrr'] == 200
     assert tops[1]['customer_id'] == 'a'
     assert tops[1]['mrr'] == 150
+
+
+def test_top_customers_ties_keep_first_seen_order():
+    records = [{'customer_id': c, 'mrr': 10} for c in 'xyz']
+    assert [t['customer_id'] for t in top_customers_by_mrr(records, limit=2)] == ['x', 'y']
+
+
+def test_top_customers_chunked_matches_full_sort():
+    import numpy as np
+    from analysis.arr import top_customers_chunked
+    records = [{'customer_id': f'c{i % 300}', 'mrr': (i * 7) % 113} for i in range(5000)]
+    expected = top_customers_by_mrr(records, limit=5)
+    record_chunks = [records[i:i + 700] for i in range(0, len(records), 700)]
+    assert top_customers_chunked(record_chunks, limit=5) == expected
+    # column batches as produced by iter_normalized_chunks(columnar=True)
+    batches = [
+        {'customer_id': np.array([r['customer_id'] for r in c], dtype=object), 'mrr': np.array([float(r['mrr']) for r in c])}
+        for c in record_chunks
+    ]
+    assert top_customers_chunked(batches, limit=5) == expected
+
+
+def test_sketch_fallback_returns_exact_leaders():
+    from analysis.arr import top_customers_chunked, top_customers_sketch
+    records = [{'customer_id': f'c{i % 2000}', 'mrr': i % 2000} for i in range(20000)]
+    records.append({'customer_id': None, 'mrr': 5})
+    chunks = lambda: (records[i:i + 3000] for i in range(0, len(records), 3000))
+    expected = top_customers_by_mrr(records, limit=3)
+    assert top_customers_sketch(chunks, limit=3, width=8192) == expected
+    # too many distinct customers for the exact dict: re-reads through the sketch
+    assert top_customers_chunked(chunks, limit=3, max_exact_customers=100) == expected
+
+
+def test_column_batches_match_records():
+    import numpy as np
+
+    rng = np.random.default_rng(3)
+    ids = rng.choice(['a', 'b', 'c', '', None], size=500).astype(object)
+    mrr = rng.integers(0, 50, size=500).astype('float64')
+    records = [{'customer_id': c, 'mrr': m} for c, m in zip(ids, mrr)]
+    columns = {'customer_id': ids, 'mrr': mrr}
+    assert compute_mrr_and_arr(columns) == compute_mrr_and_arr(records)
+    assert top_customers_by_mrr(columns, limit=3) == top_customers_by_mrr(records, limit=3)
+
+
+def test_column_batches_accept_pandas_string_ids():
+    import pandas as pd
+
+    ids = pd.array(['a', pd.NA, 'b', '', 'a'], dtype='string')
+    columns = {'customer_id': ids, 'mrr': [10.0, 5.0, 1.0, 2.0, 3.0]}
+    assert top_customers_by_mrr(columns, limit=3) == [
+        {'customer_id': 'a', 'mrr': 13.0}, {'customer_id': 'unknown', 'mrr': 7.0}, {'customer_id': 'b', 'mrr': 1.0},
+    ]
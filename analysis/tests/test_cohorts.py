@@ -40,3 +40,52 @@ def test_retention_matrix_basic():
 def test_retention_empty():
     matrix = retention_matrix([])
     assert matrix == {}
+
+
+def _reference_retention(data):
+    # the original nested-loop definition
+    matrix = {}
+    for d, m in data:
+        if d is not None:
+            matrix.setdefault((d.year, d.month), []).append(max(int(m), 0))
+    out = {}
+    for cohort, members in matrix.items():
+        out[cohort] = [sum(1 for m in members if m > i) for i in range(max(members))]
+    return out
+
+
+def test_retention_matrix_matches_reference_on_random_data():
+    import random
+    rnd = random.Random(3)
+    data = [
+        (datetime.date(2023 + rnd.randint(0, 1), rnd.randint(1, 12), rnd.randint(1, 28)) if rnd.random() > 0.05 else None, rnd.randint(0, 24))
+        for _ in range(2000)
+    ]
+    assert retention_matrix(data) == _reference_retention(data)
+
+
+def test_retention_matrix_columns_accepts_importer_arrays():
+    import numpy as np
+    from analysis.cohorts import retention_matrix_columns
+    dates = np.array(['2024-01-05', 'NaT', '2024-01-20', '2024-03-01'], dtype='datetime64[D]')
+    lifetimes = np.array([3, 5, 1, 0])
+    assert retention_matrix_columns(dates, lifetimes) == {(2024, 1): [2, 1, 1], (2024, 3): []}
+
+
+def test_activity_retention_tracks_logos_and_revenue():
+    from analysis.cohorts import activity_retention
+    rows = [
+        ('a', datetime.date(2024, 1, 5), 100),
+        ('a', datetime.date(2024, 2, 1), 120),
+        ('a', datetime.date(2024, 2, 20), 10),   # second row in the same month
+        ('b', datetime.date(2024, 1, 9), 50),
+        ('c', datetime.date(2024, 2, 3), 30),
+        ('c', datetime.date(2024, 4, 1), 40),    # churned in March, back in April
+        ('d', None, 99),
+    ]
+    ids, months, mrr = zip(*rows)
+    out = activity_retention(ids, months, mrr)
+    assert out['cohorts'] == {(2024, 1): 2, (2024, 2): 1}
+    assert out['logos'] == {(2024, 1): [2, 1], (2024, 2): [1, 0, 1]}
+    assert out['revenue'] == {(2024, 1): [150.0, 130.0], (2024, 2): [30.0, 0.0, 40.0]}
+    assert activity_retention([], [], []) == {'cohorts': {}, 'logos': {}, 'revenue': {}}
@@ -0,0 +1,27 @@
+import datetime
+
+from analysis.movements import mrr_movements
+
+
+def test_movements_classify_new_expansion_contraction_and_churn():
+    d = datetime.date
+    rows = [
+        ('a', d(2024, 1, 3), 100), ('b', d(2024, 1, 9), 50),
+        ('a', d(2024, 2, 1), 120), ('c', d(2024, 2, 4), 30),                       # b churns
+        ('a', d(2024, 3, 1), 90), ('c', d(2024, 3, 2), 20), ('c', d(2024, 3, 20), 15),  # c's rows summed
+        ('x', None, 999),
+    ]
+    ids, months, mrr = zip(*rows)
+    assert mrr_movements(ids, months, mrr) == [
+        {'period': '2024-01', 'total': 150.0, 'new': 150.0, 'expansion': 0.0, 'contraction': 0.0, 'churn': 0.0},
+        {'period': '2024-02', 'total': 150.0, 'new': 30.0, 'expansion': 20.0, 'contraction': 0.0, 'churn': 50.0},
+        {'period': '2024-03', 'total': 125.0, 'new': 0.0, 'expansion': 5.0, 'contraction': 30.0, 'churn': 0.0},
+    ]
+
+
+def test_movements_compare_with_previous_month_with_data():
+    d = datetime.date
+    out = mrr_movements(['a', 'a'], [d(2024, 1, 1), d(2024, 4, 1)], [10, 10])
+    assert [row['period'] for row in out] == ['2024-01', '2024-04']
+    assert out[1]['new'] == 0.0 and out[1]['churn'] == 0.0
+    assert mrr_movements([], [], []) == []
@@ -21,3 +21,44 @@ def test_normalize_missing_columns():
     # no mrr column -> mrr defaults to 0
     assert len(out) == 1
     assert out[0]['mrr'] == 0.0
+
+
+def test_iter_normalized_chunks_streams_in_bounded_chunks():
+    import io
+    from analysis.normalize import iter_normalized_chunks
+    csv = 'id,MRR,signup_date\n' + ''.join(f'c{i},{i},2024-01-05\n' for i in range(5))
+    chunks = list(iter_normalized_chunks(io.BytesIO(csv.encode('utf-8')), chunksize=2))
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert chunks[2][0]['customer_id'] == 'c4'
+    assert chunks[2][0]['mrr'] == 4.0
+    # sample_lines stops reading early
+    sampled = list(iter_normalized_chunks(io.BytesIO(csv.encode('utf-8')), chunksize=2, sample_lines=3))
+    assert sum(len(c) for c in sampled) == 3
+
+
+def test_normalize_csv_columns_vectorized_cleaning():
+    import datetime
+    from analysis.normalize import normalize_csv_columns
+    csv = textwrap.dedent('''
+    id,MRR,signup_date
+    cust_a,"$1,200.50",2024-01-05
+    cust_b,,not-a-date
+    ,abc,02/03/2024
+    ''')
+    batch = normalize_csv_columns(csv)
+    assert list(batch['customer_id']) == ['cust_a', 'cust_b', None]
+    assert batch['mrr'].tolist() == [1200.5, 0.0, 0.0]
+    dates = batch['signup_date'].astype(object).tolist()
+    assert dates[0] == datetime.date(2024, 1, 5)
+    assert dates[1] is None
+    # values outside the column's inferred format are still parsed
+    assert dates[2] == datetime.date(2024, 2, 3)
+
+
+def test_normalize_raw_projection():
+    from analysis.normalize import RAW_ALL
+    csv = 'id,name,MRR,plan\ncust_a,Acme,100,pro\n'
+    assert normalize_csv_text(csv)[0]['raw'] == {'id': 'cust_a', 'name': 'Acme', 'MRR': 100, 'plan': 'pro'}
+    assert normalize_csv_text(csv, raw=RAW_ALL)[0]['raw']['plan'] == 'pro'
+    assert normalize_csv_text(csv, raw=['name', 'missing'])[0]['raw'] == {'name': 'Acme'}
+    assert 'raw' not in normalize_csv_text(csv, raw=None)[0]
@@ -0,0 +1,54 @@
+import io
+
+from analysis.normalize import iter_normalized_chunks, normalize_csv_columns
+from analysis.schema import header_key, read_csv_kwargs, sniff_schema
+
+
+def test_sniff_detects_delimiter_encoding_and_mapping():
+    sample = '﻿Customer ID;Plan;MRR;Signup Date\nc1;pro;10,5;2024-01-05\n'.encode('utf-8')
+    schema = sniff_schema(sample)
+    assert schema['delimiter'] == ';'
+    assert schema['encoding'] == 'utf-8-sig'
+    assert schema['header'] == ['Customer ID', 'Plan', 'MRR', 'Signup Date']
+    assert schema['columns'] == {'customer_id': 'Customer ID', 'mrr': 'MRR', 'signup_date': 'Signup Date'}
+
+
+def test_sniff_falls_back_to_cp1252_for_non_utf8_bytes():
+    schema = sniff_schema('id,name,mrr\n1,Caf\xe9,5\n'.encode('cp1252'))
+    assert schema['encoding'] == 'cp1252'
+    assert schema['delimiter'] == ','
+
+
+def test_read_kwargs_project_only_used_columns():
+    schema = sniff_schema('id,notes,mrr,date,name\n1,x,5,2024-01-01,A\n')
+    kwargs = read_csv_kwargs(schema, raw=['name'])
+    assert kwargs['usecols'] == ['id', 'mrr', 'date', 'name']
+    assert kwargs['parse_dates'] == ['date']
+    # dtypes are left to the parser's inference
+    assert 'dtype' not in kwargs
+    assert read_csv_kwargs(schema)['usecols'] is None
+
+
+def test_typed_stream_stringifies_ids_as_before_and_drops_unused_columns():
+    csv_bytes = b'id\tnotes\tmrr\tdate\n007\tbig\t$1,200\t2024-01-05\n\tnone\t3\t2024-02-01\n'
+    batches = list(iter_normalized_chunks(io.BytesIO(csv_bytes), chunksize=10, columnar=True, raw=None))
+    assert len(batches) == 1
+    batch = batches[0]
+    # inferred as float because of the blank id, as untyped imports always did
+    assert list(batch['customer_id']) == ['7.0', None]
+    assert batch['mrr'].tolist() == [1200.0, 3.0]
+    assert str(batch['signup_date'][0]) == '2024-01-05'
+    assert batch['raw'] is None
+
+
+def test_duplicate_headers_parse_untyped():
+    batch = normalize_csv_columns('id,mrr,mrr\na,1,2\n', raw=None)
+    assert list(batch['customer_id']) == ['a']
+    assert batch['mrr'].tolist() == [1.0]
+
+
+def test_header_key_includes_encoding_and_delimiter():
+    comma = b'id,mrr\n1,5\n2,6\n'
+    assert header_key(comma) == header_key(b'id,mrr\n3,7\n')
+    assert header_key(comma) != header_key(b'id;mrr\n1;5\n2;6\n')
+    assert header_key(comma) != header_key('id,mrr\n1,Caf\xe9\n2,6\n'.encode('cp1252'))
@@ -0,0 +1,51 @@
+import datetime
+import os
+
+import pytest
+
+from analysis import snapshots
+
+pytestmark = pytest.mark.skipif(not snapshots.available(), reason='pyarrow not installed')
+
+
+def test_partitions_round_trip_through_memory_map(tmp_path):
+    d = str(tmp_path)
+    snapshots.write_snapshot(os.path.join(d, 'upload_1.arrow'), ['a', 'b'], [1, 2], [10.0, 20.5], [datetime.date(2024, 1, 5), None])
+    snapshots.write_snapshot(os.path.join(d, 'upload_2.arrow'), ['c'], [3], [7.0], [datetime.date(2024, 2, 1)])
+
+    table = snapshots.load_snapshot(d)
+    assert table.num_rows == 3
+    cols = snapshots.snapshot_columns(d)
+    assert list(cols['customer_id']) == ['a', 'b', 'c']
+    assert cols['mrr'].tolist() == [10.0, 20.5, 7.0]
+    assert str(cols['start_date'][1]) == 'NaT'
+    assert cols['start_date'].dtype == 'datetime64[D]'
+
+
+def test_single_partition_numeric_columns_are_zero_copy(tmp_path):
+    path = os.path.join(str(tmp_path), 'compacted.arrow')
+    snapshots.write_snapshot(path, ['a'], [1], [5.0], [None])
+    mrr = snapshots.snapshot_columns(str(tmp_path), columns=('mrr',))['mrr']
+    assert not mrr.flags.owndata
+
+
+def test_missing_directory_is_empty(tmp_path):
+    assert snapshots.load_snapshot(str(tmp_path / 'nope')).num_rows == 0
+
+
+def test_analysis_functions_read_mapped_columns(tmp_path):
+    from analysis.arr import compute_mrr_and_arr, top_customers_by_mrr
+    from analysis.cohorts import cohortize
+
+    d = str(tmp_path)
+    snapshots.write_snapshot(os.path.join(d, 'upload_1.arrow'), ['a', 'b', 'a'], [1, 2, 1], [10.0, 4.0, 5.0],
+                             [datetime.date(2024, 1, 5), None, datetime.date(2024, 2, 1)])
+    records = [{'customer_id': 'a', 'mrr': 10.0}, {'customer_id': 'b', 'mrr': 4.0}, {'customer_id': 'a', 'mrr': 5.0}]
+
+    cols = snapshots.snapshot_columns(d)
+    table = snapshots.load_snapshot(d)
+    for source in (cols, table):
+        assert compute_mrr_and_arr(source) == compute_mrr_and_arr(records)
+        assert top_customers_by_mrr(source, limit=2) == top_customers_by_mrr(records, limit=2)
+    assert cohortize(cols['start_date']) == {(2024, 1): 1, (2024, 2): 1}
+    assert cohortize(table.column('start_date')) == cohortize(cols['start_date'])
@@ -0,0 +1,178 @@
+"""Bulk-load backends for Subscription rows written by the importer.
+
+Rows are plain tuples of (customer_id, mrr, start_date, source_upload_id,
+row_hash) so the importer never builds model instances. The backend is picked from the
+database engine of the connection being written to:
+
+- PostgreSQL: stream rows through ``COPY ... FROM STDIN`` (psycopg2 or psycopg 3).
+- SQLite: one transaction of ``executemany`` INSERTs.
+- anything else: the ORM's ``bulk_create``.
+
+``settings.IMPORT_BULK_BACKEND`` ('copy', 'executemany' or 'orm') overrides the
+choice and ``settings.IMPORT_BULK_CHUNK_SIZE`` sets rows per COPY buffer /
+executemany call / bulk_create batch.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import OperationalError, connections, transaction
+from django.utils import timezone
+
+from .models import Subscription
+
+DEFAULT_CHUNK_SIZES = {'copy': 50000, 'executemany': 10000, 'orm': 200}
+
+_COLUMNS = ('customer', 'mrr', 'start_date', 'source_upload', 'row_hash', 'is_deleted', 'created_at')
+
+
+def load_subscriptions(rows, using: str = 'default', chunk_size: int | None = None) -> int:
+    """Insert Subscription rows with the backend suited to `using`; returns rows written."""
+    rows = list(rows)
+    if not rows:
+        return 0
+    name = get_backend_name(using)
+    if chunk_size is None:
+        chunk_size = getattr(settings, 'IMPORT_BULK_CHUNK_SIZE', None) or DEFAULT_CHUNK_SIZES[name]
+    return BACKENDS[name](rows, using, int(chunk_size))
+
+
+def get_backend_name(using: str = 'default') -> str:
+    override = getattr(settings, 'IMPORT_BULK_BACKEND', None)
+    if override:
+        if override not in BACKENDS:
+            raise ValueError(f"IMPORT_BULK_BACKEND must be one of {sorted(BACKENDS)}, got {override!r}")
+        return override
+    vendor = connections[using].vendor
+    if vendor == 'postgresql':
+        return 'copy'
+    if vendor == 'sqlite':
+        return 'executemany'
+    return 'orm'
+
+
+def _with_retries(write, max_retries: int = 6):
+    """Run `write` in a transaction, retrying transient OperationalError (e.g. sqlite locks)."""
+    retries = 0
+    while True:
+        try:
+            return write()
+        except OperationalError:
+            retries += 1
+            if retries > max_retries:
+                # escalate after several attempts
+                raise
+            time.sleep(0.2 * retries)
+
+
+def _table_and_columns(connection):
+    meta = Subscription._meta
+    qn = connection.ops.quote_name
+    cols = ', '.join(qn(meta.get_field(f).column) for f in _COLUMNS)
+    return qn(meta.db_table), cols
+
+
+def _adapt_rows(rows, connection):
+    """Convert importer tuples into DB-ready tuples, filling is_deleted and created_at.
+
+    Raw SQL bypasses model defaults, so every NOT NULL column must be supplied.
+    """
+    ops = connection.ops
+    field = Subscription._meta.get_field('mrr')
+    now = ops.adapt_datetimefield_value(timezone.now())
+    quant = Decimal(1).scaleb(-field.decimal_places)
+    for customer_id, mrr, start_date, upload_id, row_hash in rows:
+        yield (
+            customer_id,
+            str(Decimal(str(mrr or 0)).quantize(quant)),
+            ops.adapt_datefield_value(start_date),
+            upload_id,
+            row_hash or '',
+            False,
+            now,
+        )
+
+
+def copy_sql(connection, csv_format: bool = True) -> str:
+    """COPY statement for Subscription rows; `csv_format` for psycopg2's CSV buffers.
+
+    In CSV format an unquoted empty field is NULL, so FORCE_NOT_NULL keeps an
+    empty row_hash as '' like the other backends store it. None (start_date,
+    source_upload) still loads as NULL.
+    """
+    table, cols = _table_and_columns(connection)
+    sql = f'COPY {table} ({cols}) FROM STDIN'
+    if csv_format:
+        row_hash = connection.ops.quote_name(Subscription._meta.get_field('row_hash').column)
+        sql += f' WITH (FORMAT csv, FORCE_NOT_NULL ({row_hash}))'
+    return sql
+
+
+def copy_subscriptions(rows, using: str, chunk_size: int) -> int:
+    """PostgreSQL: stream rows through COPY FROM STDIN, one CSV buffer per chunk."""
+    connection = connections[using]
+
+    def write():
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            raw = cursor.cursor
+            for i in range(0, len(rows), chunk_size):
+                adapted = _adapt_rows(rows[i:i + chunk_size], connection)
+                if hasattr(raw, 'copy_expert'):
+                    # psycopg2
+                    buf = io.StringIO()
+                    csv.writer(buf).writerows(adapted)
+                    buf.seek(0)
+                    raw.copy_expert(copy_sql(connection), buf)
+                else:
+                    # psycopg 3 sends typed values, so '' stays '' without CSV options
+                    with raw.copy(copy_sql(connection, csv_format=False)) as copy:
+                        for row in adapted:
+                            copy.write_row(row)
+        return len(rows)
+
+    return _with_retries(write)
+
+
+def executemany_subscriptions(rows, using: str, chunk_size: int) -> int:
+    """Insert rows with executemany inside a single transaction."""
+    connection = connections[using]
+    table, cols = _table_and_columns(connection)
+    sql = f'INSERT INTO {table} ({cols}) VALUES ({", ".join(["%s"] * len(_COLUMNS))})'
+
+    def write():
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            for i in range(0, len(rows), chunk_size):
+                cursor.executemany(sql, list(_adapt_rows(rows[i:i + chunk_size], connection)))
+        return len(rows)
+
+    return _with_retries(write)
+
+
+def bulk_create_subscriptions(rows, using: str, chunk_size: int) -> int:
+    """Portable fallback: ORM bulk_create, one transaction per chunk."""
+    created = 0
+    for i in range(0, len(rows), chunk_size):
+        batch = [
+            Subscription(customer_id=cid, mrr=mrr or 0, start_date=start, source_upload_id=upload_id, row_hash=row_hash or '')
+            for cid, mrr, start, upload_id, row_hash in rows[i:i + chunk_size]
+        ]
+
+        def write():
+            # use atomic to ensure batch is written cleanly
+            with transaction.atomic(using=using):
+                Subscription.objects.using(using).bulk_create(batch, batch_size=chunk_size)
+            return len(batch)
+
+        created += _with_retries(write)
+    return created
+
+
+BACKENDS = {
+    'copy': copy_subscriptions,
+    'executemany': executemany_subscriptions,
+    'orm': bulk_create_subscriptions,
+}
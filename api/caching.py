@@ -0,0 +1,95 @@
+"""Per-org caching of derived analytics that only change when an import completes.
+
+Every org carries a `data_version` counter that the importer bumps once an
+import finishes (`invalidate_org`). Cached values live in the default Django
+cache under `<name>:<org_id>:v<version>`, so a bump makes every older entry
+unreachable without enumerating keys; stale entries simply expire. The same
+version drives the ETags of cached API responses.
+
+Hit/miss counts per cached value are kept in the cache as well and reported
+by `cache_stats()` for monitoring. They are only as shared as the cache
+backend: the default LocMemCache keeps one set of counters per process, so
+`cache_stats()` then reports the answering process alone. Configure a shared
+backend (`CACHE_URL`, see settings) for totals across web and worker
+processes.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+from .models import Organization
+
+DEFAULT_ORG_CACHE_SECONDS = 24 * 3600
+
+# Names of every per-org cached value.
+RETENTION = 'org_retention'
+ARR_SUMMARY = 'arr_summary'
+MOVEMENTS = 'mrr_movements'
+ORG_CACHE_NAMES = (RETENTION, ARR_SUMMARY, MOVEMENTS)
+
+# Outcomes counted per name: computed, served from cache, or answered 304.
+STAT_MISS = 'misses'
+STAT_HIT = 'hits'
+STAT_NOT_MODIFIED = 'not_modified'
+STAT_KINDS = (STAT_HIT, STAT_MISS, STAT_NOT_MODIFIED)
+
+
+def data_version(org_id: int) -> int:
+    """Current data version of an org (0 for unknown orgs)."""
+    version = Organization.objects.filter(pk=org_id).values_list('data_version', flat=True).first()
+    return version or 0
+
+
+def org_cache_key(name: str, org_id: int, version: int) -> str:
+    return f"{name}:{org_id}:v{version}"
+
+
+def etag(name: str, org_id: int, version: int | str) -> str:
+    """Strong ETag (quoted) for a cached per-org value at a data version.
+
+    `version` may carry a suffix (e.g. '3-<query>') for values cached per query.
+    """
+    return f'"{name}-{org_id}-{version}"'
+
+
+def get_or_compute(name: str, org_id: int, compute, timeout: int | None = None, version: int | None = None):
+    """Return the cached value for (name, org) at the org's data version, computing it on a miss."""
+    if version is None:
+        version = data_version(org_id)
+    key = org_cache_key(name, org_id, version)
+    value = cache.get(key)
+    if value is not None:
+        record(name, STAT_HIT)
+        return value
+    record(name, STAT_MISS)
+    value = compute()
+    if timeout is None:
+        timeout = getattr(settings, 'ORG_ANALYTICS_CACHE_SECONDS', DEFAULT_ORG_CACHE_SECONDS)
+    cache.set(key, value, timeout=timeout)
+    return value
+
+
+def invalidate_org(org_id: int) -> None:
+    """Bump an org's data version, retiring every cached value and ETag for it."""
+    Organization.objects.filter(pk=org_id).update(data_version=F('data_version') + 1)
+
+
+def record(name: str, kind: str) -> None:
+    key = f"cache_stats:{name}:{kind}"
+    # add() is a no-op when the counter exists; incr() is atomic on shared backends
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+
+
+def cache_stats() -> dict:
+    """{name: {'hits': n, 'misses': n, 'not_modified': n}} for every per-org cached value."""
+    keys = {f"cache_stats:{name}:{kind}": (name, kind) for name in ORG_CACHE_NAMES for kind in STAT_KINDS}
+    values = cache.get_many(list(keys))
+    stats = {name: dict.fromkeys(STAT_KINDS, 0) for name in ORG_CACHE_NAMES}
+    for key, (name, kind) in keys.items():
+        stats[name][kind] = values.get(key, 0)
+    return stats
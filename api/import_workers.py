@@ -0,0 +1,43 @@
+"""Process-pool workers for parallel CSV imports.
+
+This module deliberately avoids importing Django models so worker processes
+can be started (forked or spawned) without configuring Django. Workers only
+parse and normalize; every DB write happens in the parent process, which
+consumes the chunks the workers put on the shared queue.
+"""
+from __future__ import annotations
+
+from analysis.normalize import iter_normalized_chunks
+
+# Message kinds put on the result queue: (kind, upload_pk, payload)
+CHUNK = 'chunk'
+DONE = 'done'
+
+_queue = None
+
+
+def init_worker(result_queue) -> None:
+    """ProcessPoolExecutor initializer: remember the queue shared with the writer."""
+    global _queue
+    _queue = result_queue
+    # a worker whose chunks are being discarded must not block exiting on unflushed puts
+    result_queue.cancel_join_thread()
+
+
+def parse_upload_file(upload_pk: int, path: str, sample_lines: int | None, chunk_rows: int, raw, schema=None) -> int:
+    """Normalize one upload from disk, streaming column batches to the writer.
+
+    Puts (CHUNK, upload_pk, (batch, bytes_read)) for every chunk and a final
+    (DONE, upload_pk, error) where error is None on success or a message string.
+    The queue is bounded, so a slow writer throttles the parsers. `schema` is
+    the upload's detected CSV schema, sniffed in the parent so its cache is used.
+    """
+    try:
+        with open(path, 'rb') as fh:
+            for batch in iter_normalized_chunks(fh, chunksize=chunk_rows, sample_lines=sample_lines, columnar=True, raw=raw, schema=schema):
+                _queue.put((CHUNK, upload_pk, (batch, fh.tell())))
+    except Exception as exc:
+        _queue.put((DONE, upload_pk, f'{type(exc).__name__}: {exc}'))
+        return upload_pk
+    _queue.put((DONE, upload_pk, None))
+    return upload_pk
@@ -1,20 +1,163 @@
-from django.db import transaction, OperationalError
+from django.conf import settings
+from django.utils import timezone
 from .models import Customer, Subscription, UploadedCSV
-from analysis.normalize import normalize_csv_text
+from . import bulkload, caching, rollups, snapshots
+from analysis.normalize import normalize_csv_columns, iter_normalized_chunks
+from analysis.schema import DEFAULT_SAMPLE_BYTES, header_key, sniff_schema
+from collections import Counter
+import hashlib
+import logging
+import multiprocessing
+import queue
 import time
+from concurrent.futures import ProcessPoolExecutor
 
+logger = logging.getLogger(__name__)
 
-def import_single_upload(upload: UploadedCSV, sample_lines: int | None = None) -> int:
+# Uploads at or above this size are imported in streaming mode by default.
+DEFAULT_STREAMING_THRESHOLD_BYTES = 8 * 1024 * 1024
+# Rows parsed, normalized and written per streaming chunk.
+DEFAULT_STREAMING_CHUNK_ROWS = 50000
+
+IMPORT_MODE_FULL = 'full'
+IMPORT_MODE_DELTA = 'delta'
+IMPORT_MODES = (IMPORT_MODE_FULL, IMPORT_MODE_DELTA)
+
+# Source columns the importer reads beyond the normalized fields.
+IMPORT_RAW_COLUMNS = ['name']
+# External ids per `external_id__in` lookup; stays under sqlite's bound-parameter limit.
+CUSTOMER_LOOKUP_BATCH = 500
+# Subscription pks per soft-delete UPDATE, for the same reason.
+SOFT_DELETE_BATCH = 500
+# Detected CSV schemas are cached per org and header for this long.
+DEFAULT_SCHEMA_CACHE_SECONDS = 7 * 24 * 3600
+# Minimum seconds between two progress writes for the same upload.
+DEFAULT_PROGRESS_INTERVAL_SECONDS = 2.0
+
+
+class ImportProgress:
+    """Throttled progress reporting for one running import.
+
+    `update()` records rows and bytes read so far but only writes them, with an
+    estimated `rows_total` and a throughput-based `eta_seconds`, once every
+    `settings.IMPORT_PROGRESS_INTERVAL_SECONDS`. `finish()` always writes the
+    final counts. Writes use queryset.update() so they never re-trigger the
+    post_save import signal.
+    """
+
+    def __init__(self, upload: UploadedCSV, bytes_total: int | None = None, interval: float | None = None, clock=time.monotonic):
+        if bytes_total is None:
+            try:
+                bytes_total = upload.file.size
+            except Exception:
+                bytes_total = 0
+        if interval is None:
+            interval = getattr(settings, 'IMPORT_PROGRESS_INTERVAL_SECONDS', DEFAULT_PROGRESS_INTERVAL_SECONDS)
+        self.bytes_total = int(bytes_total or 0)
+        self.interval = float(interval)
+        self.rows = 0
+        self.bytes = 0
+        self._clock = clock
+        self._started = self._last_write = clock()
+        self._qs = UploadedCSV.objects.filter(pk=upload.pk)
+        self._qs.update(
+            rows_processed=0, rows_total=None, bytes_processed=0, bytes_total=self.bytes_total,
+            eta_seconds=None, progress_updated_at=timezone.now(),
+        )
+
+    def update(self, rows: int, bytes_processed: int | None = None) -> bool:
+        """Record progress; returns True when it was written to the database."""
+        self.rows = rows
+        if bytes_processed is not None:
+            self.bytes = min(bytes_processed, self.bytes_total) if self.bytes_total else bytes_processed
+        now = self._clock()
+        if now - self._last_write < self.interval:
+            return False
+        self._last_write = now
+        fields = {'rows_processed': self.rows, 'bytes_processed': self.bytes, 'progress_updated_at': timezone.now()}
+        if self.bytes_total and self.bytes:
+            fraction = self.bytes / self.bytes_total
+            fields['rows_total'] = max(self.rows, int(round(self.rows / fraction)))
+            fields['eta_seconds'] = round((now - self._started) * (1 - fraction) / fraction, 1)
+        self._qs.update(**fields)
+        return True
+
+    def finish(self, rows: int | None = None) -> None:
+        if rows is not None:
+            self.rows = rows
+        self.bytes = self.bytes_total or self.bytes
+        self._qs.update(
+            rows_processed=self.rows, rows_total=self.rows, bytes_processed=self.bytes,
+            eta_seconds=0, progress_updated_at=timezone.now(),
+        )
+
+
+def file_sha256(f) -> str:
+    """Hex SHA-256 of a Django File/UploadedFile, read in chunks and rewound afterwards."""
+    digest = hashlib.sha256()
+    for chunk in f.chunks():
+        digest.update(chunk)
+    f.seek(0)
+    return digest.hexdigest()
+
+
+def import_single_upload(upload: UploadedCSV, sample_lines: int | None = None, stream: bool | None = None, mode: str | None = None) -> int:
     """Import a single UploadedCSV into Customer and Subscription rows.
 
     Returns number of subscriptions created.
-    This implementation minimizes sqlite contention by collecting Subscription
-    instances and performing chunked bulk_create with retries on transient
+    Subscription rows are written through `api.bulkload`, which picks COPY,
+    executemany or bulk_create from the database engine and retries transient
     OperationalError.
+
+    Pass `stream=True` to force the chunked streaming importer, `stream=False`
+    to force the in-memory path. By default uploads larger than
+    `settings.IMPORT_STREAMING_THRESHOLD_BYTES` are streamed.
+
+    `mode` is 'full' (insert every row) or 'delta' (see
+    `import_single_upload_delta`); it defaults to `settings.IMPORT_MODE`.
+
+    Once the rows are written the org's columnar snapshot (`api.snapshots`) is
+    refreshed, its MRR rollups (`api.rollups`) are adjusted by the rows this
+    import changed, and its cached analytics (`api.caching`) are invalidated.
     """
     if not upload or not upload.file:
         return 0
 
+    mode = mode or getattr(settings, 'IMPORT_MODE', IMPORT_MODE_FULL)
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"import mode must be one of {IMPORT_MODES}, got {mode!r}")
+    delta = rollups.RollupDelta()
+    try:
+        if mode == IMPORT_MODE_DELTA:
+            if sample_lines is not None:
+                logger.debug('Ignoring sample_lines=%s for delta import of upload %s', sample_lines, upload.pk)
+            created = import_single_upload_delta(upload, rollup_delta=delta)
+        elif _should_stream(upload, stream):
+            # normalize_csv_text expects an int or None; ensure typing is explicit
+            created = import_single_upload_streaming(upload, sample_lines=int(sample_lines) if sample_lines is not None else None, rollup_delta=delta)
+        else:
+            created = _import_in_memory(upload, int(sample_lines) if sample_lines is not None else None, delta)
+        snapshots.refresh_after_import(upload, mode)
+    finally:
+        # a failed import may already have written some chunks; the delta holds exactly those
+        refresh_org_aggregates(upload.org, delta)
+    return created
+
+
+def refresh_org_aggregates(org, delta: rollups.RollupDelta | None = None) -> None:
+    """Bring an org's derived data up to date after its subscriptions changed.
+
+    With the `delta` of rows an import wrote, only the affected rollup rows
+    are adjusted; without one the org's rollups are rebuilt from scratch.
+    """
+    if delta is None:
+        rollups.rebuild_org_rollups(org)
+    else:
+        rollups.apply_rollup_delta(org, delta)
+    caching.invalidate_org(org.pk)
+
+
+def _import_in_memory(upload: UploadedCSV, sl: int | None, rollup_delta=None) -> int:
     try:
         upload.file.open('rb')
         raw = upload.file.read().decode('utf-8', errors='ignore')
@@ -22,43 +165,368 @@ def import_single_upload(upload: UploadedCSV, sample_lines: int | None = None) -
     except Exception:
         return 0
 
-    # normalize_csv_text expects an int or None; ensure typing is explicit
-    sl = int(sample_lines) if sample_lines is not None else None
-    recs = normalize_csv_text(raw, sample_lines=sl)
-    subs_to_create = []
-    for r in recs:
-        cid = r.get('customer_id') or None
-        name = r.get('raw', {}).get('name') if isinstance(r.get('raw'), dict) else None
-        customer, _ = Customer.objects.get_or_create(
-            org=upload.org,
-            external_id=cid,
-            defaults={'name': name or (cid or '')},
-        )
-        subs_to_create.append(Subscription(
-            customer=customer,
-            mrr=r.get('mrr') or 0,
-            start_date=r.get('signup_date'),
-            source_upload=upload,
-        ))
+    progress = ImportProgress(upload)
+    batch = normalize_csv_columns(raw, sample_lines=sl, raw=IMPORT_RAW_COLUMNS, schema=upload_schema(upload))
+    if batch is None:
+        return 0
+    created = _write_columns(upload, batch, rollup_delta)
+    progress.finish(len(batch['mrr']))
+    return created
 
-    created = 0
-    # bulk_create in chunks to reduce number of write operations
-    chunk_size = 200
-    for i in range(0, len(subs_to_create), chunk_size):
-        batch = subs_to_create[i:i + chunk_size]
-        retries = 0
-        while True:
-            try:
-                # use atomic to ensure batch is written cleanly
-                with transaction.atomic():
-                    Subscription.objects.bulk_create(batch, batch_size=chunk_size)
-                created += len(batch)
-                break
-            except OperationalError:
-                retries += 1
-                if retries > 6:
-                    # escalate after several attempts
-                    raise
-                time.sleep(0.2 * retries)
 
+def import_single_upload_streaming(upload: UploadedCSV, sample_lines: int | None = None, chunk_rows: int | None = None, rollup_delta=None) -> int:
+    """Import an UploadedCSV chunk by chunk so memory stays bounded for any file size.
+
+    Each chunk of `chunk_rows` rows is normalized and written before the next one
+    is read. Progress (rows, bytes read, estimated total and ETA) is reported
+    through `ImportProgress` so pollers can follow it. Written rows are added to
+    `rollup_delta` (an `api.rollups.RollupDelta`) when given. Returns number of
+    subscriptions created.
+    """
+    if not upload or not upload.file:
+        return 0
+    if chunk_rows is None:
+        chunk_rows = getattr(settings, 'IMPORT_STREAMING_CHUNK_ROWS', DEFAULT_STREAMING_CHUNK_ROWS)
+
+    schema = upload_schema(upload)
+    progress = ImportProgress(upload)
+    created = 0
+    rows = 0
+    upload.file.open('rb')
+    try:
+        for batch in iter_normalized_chunks(upload.file, chunksize=int(chunk_rows), sample_lines=sample_lines, columnar=True, raw=IMPORT_RAW_COLUMNS, schema=schema):
+            created += _write_columns(upload, batch, rollup_delta)
+            rows += len(batch['mrr'])
+            progress.update(rows, _bytes_read(upload.file))
+    finally:
+        upload.file.close()
+    progress.finish(rows)
     return created
+
+
+def import_single_upload_delta(upload: UploadedCSV, chunk_rows: int | None = None, rollup_delta=None) -> int:
+    """Diff an upload against the org's live subscriptions and apply only the changes.
+
+    The upload is treated as the org's full current billing snapshot. Rows are
+    matched on (customer external id, start date, occurrence) and compared by
+    `Subscription.row_hash`:
+
+    - rows with no match are inserted,
+    - matched rows whose fingerprint differs are updated in place,
+    - live rows absent from the upload are soft-deleted (`is_deleted`).
+
+    Unchanged rows are left untouched. The whole file is always read, since a
+    partial file would look like mass deletions. Counts are recorded on the
+    UploadedCSV (`rows_inserted`, `rows_updated`, `rows_deleted`); returns the
+    number of rows inserted. Every change is added to `rollup_delta` when given.
+    """
+    if not upload or not upload.file:
+        return 0
+    if chunk_rows is None:
+        chunk_rows = getattr(settings, 'IMPORT_STREAMING_CHUNK_ROWS', DEFAULT_STREAMING_CHUNK_ROWS)
+
+    if rollup_delta is None:
+        rollup_delta = rollups.RollupDelta()
+    # key -> (pk, row_hash, customer pk, mrr) for every live subscription in the org
+    existing = {}
+    occurrences = Counter()
+    live = (
+        Subscription.objects.live().filter(customer__org=upload.org).order_by('pk')
+        .values_list('pk', 'customer__external_id', 'start_date', 'row_hash', 'customer_id', 'mrr')
+    )
+    for pk, ext_id, start, row_hash, customer_pk, mrr in live.iterator(chunk_size=5000):
+        key = (ext_id, start)
+        existing[key + (occurrences[key],)] = (pk, row_hash, customer_pk, mrr)
+        occurrences[key] += 1
+
+    schema = upload_schema(upload)
+    progress = ImportProgress(upload)
+    seen = Counter()
+    inserted = updated = rows = 0
+    upload.file.open('rb')
+    try:
+        for batch in iter_normalized_chunks(upload.file, chunksize=int(chunk_rows), columnar=True, raw=IMPORT_RAW_COLUMNS, schema=schema):
+            customers = _resolve_customers(upload.org, batch['customer_id'], _batch_names(batch))
+            new_rows = []
+            changed = []
+            for cid, mrr, start, row_hash in _iter_rows_with_hashes(batch):
+                key = (cid, start)
+                match = existing.pop(key + (seen[key],), None)
+                seen[key] += 1
+                if match is None:
+                    new_rows.append((customers[cid].pk, mrr, start, upload.pk, row_hash))
+                elif match[1] != row_hash:
+                    changed.append((Subscription(pk=match[0], mrr=mrr, row_hash=row_hash, source_upload=upload), match, start))
+            inserted += bulkload.load_subscriptions(new_rows)
+            for customer_pk, mrr, start, _, _ in new_rows:
+                rollup_delta.add(customer_pk, mrr, start)
+            if changed:
+                Subscription.objects.bulk_update([sub for sub, _, _ in changed], ['mrr', 'row_hash', 'source_upload'], batch_size=500)
+                updated += len(changed)
+                for sub, (_, _, customer_pk, old_mrr), start in changed:
+                    rollup_delta.add(customer_pk, old_mrr, start, -1)
+                    rollup_delta.add(customer_pk, sub.mrr, start)
+            rows += len(batch['mrr'])
+            progress.update(rows, _bytes_read(upload.file))
+    finally:
+        upload.file.close()
+    progress.finish(rows)
+
+    removed = [pk for pk, _, _, _ in existing.values()]
+    deleted = 0
+    now = timezone.now()
+    for i in range(0, len(removed), SOFT_DELETE_BATCH):
+        deleted += Subscription.objects.filter(pk__in=removed[i:i + SOFT_DELETE_BATCH]).update(is_deleted=True, deleted_at=now)
+    for (_, start, _), (_, _, customer_pk, mrr) in existing.items():
+        rollup_delta.add(customer_pk, mrr, start, -1)
+
+    UploadedCSV.objects.filter(pk=upload.pk).update(rows_inserted=inserted, rows_updated=updated, rows_deleted=deleted)
+    logger.info('Delta import of upload %s: %s inserted, %s updated, %s deleted', upload.pk, inserted, updated, deleted)
+    return inserted
+
+
+def import_uploads_parallel(uploads, workers: int, sample_lines: int | None = None, chunk_rows: int | None = None, on_upload_done=None) -> dict:
+    """Import many uploads with CSV parsing spread over a process pool.
+
+    Workers (see `api.import_workers`) parse and normalize uploads from local
+    disk and stream column batches back over a bounded queue; this process is
+    the single DB writer, so sqlite never sees concurrent writers. Uploads whose
+    storage has no local path are imported inline.
+
+    Returns {upload_pk: {'created': int, 'rows': int, 'error': str | None}}.
+    `on_upload_done(upload, result)` is called as each upload finishes.
+    Snapshots are refreshed for the uploads that succeeded; rollups and cached
+    analytics are refreshed once per org with any upload attempted, from the
+    rows written for it, since a failed upload may already have written some
+    chunks.
+    """
+    if chunk_rows is None:
+        chunk_rows = getattr(settings, 'IMPORT_STREAMING_CHUNK_ROWS', DEFAULT_STREAMING_CHUNK_ROWS)
+    results = {}
+    local = []
+    inline = []
+    for u in uploads:
+        if not u.file:
+            continue
+        try:
+            local.append((u, u.file.path))
+        except NotImplementedError:
+            inline.append(u)
+
+    def finish(upload, result):
+        results[upload.pk] = result
+        if result['error']:
+            # update(), not save(): saving an upload re-triggers its import
+            UploadedCSV.objects.filter(pk=upload.pk).update(status=UploadedCSV.STATUS_ERROR, error_message=str(result['error']))
+        if on_upload_done:
+            on_upload_done(upload, result)
+
+    # uploads without a local file path are parsed in this process
+    for u in inline:
+        try:
+            finish(u, {'created': import_single_upload(u, sample_lines=sample_lines, stream=True), 'rows': None, 'error': None})
+        except Exception as exc:
+            finish(u, {'created': 0, 'rows': 0, 'error': str(exc)})
+    pending = {u.pk: u for u, _ in local}
+    if not pending:
+        return results
+    deltas = {u.org_id: rollups.RollupDelta() for u, _ in local}
+    try:
+        _parse_in_pool(local, pending, workers, sample_lines, chunk_rows, finish, deltas)
+    finally:
+        # inline uploads were refreshed by import_single_upload
+        try:
+            done = [u for u, _ in local if u.pk in results and not results[u.pk]['error']]
+            for u in done:
+                snapshots.refresh_after_import(u, IMPORT_MODE_FULL)
+        finally:
+            orgs = {u.org_id: u.org for u, _ in local}
+            for org in orgs.values():
+                refresh_org_aggregates(org, deltas[org.pk])
+    return results
+
+
+def _parse_in_pool(local, pending, workers, sample_lines, chunk_rows, finish, deltas) -> None:
+    from . import import_workers
+
+    ctx = multiprocessing.get_context()
+    # bound in-flight chunks so memory stays proportional to workers, not files
+    result_queue = ctx.Queue(maxsize=max(2, workers * 2))
+    progress = {pk: {'created': 0, 'rows': 0, 'error': None} for pk in pending}
+    reporters = {u.pk: ImportProgress(u) for u, _ in local}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=import_workers.init_worker, initargs=(result_queue,)) as pool:
+        futures = {
+            pool.submit(import_workers.parse_upload_file, u.pk, path, sample_lines, int(chunk_rows), IMPORT_RAW_COLUMNS, upload_schema(u)): u.pk
+            for u, path in local
+        }
+        try:
+            while pending:
+                try:
+                    kind, pk, payload = result_queue.get(timeout=1.0)
+                except queue.Empty:
+                    # a worker that died never reports DONE; surface it instead of waiting forever
+                    for fut, pk in futures.items():
+                        if pk in pending and fut.done() and fut.exception() is not None:
+                            progress[pk]['error'] = str(fut.exception())
+                            finish(pending.pop(pk), progress[pk])
+                    continue
+                if pk not in pending:
+                    # the upload already failed; drop the rest of its messages
+                    continue
+                if kind == import_workers.CHUNK:
+                    batch, bytes_read = payload
+                    try:
+                        progress[pk]['created'] += _write_columns(pending[pk], batch, deltas[pending[pk].org_id])
+                    except Exception as exc:
+                        # fail only this upload; its worker keeps producing until it is drained
+                        logger.exception('Failed to write a chunk of upload %s', pk)
+                        progress[pk]['error'] = f'{type(exc).__name__}: {exc}'
+                        finish(pending.pop(pk), progress[pk])
+                        continue
+                    progress[pk]['rows'] += len(batch['mrr'])
+                    reporters[pk].update(progress[pk]['rows'], bytes_read)
+                else:
+                    progress[pk]['error'] = payload
+                    if payload is None:
+                        reporters[pk].finish(progress[pk]['rows'])
+                    finish(pending.pop(pk), progress[pk])
+        finally:
+            # workers block on the bounded queue, so leaving the pool block
+            # (which waits for them) needs the queue drained until they finish
+            pool.shutdown(wait=False, cancel_futures=True)
+            _drain(result_queue, futures)
+
+
+def _drain(result_queue, futures) -> None:
+    """Discard queued results until every worker future has finished and the queue is empty."""
+    while True:
+        finished = all(fut.done() for fut in futures)
+        try:
+            result_queue.get(timeout=0.1)
+        except queue.Empty:
+            if finished:
+                return
+
+
+def upload_schema(upload: UploadedCSV):
+    """Detected CSV schema for an upload (see `analysis.schema.sniff_schema`).
+
+    Only the first `DEFAULT_SAMPLE_BYTES` are read. Schemas are cached per org
+    and header line, so repeat uploads of the same export skip sniffing.
+    Returns None when the file cannot be read; the normalizer then sniffs or
+    falls back to a plain parse.
+    """
+    from django.core.cache import cache
+
+    try:
+        upload.file.open('rb')
+        try:
+            sample = upload.file.read(DEFAULT_SAMPLE_BYTES)
+        finally:
+            upload.file.close()
+    except Exception:
+        return None
+    if not sample:
+        return None
+    cache_key = f"import_schema:{upload.org_id}:{header_key(sample)}"
+    schema = cache.get(cache_key)
+    if schema is None:
+        schema = sniff_schema(sample)
+        if schema is not None:
+            cache.set(cache_key, schema, timeout=getattr(settings, 'IMPORT_SCHEMA_CACHE_SECONDS', DEFAULT_SCHEMA_CACHE_SECONDS))
+    return schema
+
+
+def _should_stream(upload: UploadedCSV, stream: bool | None) -> bool:
+    if stream is not None:
+        return bool(stream)
+    threshold = getattr(settings, 'IMPORT_STREAMING_THRESHOLD_BYTES', DEFAULT_STREAMING_THRESHOLD_BYTES)
+    if threshold is None:
+        return False
+    try:
+        return upload.file.size >= threshold
+    except Exception:
+        return False
+
+
+def _bytes_read(f) -> int | None:
+    # the parser reads ahead in blocks, so this slightly leads the rows written
+    try:
+        return f.tell()
+    except Exception:
+        return None
+
+
+def _resolve_customers(org, customer_ids, names=None) -> dict:
+    """Map each distinct customer id to a Customer, creating missing ones in bulk.
+
+    `customer_ids` is the normalized id column (None for rows without an id) and
+    `names` an optional parallel column used for newly created customers.
+    Existing customers are fetched with one `external_id__in` query per batch of
+    ids and only the missing ones are inserted. `ignore_conflicts` plus the
+    (org, external_id) unique constraint keep concurrent imports from creating
+    duplicates; the inserted rows are re-read to pick up their primary keys.
+    """
+    if names is None:
+        names = [None] * len(customer_ids)
+    first_name = {}
+    for cid, name in zip(customer_ids, names):
+        cid = cid or None
+        if cid not in first_name:
+            first_name[cid] = name if isinstance(name, str) else None
+
+    customers = {}
+    ids = [cid for cid in first_name if cid is not None]
+    for i in range(0, len(ids), CUSTOMER_LOOKUP_BATCH):
+        batch = ids[i:i + CUSTOMER_LOOKUP_BATCH]
+        for c in Customer.objects.filter(org=org, external_id__in=batch):
+            customers[c.external_id] = c
+        missing = [cid for cid in batch if cid not in customers]
+        if missing:
+            Customer.objects.bulk_create(
+                [Customer(org=org, external_id=cid, name=first_name[cid] or cid) for cid in missing],
+                ignore_conflicts=True,
+            )
+            for c in Customer.objects.filter(org=org, external_id__in=missing):
+                customers[c.external_id] = c
+
+    if None in first_name:
+        # rows without an id share a single per-org customer
+        customers[None], _ = Customer.objects.get_or_create(
+            org=org,
+            external_id=None,
+            defaults={'name': first_name[None] or ''},
+        )
+    return customers
+
+
+def _batch_names(batch):
+    raw = batch.get('raw')
+    return raw['name'].tolist() if raw is not None and 'name' in raw.columns else None
+
+
+def _iter_rows_with_hashes(batch):
+    """Yield (customer_id, mrr, start_date, row_hash) for each row of a column batch.
+
+    The fingerprint covers the normalized fields a Subscription stores, so two
+    rows hash equal exactly when importing either would produce the same row.
+    """
+    # datetime64[D] -> object yields datetime.date, and None for NaT
+    for cid, mrr, start in zip(batch['customer_id'], batch['mrr'].tolist(), batch['signup_date'].astype(object)):
+        cid = cid or None
+        digest = hashlib.sha256(f'{cid}\x1f{mrr:.2f}\x1f{start}'.encode('utf-8')).hexdigest()
+        yield cid, mrr, start, digest
+
+
+def _write_columns(upload: UploadedCSV, batch, rollup_delta=None) -> int:
+    """Create Customer/Subscription rows for a normalized column batch, recording them in `rollup_delta`."""
+    customers = _resolve_customers(upload.org, batch['customer_id'], _batch_names(batch))
+    rows = [
+        (customers[cid].pk, mrr, start, upload.pk, row_hash)
+        for cid, mrr, start, row_hash in _iter_rows_with_hashes(batch)
+    ]
+    written = bulkload.load_subscriptions(rows)
+    if rollup_delta is not None:
+        for customer_pk, mrr, start, _, _ in rows:
+            rollup_delta.add(customer_pk, mrr, start)
+    return written
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.models import Organization
+from api import snapshots
+
+class Command(BaseCommand):
+    help = 'Rewrite each org\'s columnar subscription snapshot as a single file from the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--org', type=int, help='Organization id to compact (optional)')
+
+    def handle(self, *args, **options):
+        if not snapshots.enabled():
+            raise CommandError('Columnar snapshots are disabled (pyarrow missing or IMPORT_WRITE_SNAPSHOTS=False)')
+        orgs = Organization.objects.order_by('pk')
+        if options.get('org'):
+            orgs = orgs.filter(pk=options['org'])
+            if not orgs.exists():
+                raise CommandError(f"Organization {options['org']} does not exist")
+        count = 0
+        for org in orgs:
+            rows = snapshots.compact_org(org)
+            count += 1
+            self.stdout.write(f'Org {org.pk}: {rows} rows -> {snapshots.org_snapshot_dir(org.pk)}')
+        self.stdout.write(self.style.SUCCESS(f'Compacted snapshots for {count} org(s).'))
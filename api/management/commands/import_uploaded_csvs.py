@@ -1,6 +1,9 @@
-from django.core.management.base import BaseCommand
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
 from api.models import UploadedCSV
-from api.importer import import_single_upload
+from api.importer import import_single_upload, import_uploads_parallel
 
 class Command(BaseCommand):
     help = 'Import UploadedCSV files into normalized Customer and Subscription rows.'
@@ -8,18 +11,60 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('--org', type=int, help='Organization id to import for (optional)')
         parser.add_argument('--limit', type=int, default=None, help='Max rows per upload to process')
+        parser.add_argument('--workers', type=int, default=1, help='Parse/normalize uploads in N worker processes (DB writes stay in this process)')
+        parser.add_argument('--since', type=str, default=None, help='Only uploads created on or after this date (YYYY-MM-DD)')
+        parser.add_argument('--status', action='append', choices=[s for s, _ in UploadedCSV.IMPORT_STATUS_CHOICES], help='Only uploads with this import status (repeatable)')
 
     def handle(self, *args, **options):
         org_id = options.get('org')
         limit = options.get('limit')
-        qs = UploadedCSV.objects.all()
+        workers = options.get('workers') or 1
+        # duplicates share the original's file and rows; importing them would double the data
+        qs = UploadedCSV.objects.filter(duplicate_of__isnull=True)
         if org_id:
             qs = qs.filter(org_id=org_id)
-        imported = 0
-        for u in qs:
+        if options.get('since'):
+            try:
+                since = datetime.strptime(options['since'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--since must be a date in YYYY-MM-DD format')
+            qs = qs.filter(created_at__date__gte=since)
+        if options.get('status'):
+            qs = qs.filter(status__in=options['status'])
+        qs = qs.order_by('pk')
+
+        started = time.monotonic()
+        totals = {'uploads': 0, 'created': 0, 'rows': 0, 'bytes': 0, 'failed': 0}
+
+        def report(upload, result):
+            totals['uploads'] += 1
+            totals['created'] += result['created']
+            totals['rows'] += result['rows'] or 0
             try:
-                created = import_single_upload(u, sample_lines=limit)
-                imported += created
-            except Exception as e:
-                self.stderr.write(f'Failed import for upload {u.pk}: {e}')
-        self.stdout.write(self.style.SUCCESS(f'Imported {imported} subscriptions'))
+                totals['bytes'] += upload.file.size
+            except Exception:
+                pass
+            if result['error']:
+                totals['failed'] += 1
+                self.stderr.write(f'Failed import for upload {upload.pk}: {result["error"]}')
+            else:
+                self.stdout.write(f'Upload {upload.pk}: {result["created"]} subscriptions')
+
+        if workers > 1:
+            import_uploads_parallel(list(qs), workers=workers, sample_lines=limit, on_upload_done=report)
+        else:
+            for u in qs:
+                try:
+                    created = import_single_upload(u, sample_lines=limit)
+                    u.refresh_from_db(fields=['rows_processed'])
+                    report(u, {'created': created, 'rows': u.rows_processed, 'error': None})
+                except Exception as e:
+                    report(u, {'created': 0, 'rows': 0, 'error': e})
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f"Processed {totals['uploads']} uploads ({totals['failed']} failed), "
+            f"{totals['rows']} rows, {totals['bytes'] / 1e6:.1f} MB in {elapsed:.1f}s: "
+            f"{totals['rows'] / elapsed:.0f} rows/s, {totals['bytes'] / 1e6 / elapsed:.2f} MB/s"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Imported {totals['created']} subscriptions"))
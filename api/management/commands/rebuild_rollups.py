@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.models import Organization
+from api.rollups import check_org_rollups, rebuild_org_rollups
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized MRR rollups, or check them against Subscription rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--org', type=int, help='Organization id to rebuild or check (optional)')
+        parser.add_argument('--check', action='store_true', help='Report rollups that disagree with live subscriptions instead of rebuilding')
+
+    def handle(self, *args, **options):
+        orgs = Organization.objects.order_by('pk')
+        if options.get('org'):
+            orgs = orgs.filter(pk=options['org'])
+            if not orgs.exists():
+                raise CommandError(f"Organization {options['org']} does not exist")
+
+        if options.get('check'):
+            inconsistent = 0
+            for org in orgs:
+                problems = check_org_rollups(org)
+                if problems:
+                    inconsistent += 1
+                    for problem in problems:
+                        self.stderr.write(f'Org {org.pk}: {problem}')
+            if inconsistent:
+                raise CommandError(f'{inconsistent} org(s) have inconsistent rollups; run rebuild_rollups to fix')
+            self.stdout.write(self.style.SUCCESS('Rollups are consistent.'))
+            return
+
+        count = 0
+        for org in orgs:
+            rollup = rebuild_org_rollups(org)
+            count += 1
+            self.stdout.write(f'Org {org.pk}: MRR {rollup.total_mrr} over {rollup.customer_count} customers')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rollups for {count} org(s).'))
@@ -0,0 +1,17 @@
+"""Add rows_processed progress counter to UploadedCSV for streaming imports."""
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_automation_automationexecution'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadedcsv',
+            name='rows_processed',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,41 @@
+"""Enforce one Customer per (org, external_id).
+
+Existing duplicates (possible with the old per-row get_or_create under
+concurrent imports) are merged into the lowest pk before the constraints
+are added: their subscriptions are re-pointed and the extras deleted.
+"""
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_customers(apps, schema_editor):
+    Customer = apps.get_model('api', 'Customer')
+    Subscription = apps.get_model('api', 'Subscription')
+    dupes = (
+        Customer.objects.values('org_id', 'external_id')
+        .annotate(n=Count('id'), keep=Min('id'))
+        .filter(n__gt=1)
+    )
+    for d in dupes:
+        extras = Customer.objects.filter(org_id=d['org_id'], external_id=d['external_id']).exclude(pk=d['keep'])
+        Subscription.objects.filter(customer__in=extras).update(customer_id=d['keep'])
+        extras.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_uploadedcsv_rows_processed'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_customers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='customer',
+            constraint=models.UniqueConstraint(fields=('org', 'external_id'), name='api_customer_org_external_id_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='customer',
+            constraint=models.UniqueConstraint(condition=models.Q(('external_id__isnull', True)), fields=('org',), name='api_customer_org_null_external_id_uniq'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-16 20:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_customer_unique_org_external_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscription',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='subscription',
+            name='is_deleted',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='subscription',
+            name='row_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='uploadedcsv',
+            name='rows_deleted',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='uploadedcsv',
+            name='rows_inserted',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='uploadedcsv',
+            name='rows_updated',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-16 20:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_delta_import'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadedcsv',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='uploadedcsv',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='api.uploadedcsv'),
+        ),
+    ]
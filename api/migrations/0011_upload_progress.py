@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-16 20:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_upload_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadedcsv',
+            name='bytes_processed',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='uploadedcsv',
+            name='bytes_total',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='uploadedcsv',
+            name='eta_seconds',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='uploadedcsv',
+            name='progress_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='uploadedcsv',
+            name='rows_total',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.7 on 2026-10-16 20:45
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_upload_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrgMRRRollup',
+            fields=[
+                ('org', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='mrr_rollup', serialize=False, to='api.organization')),
+                ('total_mrr', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('customer_count', models.IntegerField(default=0)),
+                ('subscription_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CustomerMRRRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=255)),
+                ('mrr', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('subscription_count', models.IntegerField(default=0)),
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='mrr_rollup', to='api.customer')),
+                ('org', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='customer_mrr_rollups', to='api.organization')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['org', '-mrr'], name='api_custmrr_org_mrr_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyMRRRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('new_mrr', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('new_subscriptions', models.IntegerField(default=0)),
+                ('org', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_mrr_rollups', to='api.organization')),
+            ],
+            options={
+                'ordering': ['month'],
+                'constraints': [models.UniqueConstraint(fields=('org', 'month'), name='api_monthlymrr_org_month_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-16 20:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_mrr_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='data_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -8,6 +8,8 @@ class Organization(models.Model):
 	name = models.CharField(max_length=255)
 	slug = models.SlugField(max_length=100, unique=True)
 	created_at = models.DateTimeField(auto_now_add=True)
+	# Bumped whenever an import changes the org's data; versions per-org caches and ETags
+	data_version = models.PositiveIntegerField(default=0)
 
 	def __str__(self):
 		return self.name
@@ -36,6 +38,21 @@ class UploadedCSV(models.Model):
 	completed_at = models.DateTimeField(null=True, blank=True)
 	error_message = models.TextField(blank=True, null=True)
 	subscriptions_created = models.IntegerField(default=0)
+	# Import progress, written at most every IMPORT_PROGRESS_INTERVAL_SECONDS while an import runs.
+	# rows_total is an estimate (extrapolated from bytes read) until the import finishes.
+	rows_processed = models.IntegerField(default=0)
+	rows_total = models.IntegerField(null=True, blank=True)
+	bytes_total = models.BigIntegerField(default=0)
+	bytes_processed = models.BigIntegerField(default=0)
+	eta_seconds = models.FloatField(null=True, blank=True)
+	progress_updated_at = models.DateTimeField(null=True, blank=True)
+	# Delta imports report how the upload changed the org's live subscriptions
+	rows_inserted = models.IntegerField(default=0)
+	rows_updated = models.IntegerField(default=0)
+	rows_deleted = models.IntegerField(default=0)
+	# SHA-256 (hex) of the uploaded bytes; identical files in an org reuse the first import
+	content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
+	duplicate_of = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='duplicates')
 
 	def __str__(self):
 		return f"{self.filename} ({self.org})"
@@ -72,10 +89,28 @@ class Customer(models.Model):
 	name = models.CharField(max_length=255, blank=True)
 	created_at = models.DateTimeField(auto_now_add=True)
 
+	class Meta:
+		# One customer per external id within an org; the importer relies on these
+		# (and their backing indexes) to resolve customers in bulk without races.
+		constraints = [
+			models.UniqueConstraint(fields=['org', 'external_id'], name='api_customer_org_external_id_uniq'),
+			models.UniqueConstraint(
+				fields=['org'],
+				condition=models.Q(external_id__isnull=True),
+				name='api_customer_org_null_external_id_uniq',
+			),
+		]
+
 	def __str__(self):
 		return self.name or (self.external_id or f"Customer {self.pk}")
 
 
+class SubscriptionQuerySet(models.QuerySet):
+	def live(self):
+		"""Exclude rows soft-deleted by a delta import."""
+		return self.filter(is_deleted=False)
+
+
 class Subscription(models.Model):
 	"""Normalized subscription/billing snapshot (one row per customer/start-date)."""
 	customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='subscriptions')
@@ -83,6 +118,13 @@ class Subscription(models.Model):
 	start_date = models.DateField(null=True, blank=True)
 	source_upload = models.ForeignKey(UploadedCSV, on_delete=models.SET_NULL, null=True, blank=True)
 	created_at = models.DateTimeField(auto_now_add=True)
+	# Content fingerprint of the normalized source row; delta imports compare it to detect changes
+	row_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
+	# Rows missing from a later delta import are soft-deleted rather than removed
+	is_deleted = models.BooleanField(default=False)
+	deleted_at = models.DateTimeField(null=True, blank=True)
+
+	objects = SubscriptionQuerySet.as_manager()
 
 	class Meta:
 		indexes = [
@@ -94,6 +136,53 @@ class Subscription(models.Model):
 		return f"Subscription {self.customer} mrr={self.mrr} start={self.start_date}"
 
 
+class OrgMRRRollup(models.Model):
+	"""Materialized per-org MRR totals over live subscriptions, rebuilt by `api.rollups`."""
+	org = models.OneToOneField(Organization, on_delete=models.CASCADE, primary_key=True, related_name='mrr_rollup')
+	total_mrr = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
+	customer_count = models.IntegerField(default=0)
+	subscription_count = models.IntegerField(default=0)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	def __str__(self):
+		return f"MRR rollup {self.org} mrr={self.total_mrr}"
+
+
+class CustomerMRRRollup(models.Model):
+	"""Materialized MRR per customer; `label` is the id shown in top-customer lists."""
+	org = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='customer_mrr_rollups')
+	customer = models.OneToOneField(Customer, on_delete=models.CASCADE, related_name='mrr_rollup')
+	label = models.CharField(max_length=255)
+	mrr = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
+	subscription_count = models.IntegerField(default=0)
+
+	class Meta:
+		indexes = [
+			# top-N customers per org is an index range scan
+			models.Index(fields=['org', '-mrr'], name='api_custmrr_org_mrr_idx'),
+		]
+
+	def __str__(self):
+		return f"MRR rollup {self.label} mrr={self.mrr}"
+
+
+class MonthlyMRRRollup(models.Model):
+	"""Materialized MRR and subscription counts by start month (first day of the month)."""
+	org = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='monthly_mrr_rollups')
+	month = models.DateField()
+	new_mrr = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
+	new_subscriptions = models.IntegerField(default=0)
+
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=['org', 'month'], name='api_monthlymrr_org_month_uniq'),
+		]
+		ordering = ['month']
+
+	def __str__(self):
+		return f"MRR rollup {self.org} {self.month:%Y-%m} mrr={self.new_mrr}"
+
+
 from django.contrib.auth import get_user_model
 from django.db.models.signals import post_save
 from django.dispatch import receiver
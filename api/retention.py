@@ -0,0 +1,46 @@
+"""Cohort retention per org from Subscription history.
+
+Each customer's activity is bucketed by month in the database (see
+`api.rollups.customer_month_mrr`), so only one row per (customer, month) is
+fetched. The cohort x month grid is then built by
+`analysis.cohorts.activity_retention`. Results are cached per org through
+`api.caching` and dropped when an import completes.
+"""
+from analysis.cohorts import activity_retention
+
+from . import caching, rollups
+
+
+def compute_org_retention(org) -> dict:
+    """Logo and revenue retention for an org's live subscriptions, with 'YYYY-MM' keys.
+
+    Returns {'cohorts': {month: size}, 'logo_retention': {month: [customers]},
+    'revenue_retention': {month: [mrr]}}. Index i of a row is the count or MRR
+    i months after the cohort's first month.
+    """
+    grid = activity_retention(*rollups.customer_month_mrr(org))
+
+    def fmt(d):
+        return {f"{y:04d}-{m:02d}": v for (y, m), v in sorted(d.items())}
+
+    return {
+        'cohorts': fmt(grid['cohorts']),
+        'logo_retention': fmt(grid['logos']),
+        'revenue_retention': fmt(grid['revenue']),
+    }
+
+
+def get_org_retention(org) -> dict:
+    """`compute_org_retention`, cached per org until the next import completes."""
+    return caching.get_or_compute(caching.RETENTION, org.pk, lambda: compute_org_retention(org))
+
+
+def compute_org_movements(org) -> list:
+    """Monthly MRR movement series for an org (see `analysis.movements.mrr_movements`)."""
+    from analysis.movements import mrr_movements
+    return mrr_movements(*rollups.customer_month_mrr(org))
+
+
+def get_org_movements(org) -> list:
+    """`compute_org_movements`, cached per org until the next import completes."""
+    return caching.get_or_compute(caching.MOVEMENTS, org.pk, lambda: compute_org_movements(org))
@@ -0,0 +1,297 @@
+"""Materialized MRR rollups per org, maintained by the importer.
+
+The dashboard reads `OrgMRRRollup` for its KPIs and `CustomerMRRRollup` for
+top customers, instead of aggregating every Subscription row on each request.
+Imports maintain them incrementally: the importer records every
+subscription it inserts, updates or soft-deletes in a `RollupDelta`, and
+`apply_rollup_delta` adjusts only the affected customer and month rows and
+the org totals. `rebuild_org_rollups` recomputes everything with grouped
+aggregate queries; it runs from `manage.py rebuild_rollups` and for orgs that
+have no rollup yet. `check_org_rollups` recomputes them and reports any
+drift; `manage.py rebuild_rollups --check` wraps it.
+
+`subscription_rows` / `subscription_columns` are the row-level access path for
+code that needs every live subscription (snapshots, fallbacks): one streamed
+`values_list` query that reads customer fields through the join, never one
+Customer fetch per subscription.
+"""
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Customer, CustomerMRRRollup, MonthlyMRRRollup, OrgMRRRollup, Subscription
+
+ZERO = Decimal('0.00')
+CENT = Decimal('0.01')
+# Rollup rows per `__in` lookup; stays under sqlite's bound-parameter limit.
+ROLLUP_LOOKUP_BATCH = 500
+
+DEFAULT_STREAM_CHUNK_SIZE = 5000
+SUBSCRIPTION_ROW_FIELDS = ('customer__external_id', 'customer__name', 'customer_id', 'mrr', 'start_date')
+
+
+def customer_label(external_id, name, pk) -> str:
+    """Id shown for a customer in top-N lists; matches the legacy per-record key."""
+    return external_id or name or str(pk)
+
+
+def compute_org_rollups(org) -> dict:
+    """Aggregate an org's live subscriptions without writing anything.
+
+    Returns {'org': {...}, 'customers': {customer_pk: {...}}, 'months': {date: {...}}}.
+    """
+    live = Subscription.objects.live().filter(customer__org=org)
+    per_customer = (
+        live.order_by().values('customer')
+        .annotate(mrr=Sum('mrr'), subs=Count('pk'))
+    )
+    customers = {row['customer']: {'mrr': row['mrr'] or ZERO, 'subscription_count': row['subs']} for row in per_customer}
+    if customers:
+        for pk, external_id, name in Customer.objects.filter(pk__in=list(customers)).values_list('pk', 'external_id', 'name'):
+            customers[pk]['label'] = customer_label(external_id, name, pk)
+
+    per_month = (
+        live.filter(start_date__isnull=False).annotate(month=TruncMonth('start_date'))
+        .order_by().values('month')
+        .annotate(mrr=Sum('mrr'), subs=Count('pk'))
+    )
+    months = {row['month']: {'new_mrr': row['mrr'] or ZERO, 'new_subscriptions': row['subs']} for row in per_month}
+
+    totals = {
+        'total_mrr': sum((c['mrr'] for c in customers.values()), ZERO),
+        'customer_count': len(customers),
+        'subscription_count': sum(c['subscription_count'] for c in customers.values()),
+    }
+    return {'org': totals, 'customers': customers, 'months': months}
+
+
+def rebuild_org_rollups(org) -> OrgMRRRollup:
+    """Recompute and replace all rollup rows for one org atomically."""
+    data = compute_org_rollups(org)
+    with transaction.atomic():
+        CustomerMRRRollup.objects.filter(org=org).delete()
+        CustomerMRRRollup.objects.bulk_create(
+            [CustomerMRRRollup(org=org, customer_id=pk, **values) for pk, values in data['customers'].items()],
+            batch_size=500,
+        )
+        MonthlyMRRRollup.objects.filter(org=org).delete()
+        MonthlyMRRRollup.objects.bulk_create(
+            [MonthlyMRRRollup(org=org, month=month, **values) for month, values in data['months'].items()],
+            batch_size=500,
+        )
+        rollup, _ = OrgMRRRollup.objects.update_or_create(org=org, defaults=data['org'])
+    return rollup
+
+
+class RollupDelta:
+    """Signed MRR and subscription-count changes per customer and start month.
+
+    The importer calls `add` with +1 for each inserted subscription and -1 for
+    each soft-deleted one; an update is the old row removed and the new one
+    added. `apply_rollup_delta` writes the result.
+    """
+
+    def __init__(self):
+        self.customers = defaultdict(lambda: [ZERO, 0])
+        self.months = defaultdict(lambda: [ZERO, 0])
+
+    def __bool__(self):
+        return bool(self.customers)
+
+    def add(self, customer_pk, mrr, start_date, sign: int = 1) -> None:
+        # stored MRR is rounded to cents, as the bulk loaders write it
+        amount = Decimal(str(mrr or 0)).quantize(CENT) * sign
+        entry = self.customers[customer_pk]
+        entry[0] += amount
+        entry[1] += sign
+        if start_date is not None:
+            month = self.months[datetime.date(start_date.year, start_date.month, 1)]
+            month[0] += amount
+            month[1] += sign
+
+
+def _batches(keys):
+    keys = list(keys)
+    for i in range(0, len(keys), ROLLUP_LOOKUP_BATCH):
+        yield keys[i:i + ROLLUP_LOOKUP_BATCH]
+
+
+def apply_rollup_delta(org, delta: RollupDelta) -> OrgMRRRollup:
+    """Adjust an org's rollups by `delta`, touching only the affected customer and month rows.
+
+    Orgs without a totals rollup yet are rebuilt in full instead, since there
+    is nothing to apply the delta to. Customers and months left with no live
+    subscription lose their rollup row.
+    """
+    with transaction.atomic():
+        # the org row serializes concurrent imports of one org
+        rollup = OrgMRRRollup.objects.select_for_update().filter(org=org).first()
+        if rollup is None:
+            return rebuild_org_rollups(org)
+        if not delta:
+            return rollup
+
+        changed, emptied, created = [], [], []
+        for pks in _batches(delta.customers):
+            for row in CustomerMRRRollup.objects.filter(org=org, customer_id__in=pks):
+                mrr, count = delta.customers[row.customer_id]
+                row.mrr += mrr
+                row.subscription_count += count
+                (changed if row.subscription_count > 0 else emptied).append(row)
+        known = {row.customer_id for row in changed + emptied}
+        new_pks = [pk for pk, (_, count) in delta.customers.items() if pk not in known and count > 0]
+        for pks in _batches(new_pks):
+            for pk, external_id, name in Customer.objects.filter(pk__in=pks).values_list('pk', 'external_id', 'name'):
+                mrr, count = delta.customers[pk]
+                created.append(CustomerMRRRollup(org=org, customer_id=pk, label=customer_label(external_id, name, pk), mrr=mrr, subscription_count=count))
+        CustomerMRRRollup.objects.bulk_update(changed, ['mrr', 'subscription_count'], batch_size=500)
+        CustomerMRRRollup.objects.filter(pk__in=[row.pk for row in emptied]).delete()
+        CustomerMRRRollup.objects.bulk_create(created, batch_size=500)
+
+        months = {row.month: row for row in MonthlyMRRRollup.objects.filter(org=org, month__in=list(delta.months))}
+        month_changed, month_emptied, month_created = [], [], []
+        for month, (mrr, count) in delta.months.items():
+            row = months.get(month)
+            if row is None:
+                if count > 0:
+                    month_created.append(MonthlyMRRRollup(org=org, month=month, new_mrr=mrr, new_subscriptions=count))
+                continue
+            row.new_mrr += mrr
+            row.new_subscriptions += count
+            (month_changed if row.new_subscriptions > 0 else month_emptied).append(row)
+        MonthlyMRRRollup.objects.bulk_update(month_changed, ['new_mrr', 'new_subscriptions'], batch_size=500)
+        MonthlyMRRRollup.objects.filter(pk__in=[row.pk for row in month_emptied]).delete()
+        MonthlyMRRRollup.objects.bulk_create(month_created, batch_size=500)
+
+        OrgMRRRollup.objects.filter(org=org).update(
+            total_mrr=F('total_mrr') + sum((mrr for mrr, _ in delta.customers.values()), ZERO),
+            subscription_count=F('subscription_count') + sum(count for _, count in delta.customers.values()),
+            customer_count=F('customer_count') + len(created) - len(emptied),
+            updated_at=timezone.now(),
+        )
+        rollup.refresh_from_db()
+    return rollup
+
+
+def get_org_rollup(org) -> OrgMRRRollup:
+    """The org's totals rollup, built on first access for orgs imported before rollups existed."""
+    try:
+        return OrgMRRRollup.objects.get(org=org)
+    except OrgMRRRollup.DoesNotExist:
+        return rebuild_org_rollups(org)
+
+
+def top_customers(org, limit: int = 10) -> list:
+    """Top customers by MRR from the rollup index, shaped like `analysis.arr.top_customers_by_mrr`."""
+    rows = (
+        CustomerMRRRollup.objects.filter(org=org).order_by('-mrr', 'label')
+        .values_list('label', 'mrr')[:limit]
+    )
+    return [{'customer_id': label, 'mrr': float(mrr)} for label, mrr in rows]
+
+
+def customer_month_mrr(org) -> tuple:
+    """(customer pks, months, mrr) columns with one entry per customer and active month.
+
+    Months come from `TruncMonth('start_date')` over live subscriptions and MRR
+    is summed per (customer, month) in the database, so only those rows are
+    fetched.
+    """
+    rows = (
+        Subscription.objects.live()
+        .filter(customer__org=org, start_date__isnull=False)
+        .annotate(month=TruncMonth('start_date'))
+        .order_by().values_list('customer', 'month')
+        .annotate(mrr=Sum('mrr'))
+    )
+    customers, months, mrr = [], [], []
+    for customer, month, total in rows.iterator(chunk_size=5000):
+        customers.append(customer)
+        months.append(month)
+        mrr.append(float(total or 0))
+    return customers, months, mrr
+
+
+def subscription_rows(queryset, chunk_size: int | None = None):
+    """Stream (external_id, name, customer_pk, mrr, start_date) tuples for a Subscription queryset.
+
+    A single query, fetched `chunk_size` rows at a time (a server-side cursor
+    on PostgreSQL), so memory stays flat however many rows the org has.
+    """
+    if chunk_size is None:
+        chunk_size = getattr(settings, 'SUBSCRIPTION_STREAM_CHUNK_SIZE', DEFAULT_STREAM_CHUNK_SIZE)
+    return queryset.order_by('pk').values_list(*SUBSCRIPTION_ROW_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def subscription_columns(queryset, chunk_size: int | None = None) -> dict:
+    """`subscription_rows` as NumPy columns, shaped like `analysis.snapshots.snapshot_columns`.
+
+    Returns {'customer_id': labels (object), 'customer_pk': int64, 'mrr':
+    float64, 'start_date': datetime64[D] (NaT when unknown)}, which
+    `analysis.arr` accepts directly.
+    """
+    ids, pks, mrr, dates = [], [], [], []
+    for external_id, name, customer_pk, value, start in subscription_rows(queryset, chunk_size):
+        ids.append(customer_label(external_id, name, customer_pk))
+        pks.append(customer_pk)
+        mrr.append(float(value or 0))
+        dates.append(start)
+    return {
+        'customer_id': np.array(ids, dtype=object),
+        'customer_pk': np.array(pks, dtype='int64'),
+        'mrr': np.array(mrr, dtype='float64'),
+        'start_date': np.array(dates, dtype='datetime64[D]'),
+    }
+
+
+def check_org_rollups(org) -> list:
+    """Compare stored rollups with a fresh aggregate; returns a list of discrepancy messages."""
+    expected = compute_org_rollups(org)
+    problems = []
+
+    stored = OrgMRRRollup.objects.filter(org=org).values('total_mrr', 'customer_count', 'subscription_count').first()
+    if stored is None:
+        if expected['customers']:
+            problems.append('missing org totals rollup')
+    else:
+        for field, value in expected['org'].items():
+            if stored[field] != value:
+                problems.append(f'org {field}: stored {stored[field]}, expected {value}')
+
+    stored_customers = {
+        row['customer_id']: row
+        for row in CustomerMRRRollup.objects.filter(org=org).values('customer_id', 'label', 'mrr', 'subscription_count')
+    }
+    for pk, values in expected['customers'].items():
+        row = stored_customers.pop(pk, None)
+        if row is None:
+            problems.append(f'customer {values["label"]}: missing rollup')
+            continue
+        for field, value in values.items():
+            if row[field] != value:
+                problems.append(f'customer {values["label"]} {field}: stored {row[field]}, expected {value}')
+    for row in stored_customers.values():
+        problems.append(f'customer {row["label"]}: stale rollup')
+
+    stored_months = {
+        row['month']: row
+        for row in MonthlyMRRRollup.objects.filter(org=org).values('month', 'new_mrr', 'new_subscriptions')
+    }
+    for month, values in expected['months'].items():
+        row = stored_months.pop(month, None)
+        if row is None:
+            problems.append(f'month {month:%Y-%m}: missing rollup')
+            continue
+        for field, value in values.items():
+            if row[field] != value:
+                problems.append(f'month {month:%Y-%m} {field}: stored {row[field]}, expected {value}')
+    for month in stored_months:
+        problems.append(f'month {month:%Y-%m}: stale rollup')
+    return problems
@@ -15,9 +15,15 @@ class UploadedCSVSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'org', 'uploaded_by', 'file', 'filename', 'created_at',
             'status', 'status_started_at', 'completed_at', 'error_message', 'subscriptions_created',
+            'rows_processed', 'rows_total', 'bytes_processed', 'bytes_total', 'eta_seconds', 'progress_updated_at',
+            'rows_inserted', 'rows_updated', 'rows_deleted', 'content_hash', 'duplicate_of',
         ]
         # org and uploaded_by are set server-side; make them read-only for client requests
-        read_only_fields = ['org', 'uploaded_by', 'created_at', 'status', 'status_started_at', 'completed_at', 'error_message', 'subscriptions_created']
+        read_only_fields = [
+            'org', 'uploaded_by', 'created_at', 'status', 'status_started_at', 'completed_at', 'error_message', 'subscriptions_created',
+            'rows_processed', 'rows_total', 'bytes_processed', 'bytes_total', 'eta_seconds', 'progress_updated_at',
+            'rows_inserted', 'rows_updated', 'rows_deleted', 'content_hash', 'duplicate_of',
+        ]
 
 
 class DashboardSerializer(serializers.ModelSerializer):
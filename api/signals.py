@@ -16,7 +16,7 @@ except Exception:
     import_uploaded_csv_task = None
 
 
-def _run_import_sync(upload_id):
+def _run_import_sync(upload_id, mode=None):
     # Ensure this thread does not reuse the parent's DB connection
     try:
         close_old_connections()
@@ -60,7 +60,7 @@ def _run_import_sync(upload_id):
 
         # run import and capture exceptions to surface back to the upload record
         try:
-            created = import_single_upload(u, sample_lines=getattr(settings, 'IMPORT_SAMPLE_LINES', 200))
+            created = import_single_upload(u, sample_lines=getattr(settings, 'IMPORT_SAMPLE_LINES', 200), mode=mode)
         except Exception as exc:
             # record the full traceback/message on the upload so the frontend can show a useful message
             try:
@@ -0,0 +1,117 @@
+"""Per-org columnar snapshots of live subscriptions, written by the importer.
+
+Layout under `settings.SNAPSHOT_ROOT` (default `<MEDIA_ROOT>/snapshots`):
+
+  org_<org_id>/upload_<upload_id>.arrow   rows imported by one upload
+  org_<org_id>/compacted.arrow            everything else, after compaction
+
+A full import writes its upload's partition. Delta imports can update or
+soft-delete rows that belong to other uploads, so they compact the whole org
+instead. `compact_org` rewrites the org as a single file from the database,
+records the uploads it folded in (`UPLOAD_IDS_KEY` metadata) and removes the
+partitions that existed before it read the rows. An upload already folded
+into the compacted file is re-imported by compacting again, never as a
+second partition, so readers do not count its rows twice. Writers of one org
+are serialized on its Organization row. `manage.py compact_snapshots` runs
+`compact_org` and also picks up rows whose upload was deleted. Readers live
+in `analysis.snapshots`.
+
+Snapshots are off by default: set `IMPORT_WRITE_SNAPSHOTS = True` (and
+install pyarrow, see requirements.txt) to write them.
+"""
+import logging
+import os
+
+from django.conf import settings
+from django.db import transaction
+
+from analysis import snapshots as columnar
+
+from .models import Organization, Subscription
+from .rollups import subscription_columns
+
+logger = logging.getLogger(__name__)
+
+COMPACTED_NAME = 'compacted'
+UPLOAD_IDS_KEY = 'upload_ids'
+
+
+def enabled() -> bool:
+    return columnar.available() and getattr(settings, 'IMPORT_WRITE_SNAPSHOTS', False)
+
+
+def snapshot_root() -> str:
+    return getattr(settings, 'SNAPSHOT_ROOT', None) or os.path.join(settings.MEDIA_ROOT, 'snapshots')
+
+
+def org_snapshot_dir(org_id: int) -> str:
+    return os.path.join(snapshot_root(), f'org_{org_id}')
+
+
+def _partition_path(org_id: int, name: str) -> str:
+    return os.path.join(org_snapshot_dir(org_id), f'{name}{columnar.SNAPSHOT_SUFFIX}')
+
+
+def _write_rows(path: str, queryset, metadata=None) -> int:
+    cols = subscription_columns(queryset)
+    return columnar.write_snapshot(path, cols['customer_id'], cols['customer_pk'], cols['mrr'], cols['start_date'].astype(object), metadata=metadata)
+
+
+def compacted_upload_ids(org_id: int) -> set[int]:
+    """Uploads whose rows are in the org's compacted file."""
+    ids = columnar.snapshot_metadata(_partition_path(org_id, COMPACTED_NAME)).get(UPLOAD_IDS_KEY, '')
+    return {int(pk) for pk in ids.split(',') if pk}
+
+
+def _lock_org(org_id: int) -> None:
+    # serializes snapshot writers of one org for the enclosing transaction
+    Organization.objects.select_for_update().filter(pk=org_id).first()
+
+
+def write_upload_snapshot(upload) -> int | None:
+    """(Re)write the partition for one upload's live subscriptions; None when snapshots are disabled.
+
+    An upload already folded into the compacted file is compacted again instead.
+    """
+    if not enabled():
+        return None
+    with transaction.atomic():
+        _lock_org(upload.org_id)
+        if upload.pk in compacted_upload_ids(upload.org_id):
+            return _compact(upload.org_id)
+        live = Subscription.objects.live().filter(source_upload=upload)
+        return _write_rows(_partition_path(upload.org_id, f'upload_{upload.pk}'), live)
+
+
+def compact_org(org) -> int | None:
+    """Rewrite an org's snapshot as one file from its live subscriptions; returns rows written."""
+    if not enabled():
+        return None
+    with transaction.atomic():
+        _lock_org(org.pk)
+        return _compact(org.pk)
+
+
+def _compact(org_id: int) -> int:
+    target = _partition_path(org_id, COMPACTED_NAME)
+    # only partitions written before the rows are read are folded in
+    folded = [path for path in columnar.snapshot_paths(org_snapshot_dir(org_id)) if path != target]
+    live = Subscription.objects.live().filter(customer__org_id=org_id)
+    upload_ids = live.order_by().exclude(source_upload__isnull=True).values_list('source_upload_id', flat=True).distinct()
+    metadata = {UPLOAD_IDS_KEY: ','.join(str(pk) for pk in sorted(upload_ids))}
+    rows = _write_rows(target, live, metadata)
+    for path in folded:
+        os.remove(path)
+    return rows
+
+
+def refresh_after_import(upload, mode: str) -> None:
+    """Keep the org's snapshot in step with an import; failures are logged, never raised."""
+    from .importer import IMPORT_MODE_DELTA
+    try:
+        if mode == IMPORT_MODE_DELTA:
+            compact_org(upload.org)
+        else:
+            write_upload_snapshot(upload)
+    except Exception:
+        logger.exception('Failed to write columnar snapshot for upload %s', upload.pk)
@@ -63,8 +63,10 @@ logger = get_task_logger(__name__)
 def import_uploaded_csv_task(self, upload_id: int, *args, **kwargs) -> int:
     """Celery task wrapper to import a single UploadedCSV by id.
 
-    Retries up to 3 times with exponential backoff on failures.
+    Retries up to 3 times with exponential backoff on failures. An optional
+    `mode` kwarg ('full' or 'delta') is passed through to the importer.
     """
+    mode = kwargs.get('mode')
     try:
         u = UploadedCSV.objects.get(pk=upload_id)
     except UploadedCSV.DoesNotExist:
@@ -88,10 +90,10 @@ def import_uploaded_csv_task(self, upload_id: int, *args, **kwargs) -> int:
     # mark the UploadedCSV as errored before re-raising for Celery to retry.
     if self is None:
         # direct call; let exceptions propagate
-        created = importer.import_single_upload(u)
+        created = importer.import_single_upload(u, mode=mode)
     else:
         try:
-            created = importer.import_single_upload(u)
+            created = importer.import_single_upload(u, mode=mode)
         except DatabaseError as exc:
             try:
                 u.status = UploadedCSV.STATUS_ERROR
@@ -0,0 +1,36 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from analysis.arr import compute_mrr_and_arr, top_customers_by_mrr
+from api.models import Customer, Organization, Subscription
+
+
+class QuerysetARRTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name='ArrOrg', slug='arrorg')
+        other = Organization.objects.create(name='Other', slug='other')
+        a = Customer.objects.create(org=self.org, external_id='a')
+        b = Customer.objects.create(org=self.org, external_id=None, name='Bee')
+        c = Customer.objects.create(org=self.org, external_id='c')
+        for customer, mrr in ((a, '100'), (a, '50'), (b, '200'), (c, '10')):
+            Subscription.objects.create(customer=customer, mrr=Decimal(mrr))
+        Subscription.objects.create(customer=Customer.objects.create(org=other, external_id='x'), mrr=Decimal('999'))
+        self.qs = Subscription.objects.live().filter(customer__org=self.org)
+
+    def test_totals_are_one_sum_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(compute_mrr_and_arr(self.qs), {'MRR': 360.0, 'ARR': 4320.0})
+
+    def test_top_n_is_one_grouped_query(self):
+        with self.assertNumQueries(1):
+            tops = top_customers_by_mrr(self.qs, limit=2)
+        self.assertEqual(tops, [{'customer_id': 'Bee', 'mrr': 200.0}, {'customer_id': 'a', 'mrr': 150.0}])
+
+    def test_matches_in_memory_records(self):
+        records = [
+            {'customer_id': s.customer.external_id or s.customer.name, 'mrr': float(s.mrr)}
+            for s in self.qs.select_related('customer')
+        ]
+        self.assertEqual(top_customers_by_mrr(self.qs), top_customers_by_mrr(records))
+        self.assertEqual(compute_mrr_and_arr(Subscription.objects.none()), {'MRR': 0.0, 'ARR': 0.0})
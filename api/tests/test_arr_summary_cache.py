@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.importer import import_single_upload
+from api.models import Organization, UploadedCSV
+
+
+class ARRSummaryCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name='CacheOrg', slug='cacheorg')
+        self.user = get_user_model().objects.create_user(username='cache', password='p')
+        self.user.profile.org = self.org
+        self.user.profile.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self._import('a.csv', 'id,MRR,signup_date\na,100,2024-01-05\n')
+
+    def _import(self, name, csv):
+        u = UploadedCSV.objects.create(org=self.org, filename=name, status=UploadedCSV.STATUS_COMPLETE)
+        u.file.save(name, ContentFile(csv.encode('utf-8')))
+        import_single_upload(u)
+
+    def test_etag_round_trip_and_import_invalidation(self):
+        first = self.client.get('/api/arr-summary/')
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+        self.assertEqual(first.data['arr_kpis']['MRR'], 100.0)
+
+        # unchanged data: 304 after a single version lookup
+        with self.assertNumQueries(1):
+            not_modified = self.client.get('/api/arr-summary/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], etag)
+
+        # cached payload served without recomputing the summary
+        with self.assertNumQueries(1):
+            cached = self.client.get('/api/arr-summary/')
+        self.assertEqual(cached.data, first.data)
+
+        self._import('b.csv', 'id,MRR,signup_date\nb,50,2024-02-01\n')
+        fresh = self.client.get('/api/arr-summary/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(fresh.status_code, 200)
+        self.assertNotEqual(fresh['ETag'], etag)
+        self.assertEqual(fresh.data['arr_kpis']['MRR'], 150.0)
+
+    def test_cache_stats_are_staff_only(self):
+        self.client.get('/api/arr-summary/')
+        self.client.get('/api/arr-summary/')
+        self.assertEqual(self.client.get('/api/cache-stats/').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        stats = self.client.get('/api/cache-stats/').data
+        self.assertEqual(stats['arr_summary'], {'hits': 1, 'misses': 1, 'not_modified': 0})
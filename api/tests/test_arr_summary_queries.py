@@ -0,0 +1,70 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.models import Customer, Organization, Subscription
+from api.rollups import rebuild_org_rollups, subscription_columns
+
+
+class ARRSummaryQueryCountTests(TestCase):
+    """The summary must cost the same number of queries for 3 or 300 subscriptions."""
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='QOrg', slug='qorg')
+        self.user = get_user_model().objects.create_user(username='q', password='p')
+        self.user.profile.org = self.org
+        self.user.profile.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _add_subscriptions(self, count):
+        start = Customer.objects.filter(org=self.org).count()
+        customers = Customer.objects.bulk_create(
+            [Customer(org=self.org, external_id=f'c{start + i}' if start + i else None, name=f'Name {start + i}') for i in range(count)]
+        )
+        Subscription.objects.bulk_create(
+            [Subscription(customer=c, mrr=Decimal(10 + i), start_date=f'2024-{i % 12 + 1:02d}-01') for i, c in enumerate(customers)]
+        )
+        rebuild_org_rollups(self.org)
+
+    def _cold_query_count(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get('/api/arr-summary/')
+        self.assertEqual(resp.status_code, 200)
+        return len(ctx.captured_queries), resp.data
+
+    def test_rollup_path_is_constant(self):
+        self._add_subscriptions(3)
+        small, _ = self._cold_query_count()
+        self._add_subscriptions(300)
+        large, data = self._cold_query_count()
+        self.assertEqual(small, large)
+        self.assertEqual(len(data['top_customers']), 10)
+        self.assertEqual(data['top_customers'][0]['mrr'], 309.0)
+
+    def test_fallback_streams_subscriptions_in_constant_queries(self):
+        with mock.patch('api.rollups.get_org_rollup', side_effect=RuntimeError('no rollups')):
+            self._add_subscriptions(3)
+            small, _ = self._cold_query_count()
+            self._add_subscriptions(300)
+            large, data = self._cold_query_count()
+        self.assertEqual(small, large)
+        expected = float(sum(Subscription.objects.values_list('mrr', flat=True)))
+        self.assertEqual(data['arr_kpis']['MRR'], expected)
+        self.assertEqual(data['top_customers'][0], {'customer_id': 'c302', 'mrr': 309.0})
+
+    def test_subscription_columns_is_one_query(self):
+        self._add_subscriptions(50)
+        with self.assertNumQueries(1):
+            cols = subscription_columns(Subscription.objects.live().filter(customer__org=self.org), chunk_size=7)
+        self.assertEqual(len(cols['mrr']), 50)
+        self.assertEqual(cols['customer_id'][0], 'Name 0')
+        self.assertEqual(cols['customer_id'][1], 'c1')
+        self.assertEqual(str(cols['start_date'][0]), '2024-01-01')
@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.core.files.base import ContentFile
+from rest_framework.test import APIClient
+
+from api.importer import import_single_upload
+from api.models import Organization, UploadedCSV, Subscription
+from django.contrib.auth import get_user_model
+
+
+class DeltaImportTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name='DeltaOrg', slug='deltaorg')
+
+    def _upload(self, name, csv):
+        u = UploadedCSV.objects.create(org=self.org, filename=name, status=UploadedCSV.STATUS_COMPLETE)
+        u.file.save(name, ContentFile(csv.encode('utf-8')))
+        return u
+
+    def test_delta_inserts_updates_and_soft_deletes(self):
+        first = self._upload('jan.csv', 'id,MRR,signup_date\na,100,2024-01-01\nb,200,2024-01-01\nc,300,2024-01-01\n')
+        self.assertEqual(import_single_upload(first), 3)
+
+        # b changes, c disappears, d is new, a is unchanged
+        second = self._upload('feb.csv', 'id,MRR,signup_date\na,100,2024-01-01\nb,250,2024-01-01\nd,50,2024-02-01\n')
+        self.assertEqual(import_single_upload(second, mode='delta'), 1)
+
+        second.refresh_from_db()
+        self.assertEqual((second.rows_inserted, second.rows_updated, second.rows_deleted), (1, 1, 1))
+        live = {s.customer.external_id: s for s in Subscription.objects.live().select_related('customer')}
+        self.assertEqual(sorted(live), ['a', 'b', 'd'])
+        self.assertEqual(live['a'].source_upload_id, first.pk)
+        self.assertEqual(live['b'].mrr, Decimal('250.00'))
+        self.assertEqual(live['b'].source_upload_id, second.pk)
+        removed = Subscription.objects.get(customer__external_id='c')
+        self.assertTrue(removed.is_deleted)
+        self.assertIsNotNone(removed.deleted_at)
+
+        # re-running the same file is a no-op
+        import_single_upload(second, mode='delta')
+        second.refresh_from_db()
+        self.assertEqual((second.rows_inserted, second.rows_updated, second.rows_deleted), (0, 0, 0))
+
+    def test_reimport_api_accepts_delta_for_imported_upload(self):
+        user = get_user_model().objects.create_user(username='delta', password='p')
+        user.profile.org = self.org
+        user.profile.save()
+        client = APIClient()
+        client.force_authenticate(user=user)
+        u = self._upload('re.csv', 'id,MRR,signup_date\na,10,2024-01-01\n')
+        import_single_upload(u)
+
+        with override_settings(DEBUG_IMPORT_SYNC=True):
+            bad = client.post(f'/api/uploads/{u.pk}/reimport/', {'mode': 'sideways'})
+            self.assertEqual(bad.status_code, 400)
+            resp = client.post(f'/api/uploads/{u.pk}/reimport/', {'mode': 'delta'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(Subscription.objects.live().filter(customer__org=self.org).count(), 1)
+        self.assertEqual(client.get(f'/api/uploads/{u.pk}/').data['rows_updated'], 0)
@@ -1,3 +1,5 @@
+from io import StringIO
+
 from django.test import TestCase
 from django.core.files.base import ContentFile
 from django.core.management import call_command
@@ -23,3 +25,151 @@ class ImportUploadsTest(TestCase):
         subs = Subscription.objects.filter(customer__org=self.org)
         self.assertEqual(customers.count(), 2)
         self.assertEqual(subs.count(), 2)
+
+
+class StreamingImportTest(TestCase):
+    def test_streaming_import_writes_all_chunks_and_reports_progress(self):
+        from api.importer import import_single_upload
+        org = Organization.objects.create(name='StreamOrg', slug='streamorg')
+        u = UploadedCSV.objects.create(org=org, filename='stream.csv', status=UploadedCSV.STATUS_COMPLETE)
+        csv = 'id,MRR,signup_date\n' + ''.join(f'c{i},{i + 1},2024-01-05\n' for i in range(7))
+        u.file.save('stream.csv', ContentFile(csv.encode('utf-8')))
+
+        with self.settings(IMPORT_STREAMING_CHUNK_ROWS=3):
+            created = import_single_upload(u, stream=True)
+
+        self.assertEqual(created, 7)
+        self.assertEqual(Subscription.objects.filter(source_upload=u).count(), 7)
+        u.refresh_from_db()
+        self.assertEqual(u.rows_processed, 7)
+        self.assertEqual(u.rows_total, 7)
+        self.assertEqual(u.bytes_processed, len(csv))
+        self.assertEqual(u.bytes_total, len(csv))
+        self.assertEqual(u.eta_seconds, 0)
+        self.assertIsNotNone(u.progress_updated_at)
+
+
+class ImportProgressTest(TestCase):
+    def test_progress_writes_are_throttled_and_estimate_eta(self):
+        from api.importer import ImportProgress
+        org = Organization.objects.create(name='ProgressOrg', slug='progressorg')
+        u = UploadedCSV.objects.create(org=org, filename='p.csv')
+        now = [100.0]
+        progress = ImportProgress(u, bytes_total=1000, interval=5, clock=lambda: now[0])
+
+        now[0] = 102.0
+        self.assertFalse(progress.update(10, 100))
+        u.refresh_from_db()
+        self.assertEqual(u.rows_processed, 0)
+
+        # a quarter of the bytes in 10s: 30s to go, ~40 rows in total
+        now[0] = 110.0
+        self.assertTrue(progress.update(10, 250))
+        u.refresh_from_db()
+        self.assertEqual((u.rows_processed, u.bytes_processed, u.rows_total), (10, 250, 40))
+        self.assertEqual(u.eta_seconds, 30.0)
+
+        progress.finish(38)
+        u.refresh_from_db()
+        self.assertEqual((u.rows_processed, u.rows_total, u.bytes_processed, u.eta_seconds), (38, 38, 1000, 0))
+
+
+class BulkCustomerResolutionTest(TestCase):
+    def test_resolver_reuses_existing_and_bulk_creates_missing(self):
+        from api.importer import _resolve_customers
+        org = Organization.objects.create(name='ResolveOrg', slug='resolveorg')
+        existing = Customer.objects.create(org=org, external_id='c0', name='Existing')
+        ids = [f'c{i % 50}' for i in range(200)] + [None]
+        names = [f'Name {i}' for i in range(200)] + [None]
+
+        # lookup + insert + re-read for the ids, then get_or_create (select,
+        # savepoint, insert, release) for the rows without an id
+        with self.assertNumQueries(7):
+            customers = _resolve_customers(org, ids, names)
+
+        self.assertEqual(customers['c0'].pk, existing.pk)
+        self.assertEqual(customers['c7'].name, 'Name 7')
+        self.assertEqual(Customer.objects.filter(org=org).count(), 51)
+        # a second pass creates nothing new
+        _resolve_customers(org, ids, names)
+        self.assertEqual(Customer.objects.filter(org=org).count(), 51)
+
+
+class ParallelImportCommandTest(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name='ParOrg', slug='parorg')
+        for n in range(3):
+            u = UploadedCSV.objects.create(org=self.org, filename=f'par{n}.csv', status=UploadedCSV.STATUS_ERROR)
+            csv = 'id,name,MRR,signup_date\n' + ''.join(f'p{n}_{i},Name {i},{i + 1},2024-01-05\n' for i in range(4))
+            u.file.save(f'par{n}.csv', ContentFile(csv.encode('utf-8')))
+        UploadedCSV.objects.filter(filename='par2.csv').update(status=UploadedCSV.STATUS_COMPLETE)
+
+    def test_workers_parse_in_pool_and_status_filter_applies(self):
+        from io import StringIO
+        out = StringIO()
+        call_command('import_uploaded_csvs', workers=2, status=[UploadedCSV.STATUS_ERROR], org=self.org.pk, stdout=out)
+        self.assertEqual(Subscription.objects.filter(customer__org=self.org).count(), 8)
+        self.assertEqual(Customer.objects.get(org=self.org, external_id='p0_3').name, 'Name 3')
+        self.assertEqual(UploadedCSV.objects.get(filename='par1.csv').rows_processed, 4)
+        self.assertIn('Processed 2 uploads (0 failed), 8 rows', out.getvalue())
+        self.assertIn('rows/s', out.getvalue())
+
+    def test_duplicate_uploads_are_not_imported_again(self):
+        original = UploadedCSV.objects.get(filename='par0.csv')
+        UploadedCSV.objects.create(org=self.org, filename='par0-again.csv', file=original.file.name, duplicate_of=original, status=UploadedCSV.STATUS_ERROR)
+        call_command('import_uploaded_csvs', status=[UploadedCSV.STATUS_ERROR], org=self.org.pk, stdout=StringIO())
+        self.assertEqual(Subscription.objects.filter(customer__org=self.org).count(), 8)
+
+    def test_failed_pool_still_refreshes_org_aggregates(self):
+        from unittest import mock
+        from api.importer import import_uploads_parallel
+        uploads = list(UploadedCSV.objects.filter(org=self.org))
+        with mock.patch('api.importer._parse_in_pool', side_effect=RuntimeError('worker died')), \
+                mock.patch('api.importer.refresh_org_aggregates') as refresh:
+            with self.assertRaises(RuntimeError):
+                import_uploads_parallel(uploads, workers=2)
+        refresh.assert_called_once_with(self.org, mock.ANY)
+
+    def test_write_error_fails_only_that_upload(self):
+        from unittest import mock
+        from api import importer
+        uploads = list(UploadedCSV.objects.filter(org=self.org).order_by('pk'))
+        bad = uploads[0]
+        write = importer._write_columns
+
+        def flaky(upload, batch, delta=None):
+            if upload.pk == bad.pk:
+                raise RuntimeError('deadlock detected')
+            return write(upload, batch, delta)
+
+        # one-row chunks: the failing upload's worker keeps filling the bounded queue
+        with mock.patch('api.importer._write_columns', side_effect=flaky):
+            results = importer.import_uploads_parallel(uploads, workers=2, chunk_rows=1)
+        self.assertEqual(results[bad.pk]['error'], 'RuntimeError: deadlock detected')
+        self.assertTrue(all(results[u.pk]['error'] is None for u in uploads[1:]))
+        self.assertEqual(Subscription.objects.filter(customer__org=self.org).count(), 8)
+        bad.refresh_from_db()
+        self.assertEqual(bad.status, UploadedCSV.STATUS_ERROR)
+
+
+class SchemaCacheTest(TestCase):
+    def test_repeat_uploads_reuse_cached_schema(self):
+        from unittest import mock
+        from django.core.cache import cache
+        from api import importer
+        cache.clear()
+        org = Organization.objects.create(name='SchemaOrg', slug='schemaorg')
+        uploads = []
+        for i in range(2):
+            u = UploadedCSV.objects.create(org=org, filename=f's{i}.csv', status=UploadedCSV.STATUS_COMPLETE)
+            u.file.save(f's{i}.csv', ContentFile(f'id;notes;MRR;signup_date\nc{i};x;{i + 1};2024-01-05\n'.encode('utf-8')))
+            uploads.append(u)
+
+        with mock.patch.object(importer, 'sniff_schema', wraps=importer.sniff_schema) as sniff:
+            for u in uploads:
+                importer.import_single_upload(u, stream=False)
+        self.assertEqual(sniff.call_count, 1)
+        self.assertEqual(
+            sorted(Subscription.objects.filter(customer__org=org).values_list('customer__external_id', 'mrr')),
+            [('c0', 1), ('c1', 2)],
+        )
@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.importer import import_single_upload
+from api.models import Organization, UploadedCSV
+
+
+class MRRMovementsAPITests(TestCase):
+    CSV = (
+        'id,MRR,signup_date\n'
+        'a,100,2024-01-03\nb,50,2024-01-09\n'
+        'a,120,2024-02-01\nc,30,2024-02-04\n'
+        'a,90,2024-03-01\nc,35,2024-03-02\n'
+    )
+
+    def setUp(self):
+        cache.clear()
+        org = Organization.objects.create(name='MoveOrg', slug='moveorg')
+        u = UploadedCSV.objects.create(org=org, filename='m.csv', status=UploadedCSV.STATUS_COMPLETE)
+        u.file.save('m.csv', ContentFile(self.CSV.encode('utf-8')))
+        import_single_upload(u)
+        user = get_user_model().objects.create_user(username='mover', password='p')
+        user.profile.org = org
+        user.profile.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+
+    def test_series_is_computed_server_side_and_paginated(self):
+        resp = self.client.get('/api/mrr-movements/', {'page_size': 2})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['count'], 3)
+        self.assertIsNotNone(resp.data['next'])
+        self.assertEqual(resp.data['results'][1], {
+            'period': '2024-02', 'total': 150.0, 'new': 30.0, 'expansion': 20.0, 'contraction': 0.0, 'churn': 50.0,
+        })
+
+        ranged = self.client.get('/api/mrr-movements/', {'start': '2024-03', 'end': '2024-03'})
+        self.assertEqual([r['period'] for r in ranged.data['results']], ['2024-03'])
+        self.assertEqual(ranged.data['results'][0]['contraction'], 30.0)
+
+    def test_etag_and_validation(self):
+        first = self.client.get('/api/mrr-movements/', {'start': '2024-02'})
+        again = self.client.get('/api/mrr-movements/', {'start': '2024-02'}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+        other = self.client.get('/api/mrr-movements/', {'start': '2024-01'}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(other.status_code, 200)
+        self.assertEqual(self.client.get('/api/mrr-movements/', {'start': '2024-1'}).status_code, 400)
@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.importer import import_single_upload
+from api.models import Organization, UploadedCSV
+from api.retention import get_org_retention
+
+
+class OrgRetentionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name='RetOrg', slug='retorg')
+        self._import('jan.csv', 'id,MRR,signup_date\na,100,2024-01-05\nb,50,2024-01-09\n')
+        self._import('feb.csv', 'id,MRR,signup_date\na,120,2024-02-05\nc,30,2024-02-10\n')
+
+    def _import(self, name, csv):
+        u = UploadedCSV.objects.create(org=self.org, filename=name, status=UploadedCSV.STATUS_COMPLETE)
+        u.file.save(name, ContentFile(csv.encode('utf-8')))
+        import_single_upload(u)
+
+    def test_retention_from_subscription_history(self):
+        out = get_org_retention(self.org)
+        self.assertEqual(out['cohorts'], {'2024-01': 2, '2024-02': 1})
+        self.assertEqual(out['logo_retention'], {'2024-01': [2, 1], '2024-02': [1]})
+        self.assertEqual(out['revenue_retention'], {'2024-01': [150.0, 120.0], '2024-02': [30.0]})
+
+    def test_cached_until_next_import(self):
+        get_org_retention(self.org)
+        # only the org's data version is read
+        with self.assertNumQueries(1):
+            get_org_retention(self.org)
+        self._import('mar.csv', 'id,MRR,signup_date\nb,60,2024-03-01\n')
+        self.assertEqual(get_org_retention(self.org)['logo_retention']['2024-01'], [2, 1, 1])
+
+    def test_arr_summary_serves_retention(self):
+        user = get_user_model().objects.create_user(username='ret', password='p')
+        user.profile.org = self.org
+        user.profile.save()
+        client = APIClient()
+        client.force_authenticate(user=user)
+        resp = client.get('/api/arr-summary/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['cohorts'], {'2024-01': 2, '2024-02': 1})
+        self.assertEqual(resp.data['retention_matrix'], {'2024-01': [2, 1], '2024-02': [1]})
+        self.assertEqual(resp.data['revenue_retention']['2024-01'], [150.0, 120.0])
@@ -0,0 +1,106 @@
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.importer import IMPORT_MODE_DELTA, import_single_upload
+from api.models import CustomerMRRRollup, MonthlyMRRRollup, Organization, OrgMRRRollup, Subscription, UploadedCSV
+from api.rollups import check_org_rollups, rebuild_org_rollups
+
+
+class RollupTests(TestCase):
+    CSV = (
+        'id,MRR,signup_date\n'
+        'alpha,100,2024-01-05\n'
+        'alpha,50,2024-02-01\n'
+        'beta,300,2024-02-11\n'
+        'gamma,20,2024-03-01\n'
+    )
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='RollupOrg', slug='rolluporg')
+        self.upload = UploadedCSV.objects.create(org=self.org, filename='r.csv', status=UploadedCSV.STATUS_COMPLETE)
+        self.upload.file.save('r.csv', ContentFile(self.CSV.encode('utf-8')))
+        import_single_upload(self.upload)
+
+    def test_import_maintains_rollups(self):
+        totals = OrgMRRRollup.objects.get(org=self.org)
+        self.assertEqual(totals.total_mrr, Decimal('470.00'))
+        self.assertEqual((totals.customer_count, totals.subscription_count), (3, 4))
+        self.assertEqual(
+            list(CustomerMRRRollup.objects.filter(org=self.org).order_by('-mrr').values_list('label', 'mrr')),
+            [('beta', Decimal('300')), ('alpha', Decimal('150')), ('gamma', Decimal('20'))],
+        )
+        self.assertEqual(
+            [(m.month.isoformat(), m.new_mrr, m.new_subscriptions) for m in MonthlyMRRRollup.objects.filter(org=self.org)],
+            [('2024-01-01', Decimal('100'), 1), ('2024-02-01', Decimal('350'), 2), ('2024-03-01', Decimal('20'), 1)],
+        )
+        self.assertEqual(check_org_rollups(self.org), [])
+
+    def _upload(self, text):
+        upload = UploadedCSV.objects.create(org=self.org, filename='r2.csv', status=UploadedCSV.STATUS_COMPLETE)
+        upload.file.save('r2.csv', ContentFile(text.encode('utf-8')))
+        return upload
+
+    def test_delta_import_applies_changes_without_rebuild(self):
+        # alpha's January row changes, beta is gone, delta is new
+        upload = self._upload(
+            'id,MRR,signup_date\n'
+            'alpha,120,2024-01-05\n'
+            'alpha,50,2024-02-01\n'
+            'gamma,20,2024-03-01\n'
+            'delta,5,2024-04-02\n'
+        )
+        with mock.patch('api.rollups.rebuild_org_rollups') as rebuild:
+            import_single_upload(upload, mode=IMPORT_MODE_DELTA)
+        rebuild.assert_not_called()
+        self.assertEqual(check_org_rollups(self.org), [])
+        totals = OrgMRRRollup.objects.get(org=self.org)
+        self.assertEqual((totals.total_mrr, totals.customer_count, totals.subscription_count), (Decimal('195.00'), 3, 4))
+        self.assertFalse(CustomerMRRRollup.objects.filter(org=self.org, label='beta').exists())
+
+    def test_full_import_adds_to_existing_rollups(self):
+        upload = self._upload('id,MRR,signup_date\nbeta,10,2024-02-20\nomega,7,2023-12-01\n')
+        with mock.patch('api.rollups.rebuild_org_rollups') as rebuild:
+            import_single_upload(upload)
+        rebuild.assert_not_called()
+        self.assertEqual(check_org_rollups(self.org), [])
+        self.assertEqual(OrgMRRRollup.objects.get(org=self.org).total_mrr, Decimal('487.00'))
+
+    def test_check_reports_drift_and_rebuild_fixes_it(self):
+        Subscription.objects.filter(customer__external_id='gamma').update(is_deleted=True)
+        problems = check_org_rollups(self.org)
+        self.assertIn('customer gamma: stale rollup', problems)
+        self.assertTrue(any(p.startswith('org total_mrr') for p in problems))
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rollups', '--check', stdout=StringIO(), stderr=StringIO())
+        call_command('rebuild_rollups', '--org', str(self.org.pk), stdout=StringIO())
+        self.assertEqual(check_org_rollups(self.org), [])
+        self.assertEqual(OrgMRRRollup.objects.get(org=self.org).total_mrr, Decimal('450.00'))
+
+    def test_arr_summary_reads_rollups(self):
+        user = get_user_model().objects.create_user(username='rollup', password='p')
+        user.profile.org = self.org
+        user.profile.save()
+        client = APIClient()
+        client.force_authenticate(user=user)
+        # poison the source rows: the endpoint must not aggregate them per request
+        Subscription.objects.filter(customer__org=self.org).update(mrr=1)
+        resp = client.get('/api/arr-summary/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['arr_kpis'], {'MRR': 470.0, 'ARR': 5640.0})
+        self.assertEqual(resp.data['top_customers'][0], {'customer_id': 'beta', 'mrr': 300.0})
+
+    def test_missing_rollup_is_built_on_first_read(self):
+        OrgMRRRollup.objects.filter(org=self.org).delete()
+        from api.rollups import get_org_rollup
+        self.assertEqual(get_org_rollup(self.org).total_mrr, Decimal('470.00'))
+        rebuild_org_rollups(self.org)
+        self.assertEqual(CustomerMRRRollup.objects.filter(org=self.org).count(), 3)
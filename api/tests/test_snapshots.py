@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import unittest
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from analysis import snapshots as columnar
+from api import snapshots
+from api.importer import import_single_upload
+from api.models import Organization, UploadedCSV
+
+
+@unittest.skipUnless(columnar.available(), 'pyarrow not installed')
+class SnapshotTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        override = override_settings(SNAPSHOT_ROOT=self.root, IMPORT_WRITE_SNAPSHOTS=True)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.org = Organization.objects.create(name='SnapOrg', slug='snaporg')
+
+    def _import(self, name, csv, mode=None):
+        u = UploadedCSV.objects.create(org=self.org, filename=name, status=UploadedCSV.STATUS_COMPLETE)
+        u.file.save(name, ContentFile(csv.encode('utf-8')))
+        import_single_upload(u, mode=mode)
+        return u
+
+    def test_full_imports_write_one_partition_per_upload(self):
+        u1 = self._import('a.csv', 'id,MRR,signup_date\na,100,2024-01-05\nb,50,2024-01-09\n')
+        u2 = self._import('b.csv', 'id,MRR,signup_date\nc,30,2024-02-01\n')
+        directory = snapshots.org_snapshot_dir(self.org.pk)
+        self.assertEqual(
+            sorted(os.listdir(directory)),
+            [f'upload_{u1.pk}.arrow', f'upload_{u2.pk}.arrow'],
+        )
+        cols = columnar.snapshot_columns(directory)
+        self.assertEqual(sorted(cols['customer_id']), ['a', 'b', 'c'])
+        self.assertEqual(float(cols['mrr'].sum()), 180.0)
+
+    def test_delta_import_and_command_compact(self):
+        self._import('a.csv', 'id,MRR,signup_date\na,100,2024-01-05\nb,50,2024-01-09\n')
+        self._import('d.csv', 'id,MRR,signup_date\na,120,2024-01-05\n', mode='delta')
+        directory = snapshots.org_snapshot_dir(self.org.pk)
+        self.assertEqual(os.listdir(directory), ['compacted.arrow'])
+        cols = columnar.snapshot_columns(directory)
+        self.assertEqual((list(cols['customer_id']), cols['mrr'].tolist()), (['a'], [120.0]))
+
+        self._import('e.csv', 'id,MRR,signup_date\nz,1,2024-03-01\n')
+        call_command('compact_snapshots', '--org', str(self.org.pk), stdout=StringIO())
+        self.assertEqual(os.listdir(directory), ['compacted.arrow'])
+        self.assertEqual(columnar.load_snapshot(directory).num_rows, 2)
+
+    def test_reimport_of_compacted_upload_is_not_counted_twice(self):
+        u1 = self._import('a.csv', 'id,MRR,signup_date\na,100,2024-01-05\nb,50,2024-01-09\n')
+        self._import('d.csv', 'id,MRR,signup_date\na,100,2024-01-05\nb,50,2024-01-09\nc,5,2024-02-01\n', mode='delta')
+        directory = snapshots.org_snapshot_dir(self.org.pk)
+        self.assertIn(u1.pk, snapshots.compacted_upload_ids(self.org.pk))
+
+        snapshots.write_upload_snapshot(u1)
+        self.assertEqual(os.listdir(directory), ['compacted.arrow'])
+        self.assertEqual(float(columnar.snapshot_columns(directory)['mrr'].sum()), 155.0)
+
+    def test_disabled_setting_skips_snapshots(self):
+        with override_settings(IMPORT_WRITE_SNAPSHOTS=False):
+            self._import('a.csv', 'id,MRR,signup_date\na,100,2024-01-05\n')
+        self.assertFalse(os.path.exists(snapshots.org_snapshot_dir(self.org.pk)))
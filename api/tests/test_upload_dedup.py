@@ -0,0 +1,49 @@
+import hashlib
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.models import Organization, UploadedCSV, Subscription
+from django.contrib.auth import get_user_model
+
+
+@override_settings(DEBUG_IMPORT_SYNC=True)
+class UploadDedupTests(TestCase):
+    CSV = b'id,MRR,signup_date\nalpha,100,2024-01-01\nbeta,200,2024-02-01\n'
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='DedupOrg', slug='deduporg')
+        self.user = get_user_model().objects.create_user(username='dedup', password='p')
+        self.user.profile.org = self.org
+        self.user.profile.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _post(self, content, name='billing.csv'):
+        return self.client.post('/api/uploads/', {'file': SimpleUploadedFile(name, content, content_type='text/csv')}, format='multipart')
+
+    def test_identical_upload_links_to_completed_import(self):
+        first = self._post(self.CSV)
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(first.data['content_hash'], hashlib.sha256(self.CSV).hexdigest())
+        original = UploadedCSV.objects.get(pk=first.data['id'])
+        self.assertEqual(original.status, UploadedCSV.STATUS_COMPLETE)
+
+        second = self._post(self.CSV, name='billing-again.csv')
+        self.assertEqual(second.status_code, 201)
+        dup = UploadedCSV.objects.get(pk=second.data['id'])
+        self.assertEqual(dup.duplicate_of_id, original.pk)
+        self.assertEqual(dup.status, UploadedCSV.STATUS_COMPLETE)
+        self.assertEqual(dup.file.name, original.file.name)
+        self.assertEqual(dup.filename, 'billing-again.csv')
+        self.assertEqual(dup.subscriptions_created, 2)
+        # no second import ran
+        self.assertEqual(Subscription.objects.filter(customer__org=self.org).count(), 2)
+
+    def test_different_content_is_imported(self):
+        self._post(self.CSV)
+        resp = self._post(self.CSV + b'gamma,5,2024-03-01\n')
+        upload = UploadedCSV.objects.get(pk=resp.data['id'])
+        self.assertIsNone(upload.duplicate_of_id)
+        self.assertEqual(Subscription.objects.filter(source_upload=upload).count(), 3)
@@ -10,6 +10,8 @@ from .views import (
     PublicDashboardRetrieveAPIView,
     register_user,
     ARRSummaryAPIView,
+    CacheStatsAPIView,
+    MRRMovementsAPIView,
     AutomationListCreateAPIView,
     AutomationDetailAPIView,
     AutomationRunAPIView,
@@ -47,6 +49,8 @@ urlpatterns = [
     path('token/refresh-cookie/', jwt_refresh_cookie, name='jwt-refresh-cookie'),
     path('token/logout/', jwt_logout, name='jwt-logout'),
     path('arr-summary/', ARRSummaryAPIView.as_view(), name='arr-summary'),
+    path('mrr-movements/', MRRMovementsAPIView.as_view(), name='mrr-movements'),
+    path('cache-stats/', CacheStatsAPIView.as_view(), name='cache-stats'),
     # Automations (MVP)
     path('automations/', AutomationListCreateAPIView.as_view(), name='automations'),
     path('automations/<int:pk>/', AutomationDetailAPIView.as_view(), name='automation-detail'),
@@ -1,19 +1,22 @@
 import pandas as pd
 import numpy as np
+import hashlib
 import io
 import logging
+import re
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView, RetrieveAPIView
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.authentication import TokenAuthentication
 from .serializers import UploadedCSVSerializer, DashboardSerializer
 from .serializers import AutomationSerializer, AutomationExecutionSerializer
 from .models import Automation, AutomationExecution
 from .models import UploadedCSV, Dashboard, Organization, Subscription
-from .importer import import_single_upload
+from .importer import import_single_upload, file_sha256
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
 from rest_framework.authtoken.models import Token as DRFToken
@@ -276,7 +279,26 @@ class UploadCSVAPIView(ListCreateAPIView):
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied('User must belong to an organization to upload files.')
         org = profile.org
-        serializer.save(uploaded_by=self.request.user, org=org, filename=getattr(self.request.FILES.get('file'), 'name', 'upload.csv'))
+        upload_file = self.request.FILES.get('file')
+        filename = getattr(upload_file, 'name', 'upload.csv')
+        content_hash = file_sha256(upload_file) if upload_file else ''
+        # If this org already imported identical bytes, point the new record at
+        # the stored file and the completed import instead of parsing it again.
+        original = None
+        if content_hash:
+            original = UploadedCSV.objects.filter(
+                org=org, content_hash=content_hash, status=UploadedCSV.STATUS_COMPLETE, duplicate_of__isnull=True,
+            ).order_by('pk').first()
+        if original:
+            from django.utils import timezone
+            serializer.save(
+                uploaded_by=self.request.user, org=org, filename=filename, content_hash=content_hash,
+                file=original.file.name, duplicate_of=original,
+                status=UploadedCSV.STATUS_COMPLETE, completed_at=timezone.now(),
+                subscriptions_created=original.subscriptions_created,
+            )
+            return
+        serializer.save(uploaded_by=self.request.user, org=org, filename=filename, content_hash=content_hash)
 
 
 class UploadedCSVDetailAPIView(RetrieveAPIView):
@@ -299,6 +321,10 @@ class UploadedCSVReimportAPIView(APIView):
     Celery task is available it will enqueue the work; otherwise it will run
     the import in a background thread after transaction commit. Returns 202
     when the reimport is accepted/started, 400 on misuse, and 404 if not found.
+
+    An optional `mode` ('full' or 'delta') selects the import mode. Delta
+    re-imports diff the file against the org's live subscriptions, so they
+    also run for uploads that were already imported.
     """
     permission_classes = [IsAuthenticated]
     authentication_classes = [CookieTokenAuthentication]
@@ -316,8 +342,14 @@ class UploadedCSVReimportAPIView(APIView):
         if not upload.file:
             return Response({'error': 'no file to import'}, status=status.HTTP_400_BAD_REQUEST)
 
+        from .importer import IMPORT_MODES, IMPORT_MODE_DELTA, IMPORT_MODE_FULL
+        mode = request.data.get('mode') or None
+        if mode is not None and mode not in IMPORT_MODES:
+            return Response({'error': f"mode must be one of {', '.join(IMPORT_MODES)}"}, status=status.HTTP_400_BAD_REQUEST)
+        delta = (mode or getattr(settings, 'IMPORT_MODE', IMPORT_MODE_FULL)) == IMPORT_MODE_DELTA
+
         # If subscriptions already exist for this upload, return 200 with info
-        if Subscription.objects.filter(source_upload=upload).exists():
+        if not delta and Subscription.objects.filter(source_upload=upload).exists():
             # Include a Retry-After header so the frontend can show a cooldown even when nothing was re-imported.
             retry_after = getattr(settings, 'REIMPORT_RATE_LIMIT_SECONDS', 60)
             return Response({'ok': True, 'message': 'already imported', 'subscriptions_created': upload.subscriptions_created}, status=status.HTTP_200_OK, headers={'Retry-After': str(retry_after)})
@@ -337,9 +369,13 @@ class UploadedCSVReimportAPIView(APIView):
         # Headers to return on accepted/enqueued/started responses so client can start cooldown immediately
         headers = {'Retry-After': str(limit_seconds)}
 
-        # Atomically claim the upload if it's still pending
+        # Atomically claim the upload if it's still pending (delta re-imports
+        # may also claim finished uploads)
         from django.utils import timezone
-        rows = UploadedCSV.objects.filter(pk=upload.pk, status=UploadedCSV.STATUS_PENDING).update(
+        claimable = [UploadedCSV.STATUS_PENDING]
+        if delta:
+            claimable += [UploadedCSV.STATUS_COMPLETE, UploadedCSV.STATUS_ERROR]
+        rows = UploadedCSV.objects.filter(pk=upload.pk, status__in=claimable).update(
             status=UploadedCSV.STATUS_IMPORTING,
             status_started_at=timezone.now(),
             error_message='',
@@ -359,7 +395,7 @@ class UploadedCSVReimportAPIView(APIView):
         # If configured for DEBUG synchronous imports, run importer inline (used by tests)
         if getattr(settings, 'DEBUG_IMPORT_SYNC', False):
             try:
-                created = import_single_upload(upload, sample_lines=getattr(settings, 'IMPORT_SAMPLE_LINES', 200))
+                created = import_single_upload(upload, sample_lines=getattr(settings, 'IMPORT_SAMPLE_LINES', 200), mode=mode)
                 UploadedCSV.objects.filter(pk=upload.pk).update(
                     status=UploadedCSV.STATUS_COMPLETE,
                     completed_at=timezone.now(),
@@ -383,7 +419,10 @@ class UploadedCSVReimportAPIView(APIView):
 
         if import_uploaded_csv_task is not None and hasattr(import_uploaded_csv_task, 'delay'):
             try:
-                import_uploaded_csv_task.delay(upload.pk)
+                if mode:
+                    import_uploaded_csv_task.delay(upload.pk, mode=mode)
+                else:
+                    import_uploaded_csv_task.delay(upload.pk)
                 return Response({'ok': True, 'message': 'enqueued'}, status=status.HTTP_202_ACCEPTED, headers=headers)
             except Exception:
                 # fall through to thread-based execution
@@ -398,7 +437,7 @@ class UploadedCSVReimportAPIView(APIView):
                 pass
             import threading
             from .signals import _run_import_sync
-            t = threading.Thread(target=_run_import_sync, args=(upload.pk,))
+            t = threading.Thread(target=_run_import_sync, args=(upload.pk, mode))
             t.daemon = True
             t.start()
 
@@ -645,78 +684,182 @@ def jwt_logout(request):
 
 
 class ARRSummaryAPIView(APIView):
-    """Minimal ARR summary endpoint used by the frontend dashboard.
+    """ARR summary endpoint used by the frontend dashboard.
 
-    This implementation is intentionally small: it demonstrates how to call the
-    cohort utilities and return a simple JSON payload. It uses UploadedCSV model
-    as a source of 'customer' signup dates if available; otherwise returns an
-    empty structure.
+    KPIs and top customers come from the org's MRR rollups (`api.rollups`).
+    Cohorts are keyed by each customer's first active month. `retention_matrix`
+    holds logo retention and `revenue_retention` MRR per month offset (see
+    `api.retention`).
+
+    The whole payload is cached per org and data version (`api.caching`), and
+    responses carry a matching ETag. A request whose If-None-Match still
+    matches gets a 304 without touching the summary at all.
     """
     permission_classes = [IsAuthenticated]
     authentication_classes = [CookieTokenAuthentication]
 
     def get(self, request):
-        # For now, gather signup_date and a synthetic "active_months" if available
-        # UploadedCSV may represent uploads; we treat each UploadedCSV as one customer for demo
-        qs = UploadedCSV.objects.none()
-        profile = getattr(request.user, 'profile', None)
-        if profile and profile.org:
-            qs = UploadedCSV.objects.filter(org=profile.org)
+        from . import caching
 
-        signups = []
-        for u in qs:
-            # Try to extract a signup_date from the CSV metadata if present, else created_at
-            sd = getattr(u, 'created_at', None)
-            # Synthetic active months: 1 for all (placeholder)
-            signups.append((sd.date() if sd else None, 1))
+        profile = getattr(request.user, 'profile', None)
+        org = profile.org if profile and profile.org else None
+        if org is None:
+            return Response(self._summary(None), status=status.HTTP_200_OK)
+
+        version = caching.data_version(org.pk)
+        etag = caching.etag(caching.ARR_SUMMARY, org.pk, version)
+        if etag_matches(request, etag):
+            caching.record(caching.ARR_SUMMARY, caching.STAT_NOT_MODIFIED)
+            resp = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            payload = caching.get_or_compute(caching.ARR_SUMMARY, org.pk, lambda: self._summary(org), version=version)
+            resp = Response(payload, status=status.HTTP_200_OK)
+        resp['ETag'] = etag
+        # clients must revalidate, which is cheap: a version lookup and a 304
+        resp['Cache-Control'] = 'private, no-cache'
+        return resp
 
-        from analysis.cohorts import cohortize, retention_matrix
+    def _summary(self, org):
         from analysis.arr import compute_mrr_and_arr, top_customers_by_mrr
 
-        cohorts = cohortize([d for d, _ in signups if d])
-        matrix = retention_matrix(signups)
+        qs = UploadedCSV.objects.filter(org=org) if org else UploadedCSV.objects.none()
 
-        # Prefer canonical normalized subscriptions when present
+        # Cohorts by first active month, with logo and revenue retention per month offset
+        retention = {'cohorts': {}, 'logo_retention': {}, 'revenue_retention': {}}
+        if org:
+            from .retention import get_org_retention
+            retention = get_org_retention(org)
+
+        # Prefer the materialized rollups over canonical normalized subscriptions
         try:
-            from .models import Subscription
-            subs_qs = Subscription.objects.none()
-            if profile and profile.org:
-                subs_qs = Subscription.objects.filter(customer__org=profile.org)
-            # Build records from subscription rows
-            records = []
-            for s in subs_qs:
-                records.append({'customer_id': s.customer.external_id or s.customer.name or str(s.customer.pk), 'mrr': float(s.mrr), 'signup_date': s.start_date})
-            kpis = compute_mrr_and_arr(records) if records else {'MRR': 0.0, 'ARR': 0.0}
-            tops = top_customers_by_mrr(records, limit=10) if records else []
+            from . import rollups
+            kpis = {'MRR': 0.0, 'ARR': 0.0}
+            tops = []
+            if org:
+                totals = rollups.get_org_rollup(org)
+                mrr = float(totals.total_mrr)
+                kpis = {'MRR': mrr, 'ARR': mrr * 12}
+                tops = rollups.top_customers(org, limit=10)
+        except Exception as exc:
+            logger.warning('MRR rollups unavailable for org %s: %s', getattr(org, 'pk', None), exc)
+            records = self._subscription_records(org)
+            if records is None:
+                records = self._upload_records(qs)
+            kpis = compute_mrr_and_arr(records) if len(records) else {'MRR': 0.0, 'ARR': 0.0}
+            tops = top_customers_by_mrr(records, limit=10) if len(records) else []
+
+        return {
+            'arr_kpis': kpis,
+            'top_customers': tops,
+            'cohorts': retention['cohorts'],
+            'retention_matrix': retention['logo_retention'],
+            'revenue_retention': retention['revenue_retention'],
+        }
+
+    @staticmethod
+    def _subscription_records(org):
+        """Live subscriptions as columns (one streamed query), or None when there are none."""
+        if org is None:
+            return None
+        from .rollups import subscription_columns
+        try:
+            columns = subscription_columns(Subscription.objects.live().filter(customer__org=org))
         except Exception:
-            # Fallback to parsing uploads (legacy behavior)
-            from analysis.normalize import normalize_csv_text
-            records = []
-            for u in qs:
-                try:
-                    if not u.file:
-                        continue
-                    u.file.open('rb')
-                    raw = u.file.read(128 * 1024).decode('utf-8', errors='ignore')
-                    u.file.close()
-                    recs = normalize_csv_text(raw, sample_lines=200)
-                    for r in recs:
-                        records.append({'customer_id': r.get('customer_id'), 'mrr': r.get('mrr') or 0, 'signup_date': r.get('signup_date')})
-                except Exception:
+            return None
+        return columns if len(columns['mrr']) else None
+
+    @staticmethod
+    def _upload_records(qs):
+        """Records parsed from the head of each upload (legacy behavior)."""
+        from analysis.normalize import normalize_csv_text
+        records = []
+        for u in qs:
+            try:
+                if not u.file:
                     continue
-            kpis = compute_mrr_and_arr(records) if records else {'MRR': 0.0, 'ARR': 0.0}
-            tops = top_customers_by_mrr(records, limit=10) if records else []
+                u.file.open('rb')
+                raw = u.file.read(128 * 1024).decode('utf-8', errors='ignore')
+                u.file.close()
+                recs = normalize_csv_text(raw, sample_lines=200, raw=None)
+                for r in recs:
+                    records.append({'customer_id': r.get('customer_id'), 'mrr': r.get('mrr') or 0, 'signup_date': r.get('signup_date')})
+            except Exception:
+                continue
+        return records
 
-        # Normalize matrix to JSON friendly shape: keys as 'YYYY-MM'
-        cohorts_out = {f"{y:04d}-{m:02d}": v for (y, m), v in cohorts.items()}
-        matrix_out = {f"{y:04d}-{m:02d}": row for (y, m), row in matrix.items()}
 
-        return Response({
-            'arr_kpis': kpis,
-            'top_customers': tops,
-            'cohorts': cohorts_out,
-            'retention_matrix': matrix_out,
-        }, status=status.HTTP_200_OK)
+def etag_matches(request, etag: str) -> bool:
+    """True when the request's If-None-Match lists `etag` (weak or strong) or '*'."""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    candidates = [c.strip() for c in header.split(',')]
+    return '*' in candidates or any(c.removeprefix('W/') == etag for c in candidates)
+
+
+class MRRMovementsPagination(PageNumberPagination):
+    page_size = 24
+    page_size_query_param = 'page_size'
+    max_page_size = 120
+
+
+class MRRMovementsAPIView(APIView):
+    """Monthly MRR movements (new / expansion / contraction / churn) for the user's org.
+
+    Computed server-side from Subscription rows (`api.retention.get_org_movements`)
+    and cached per org data version, so the browser never needs the raw records.
+    `start` and `end` (YYYY-MM, inclusive) select a period range, which is
+    paginated oldest first (`page`, `page_size`). Responses carry the org's
+    data-version ETag and honour If-None-Match.
+    """
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [CookieTokenAuthentication]
+
+    def get(self, request):
+        from . import caching
+        from .retention import get_org_movements
+
+        start = request.query_params.get('start')
+        end = request.query_params.get('end')
+        for label, value in (('start', start), ('end', end)):
+            if value and not re.fullmatch(r'\d{4}-\d{2}', value):
+                return Response({'detail': f'{label} must be a month in YYYY-MM format'}, status=status.HTTP_400_BAD_REQUEST)
+
+        profile = getattr(request.user, 'profile', None)
+        org = profile.org if profile and profile.org else None
+        etag = None
+        series = []
+        if org:
+            version = caching.data_version(org.pk)
+            # the query string selects a slice, so it is part of the validator
+            query = hashlib.sha1(request.GET.urlencode().encode('utf-8')).hexdigest()[:12]
+            etag = caching.etag(caching.MOVEMENTS, org.pk, f"{version}-{query}")
+            if etag_matches(request, etag):
+                caching.record(caching.MOVEMENTS, caching.STAT_NOT_MODIFIED)
+                resp = Response(status=status.HTTP_304_NOT_MODIFIED)
+                resp['ETag'] = etag
+                return resp
+            series = get_org_movements(org)
+
+        # periods are 'YYYY-MM' strings, so lexicographic order is chronological
+        rows = [r for r in series if (not start or r['period'] >= start) and (not end or r['period'] <= end)]
+        paginator = MRRMovementsPagination()
+        page = paginator.paginate_queryset(rows, request, view=self)
+        resp = paginator.get_paginated_response(page)
+        if etag:
+            resp['ETag'] = etag
+            resp['Cache-Control'] = 'private, no-cache'
+        return resp
+
+
+class CacheStatsAPIView(APIView):
+    """Hit/miss/304 counters of the per-org analytics caches, for staff monitoring."""
+    permission_classes = [IsAdminUser]
+    authentication_classes = [CookieTokenAuthentication]
+
+    def get(self, request):
+        from .caching import cache_stats
+        return Response(cache_stats(), status=status.HTTP_200_OK)
 
 
 # --- Automations API (MVP) ---
@@ -1,6 +1,18 @@
 import React, { useEffect, useState } from 'react'
 import './UploadStatusPoller.css'
 
+const MAX_POLL_INTERVAL_MS = 30000
+
+// Poll roughly four times over the server's remaining-time estimate, never
+// faster than the base interval, so long imports are not hammered.
+export function nextPollDelay(upload, baseMs) {
+  const eta = upload && upload.eta_seconds
+  if (upload && upload.status === 'importing' && typeof eta === 'number' && eta > 0) {
+    return Math.min(MAX_POLL_INTERVAL_MS, Math.max(baseMs, Math.round((eta * 1000) / 4)))
+  }
+  return baseMs
+}
+
 export default function UploadStatusPoller({ uploadId, pollIntervalMs = 2000 }) {
   const [upload, setUpload] = useState(null)
   const [error, setError] = useState(null)
@@ -26,7 +38,7 @@ export default function UploadStatusPoller({ uploadId, pollIntervalMs = 2000 })
         setUpload(data)
         setError(null)
         if (data.status === 'pending' || data.status === 'importing') {
-          timer = window.setTimeout(fetchStatus, pollIntervalMs)
+          timer = window.setTimeout(fetchStatus, nextPollDelay(data, pollIntervalMs))
         }
       } catch (e) {
         if (!mounted) return
@@ -205,6 +217,12 @@ export default function UploadStatusPoller({ uploadId, pollIntervalMs = 2000 })
       {upload.status === 'importing' && upload.status_started_at && (
         <div>Started at: {new Date(upload.status_started_at).toLocaleString()}</div>
       )}
+      {upload.status === 'importing' && upload.rows_processed > 0 && (
+        <div className="upload-progress">
+          Rows: {upload.rows_processed}{upload.rows_total ? ` of ~${upload.rows_total}` : ''}
+          {typeof upload.eta_seconds === 'number' && upload.eta_seconds > 0 && <span> — about {Math.ceil(upload.eta_seconds)}s left</span>}
+        </div>
+      )}
       {upload.status === 'complete' && (
         <div>Imported subscriptions: {upload.subscriptions_created ?? 0}</div>
       )}
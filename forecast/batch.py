@@ -0,0 +1,137 @@
+"""Batch forecasts: every series of one long-format (series_id, ds, y) upload.
+
+`iter_batch` fits the series and yields one dict per series (the NDJSON lines
+of the batch endpoint) as soon as its `ForecastResult` row is written:
+
+- Each series has its own method (see `engines.resolve_methods`), so `auto`
+  sends long daily series to Prophet and the rest to Holt.
+- Holt series are fitted together in one vectorized pass
+  (`engines.holt_forecast_many`). Prophet fits go to the shared forecast
+  process pool (`forecast.pool`). Other engines are cheap and run inline.
+- Series already in the org's forecast cache (`forecast.cache`) are served
+  from it without refitting. New results are written with `bulk_create`
+  every `WRITE_BATCH_SIZE` series, and each one is a cache entry of the org;
+  eviction runs once, after the last write.
+
+A series that fails to fit yields {'series_id', 'method', 'error'} and the
+batch continues. The last line is {'done': True, ...} with the counts.
+"""
+from __future__ import annotations
+
+import logging
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import cache as forecast_cache
+from . import pool as forecast_pool
+from .models import ForecastResult
+from .utils.ai_summary import generate_ai_summary
+from .utils.engines import holt_forecast_many
+from .pool import fit_forecast
+from .utils.forecast_engine import model_params
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_SIZE = 200
+DEFAULT_MAX_SERIES = 5000
+
+# engines that fit all series of a batch in one call: fn(long_df, periods) -> {series_id: records}
+VECTORIZED_ENGINES = {'holt': holt_forecast_many}
+
+
+def max_series() -> int:
+    return int(getattr(settings, 'FORECAST_BATCH_MAX_SERIES', DEFAULT_MAX_SERIES))
+
+
+def _error_message(series_id, exc) -> str:
+    # data validation errors from the engine and pool timeouts are shown to the user as-is
+    if isinstance(exc, (ValueError, forecast_pool.ForecastTimeout)):
+        return str(exc)
+    logger.error('Batch forecast failed for series %s', series_id, exc_info=exc)
+    return 'An internal error occurred during forecasting.'
+
+
+def _fit_group(group, periods: int, method: str):
+    """Yield (series_id, forecast_data, error) for every series of `group`, all fitted with `method`."""
+    if method in VECTORIZED_ENGINES:
+        try:
+            fitted = VECTORIZED_ENGINES[method](group, periods)
+        except Exception as exc:
+            message = _error_message('*', exc)
+            for sid in group['series_id'].unique():
+                yield sid, None, message
+            return
+        for sid, data in fitted.items():
+            yield sid, data, None
+        return
+
+    series = {sid: g[['ds', 'y']] for sid, g in group.groupby('series_id', sort=True)}
+    if forecast_pool.uses_pool(method):
+        for sid, data, exc in forecast_pool.iter_fits(series, periods, method):
+            yield (sid, None, _error_message(sid, exc)) if exc else (sid, data, None)
+        return
+
+    for sid, df in series.items():
+        try:
+            yield sid, fit_forecast(df, periods=periods, method=method), None
+        except Exception as exc:
+            yield sid, None, _error_message(sid, exc)
+
+
+def _line(series_id, method, result: ForecastResult, cached: bool) -> dict:
+    return {
+        'series_id': series_id, 'method': method, 'result_id': result.pk, 'cached': cached,
+        'summary': result.summary, 'forecast': result.forecast_data,
+    }
+
+
+def iter_batch(dataset, df, periods: int, methods, org=None):
+    """Fit every series of `df` (see `load_batch`); yields one dict per series, then the summary.
+
+    `methods` maps series_id to its resolved engine name (`engines.resolve_methods`).
+    Results are stored against `dataset` and cached for `org`.
+    """
+    keys = {
+        sid: forecast_cache.cache_key(g[['ds', 'y']], model_params(periods, methods[sid]))
+        for sid, g in df.groupby('series_id', sort=True)
+    }
+    counts = {'series': len(keys), 'fitted': 0, 'cached': 0, 'failed': 0}
+
+    hits = forecast_cache.lookup_many(keys.values(), org)
+    served = set()
+    for sid, key in keys.items():
+        if key in hits:
+            served.add(sid)
+            counts['cached'] += 1
+            yield _line(sid, methods[sid], hits[key], cached=True)
+
+    pending = []
+
+    def flush():
+        written = forecast_cache.store_many([result for _, _, result in pending])
+        counts['fitted'] += len(written)
+        lines = [_line(sid, method, result, cached=False) for (sid, method, _), result in zip(pending, written)]
+        pending.clear()
+        return lines
+
+    todo = df[~df['series_id'].isin(served)]
+    for method, group in todo.groupby(todo['series_id'].map(methods), sort=True):
+        params = model_params(periods, method)
+        for sid, data, error in _fit_group(group, periods, method):
+            if error is not None:
+                counts['failed'] += 1
+                yield {'series_id': sid, 'method': method, 'error': error}
+                continue
+            result = ForecastResult(
+                org=org, dataset=dataset, forecast_data=data, summary=generate_ai_summary(data),
+                cache_key=keys[sid], params=params, last_used_at=timezone.now(),
+            )
+            pending.append((sid, method, result))
+            if len(pending) >= WRITE_BATCH_SIZE:
+                yield from flush()
+    if pending:
+        yield from flush()
+    if counts['fitted']:
+        forecast_cache.evict(org)
+    yield {'done': True, 'dataset': dataset.pk, **counts}
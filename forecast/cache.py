@@ -0,0 +1,125 @@
+"""Forecast result cache keyed on dataset content and model parameters.
+
+Re-submitting the same series with the same parameters returns the stored
+`ForecastResult` instead of refitting. The key is a SHA-256 over:
+
+- the normalized series (`load_series` output, sorted by ds): ds as int64
+  nanoseconds and y as float64 bytes. File name, column order, row order and
+  formatting do not change it.
+- canonical JSON of the parameters (method, periods, ...), plus
+  `CACHE_FORMAT_VERSION`. Bump the version when engine output changes.
+
+Entries are ForecastResult rows with a non-empty `cache_key`, scoped to the
+org whose request fitted them: lookups only see the caller's org, and
+callers without an org are never served from the cache. Eviction:
+
+- TTL: entries older than `FORECAST_CACHE_TTL_SECONDS` (default 7 days) are
+  never served, and `evict()` removes them.
+- LRU: `evict(org)` keeps the org's `max_entries()` most recently used
+  entries (`FORECAST_CACHE_MAX_ENTRIES`, default 5000, and never fewer than
+  one batch of `FORECAST_BATCH_MAX_SERIES`). Hits update `last_used_at`.
+
+Evicting clears the key and leaves the row in place as its dataset's history.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ForecastResult
+
+CACHE_FORMAT_VERSION = 1
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+
+
+def series_hash(df) -> str:
+    """SHA-256 of a normalized (ds, y) frame, independent of row order."""
+    ordered = df.sort_values('ds', kind='mergesort')
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(ordered['ds'].to_numpy(dtype='datetime64[ns]').view('int64')).tobytes())
+    digest.update(np.ascontiguousarray(ordered['y'].to_numpy(dtype='float64')).tobytes())
+    return digest.hexdigest()
+
+
+def cache_key(df, params: dict) -> str:
+    """Lookup key for a series and its model parameters."""
+    payload = json.dumps({'v': CACHE_FORMAT_VERSION, 'params': params}, sort_keys=True, default=str)
+    return hashlib.sha256(f'{series_hash(df)}:{payload}'.encode('utf-8')).hexdigest()
+
+
+def _ttl() -> timedelta:
+    return timedelta(seconds=getattr(settings, 'FORECAST_CACHE_TTL_SECONDS', DEFAULT_TTL_SECONDS))
+
+
+def max_entries() -> int:
+    """Per-org LRU cap; at least one full batch so a batch never evicts its own results."""
+    from .batch import max_series
+
+    return max(int(getattr(settings, 'FORECAST_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)), max_series())
+
+
+def _enabled(org) -> bool:
+    return org is not None and getattr(settings, 'FORECAST_CACHE_ENABLED', True)
+
+
+def lookup(key: str, org) -> ForecastResult | None:
+    """The org's freshest live entry for `key`, marked as used; None on a miss."""
+    if not _enabled(org):
+        return None
+    hit = (
+        ForecastResult.objects.filter(org=org, cache_key=key, created_at__gte=timezone.now() - _ttl())
+        .order_by('-created_at').first()
+    )
+    if hit is not None:
+        ForecastResult.objects.filter(pk=hit.pk).update(last_used_at=timezone.now(), hit_count=F('hit_count') + 1)
+    return hit
+
+
+def lookup_many(keys, org) -> dict:
+    """`lookup` for many keys in one query: {key: ForecastResult} for the hits."""
+    if not _enabled(org):
+        return {}
+    hits = {}
+    fresh = ForecastResult.objects.filter(org=org, cache_key__in=set(keys), created_at__gte=timezone.now() - _ttl())
+    for result in fresh.order_by('cache_key', '-created_at'):
+        hits.setdefault(result.cache_key, result)
+    if hits:
+        ForecastResult.objects.filter(pk__in=[r.pk for r in hits.values()]).update(
+            last_used_at=timezone.now(), hit_count=F('hit_count') + 1,
+        )
+    return hits
+
+
+def store(dataset, key: str, params: dict, forecast_data, summary: str, org=None) -> ForecastResult:
+    """Save a fitted forecast as a cache entry of `org`, then apply the org's eviction."""
+    result = ForecastResult.objects.create(
+        org=org, dataset=dataset, forecast_data=forecast_data, summary=summary,
+        cache_key=key, params=params, last_used_at=timezone.now(),
+    )
+    evict(org)
+    return result
+
+
+def store_many(results) -> list:
+    """Bulk-insert unsaved ForecastResult entries (no eviction; call `evict()` once at the end)."""
+    return ForecastResult.objects.bulk_create(results)
+
+
+def evict(org=None) -> int:
+    """Expire entries past the TTL and drop the org's least recently used beyond the cap; returns entries evicted."""
+    entries = ForecastResult.objects.exclude(cache_key='')
+    evicted = entries.filter(created_at__lt=timezone.now() - _ttl()).update(cache_key='')
+    overflow = list(
+        entries.filter(org=org).order_by(F('last_used_at').desc(nulls_last=True), '-created_at')
+        .values_list('pk', flat=True)[max_entries():]
+    )
+    if overflow:
+        evicted += ForecastResult.objects.filter(pk__in=overflow).update(cache_key='')
+    return evicted
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-16 21:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forecast', '0003_forecastjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forecastresult',
+            name='cache_key',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='forecastresult',
+            name='hit_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='forecastresult',
+            name='last_used_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='forecastresult',
+            name='params',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='forecastjob',
+            name='result',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='forecast.forecastresult'),
+        ),
+        migrations.AddIndex(
+            model_name='forecastresult',
+            index=models.Index(fields=['cache_key', '-created_at'], name='forecast_result_cache_idx'),
+        ),
+    ]
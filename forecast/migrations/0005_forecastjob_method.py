@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-16 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forecast', '0004_forecast_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forecastjob',
+            name='method',
+            field=models.CharField(default='prophet', max_length=16),
+        ),
+    ]
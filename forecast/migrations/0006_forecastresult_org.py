@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_organization_data_version'),
+        ('forecast', '0005_forecastjob_method'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='forecastresult',
+            name='forecast_result_cache_idx',
+        ),
+        migrations.AddField(
+            model_name='forecastresult',
+            name='org',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='forecast_results', to='api.organization'),
+        ),
+        migrations.AddIndex(
+            model_name='forecastresult',
+            index=models.Index(fields=['org', 'cache_key', '-created_at'], name='forecast_result_org_cache_idx'),
+        ),
+    ]
@@ -1,3 +1,6 @@
+import uuid
+
+from django.conf import settings
 from django.db import models
 
 class UploadedDataset(models.Model):
@@ -10,10 +13,71 @@ class UploadedDataset(models.Model):
 
 
 class ForecastResult(models.Model):
+    """A fitted forecast; also the forecast cache entry (see `forecast.cache`).
+
+    `cache_key` hashes the normalized (ds, y) series and the model parameters.
+    It is cleared when the entry is evicted, and the row stays as history.
+    Entries are only served to `org`.
+    """
+    org = models.ForeignKey('api.Organization', on_delete=models.CASCADE, null=True, blank=True, related_name='forecast_results')
     dataset = models.ForeignKey(UploadedDataset, on_delete=models.CASCADE, related_name='results')
     forecast_data = models.JSONField()
     summary = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    cache_key = models.CharField(max_length=64, blank=True, default='')
+    params = models.JSONField(default=dict, blank=True)
+    last_used_at = models.DateTimeField(null=True, blank=True)
+    hit_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=['org', 'cache_key', '-created_at'], name='forecast_result_org_cache_idx')]
 
     def __str__(self):
         return f"Forecast for {self.dataset.name}"
+
+
+class ForecastJob(models.Model):
+    """A forecast fitted in the background (see `forecast.tasks.run_forecast_job`).
+
+    The request that creates a job only stores the dataset and returns the job
+    id; a Celery worker fits the model and links the `ForecastResult`. Status
+    and progress writes use queryset `update()` so a cancel issued while the
+    fit runs is never overwritten.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+        (STATUS_CANCELLED, 'Cancelled'),
+    ]
+    ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    org = models.ForeignKey('api.Organization', on_delete=models.CASCADE, null=True, blank=True, related_name='forecast_jobs')
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='forecast_jobs')
+    dataset = models.ForeignKey(UploadedDataset, on_delete=models.CASCADE, related_name='jobs')
+    periods = models.PositiveIntegerField(default=30)
+    # engine name, already resolved from 'auto' (see `forecast.utils.engines`)
+    method = models.CharField(max_length=16, default='prophet')
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0)
+    error_message = models.TextField(blank=True, default='')
+    # several jobs share one result when later ones are served from the forecast cache
+    result = models.ForeignKey(ForecastResult, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    task_id = models.CharField(max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['org', 'status'], name='forecast_job_org_status_idx')]
+
+    def __str__(self):
+        return f"Forecast job {self.pk} ({self.status})"
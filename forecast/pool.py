@@ -0,0 +1,262 @@
+"""Shared process pool for Prophet fits.
+
+Prophet fits run in a pool of long-lived worker processes instead of the
+request or Celery worker that asks for them. Each worker is warmed up when
+it starts (see `forecast.pool_workers`), so only the first fit in a worker
+pays for loading Prophet and its Stan backend. Settings:
+
+- `FORECAST_POOL_SIZE` (default: CPU count, at most 4): worker processes.
+  0 disables the pool and fits in the calling process.
+- `FORECAST_POOL_TIMEOUT_SECONDS` (default 300): how long a caller waits for
+  one fit before `ForecastTimeout`. The worker is not interrupted; it
+  finishes that fit and the result is dropped.
+- `FORECAST_POOL_MAX_FITS_PER_WORKER` (default 50): a worker exits after this
+  many fits and a freshly warmed one replaces it, which bounds the memory a
+  worker can accumulate.
+
+Workers are started with `spawn`, which `max_tasks_per_child` requires.
+Daemonic processes may not start processes of their own, so they fit
+inline instead. That includes the children of Celery's default prefork
+worker: forecast jobs only use the pool when they run in a worker whose
+task code executes in the main process, i.e. `--pool=threads` or
+`--pool=solo`. `FORECAST_CELERY_QUEUE` routes them to a queue such a
+worker consumes (see docs/CELERY_README.md).
+
+`pool_metrics()` reports fits, failures, timeouts, in-flight fits, queue
+depth and latency. Counters live in the Django cache like the analytics
+cache stats (`api.caching`), so a shared cache backend sums all processes.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import pool_workers
+from .utils.forecast_engine import fit_forecast as fit_inline
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_TIMEOUT_SECONDS = 300
+DEFAULT_MAX_FITS_PER_WORKER = 50
+
+# engines slow enough per series to be worth a worker process
+POOLED_ENGINES = {'prophet'}
+
+# upper bounds (seconds) of the latency histogram; the last bucket is unbounded
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 30, 60, 120, 300)
+METRIC_PREFIX = 'forecast_pool'
+COUNTERS = ('fits', 'failures', 'timeouts', 'in_flight', 'fit_ms', 'wait_ms')
+
+
+class ForecastTimeout(Exception):
+    """A pooled fit did not finish within `FORECAST_POOL_TIMEOUT_SECONDS`."""
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+_record_lock = threading.Lock()
+_warned_daemon = False
+
+
+def pool_size() -> int:
+    default = min(DEFAULT_MAX_WORKERS, os.cpu_count() or 1)
+    return max(0, int(getattr(settings, 'FORECAST_POOL_SIZE', default)))
+
+
+def fit_timeout() -> float:
+    return float(getattr(settings, 'FORECAST_POOL_TIMEOUT_SECONDS', DEFAULT_TIMEOUT_SECONDS))
+
+
+def max_fits_per_worker() -> int:
+    return int(getattr(settings, 'FORECAST_POOL_MAX_FITS_PER_WORKER', DEFAULT_MAX_FITS_PER_WORKER))
+
+
+def uses_pool(method: str) -> bool:
+    """Whether fits with `method` go to the pool from this process."""
+    if method not in POOLED_ENGINES or pool_size() <= 0:
+        return False
+    if multiprocessing.current_process().daemon:
+        global _warned_daemon
+        if not _warned_daemon:
+            _warned_daemon = True
+            logger.warning('Daemonic process (e.g. a Celery prefork child): Prophet fits run inline, not in the forecast pool')
+        return False
+    return True
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=pool_size(),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=pool_workers.warm_up,
+                max_tasks_per_child=max(1, max_fits_per_worker()),
+            )
+        return _pool
+
+
+def shutdown(wait: bool = True) -> None:
+    """Stop the pool; the next fit starts a new one."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def _incr(name: str, amount: int = 1) -> None:
+    key = f'{METRIC_PREFIX}:{name}'
+    # add() is a no-op when the counter exists; incr() is atomic on shared backends
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        # evicted between add() and incr()
+        cache.set(key, amount, timeout=None)
+
+
+def _bucket(seconds: float) -> str:
+    for bound in LATENCY_BUCKETS:
+        if seconds <= bound:
+            return str(bound)
+    return '+Inf'
+
+
+def _record(latency: float, fit_seconds: float | None, error: BaseException | None) -> None:
+    if error is not None:
+        _incr('timeouts' if isinstance(error, ForecastTimeout) else 'failures')
+        return
+    _incr('fits')
+    _incr('fit_ms', int(fit_seconds * 1000))
+    _incr('wait_ms', int(max(0.0, latency - fit_seconds) * 1000))
+    _incr(f'latency:{_bucket(latency)}')
+
+
+def _claim(fut: Future) -> bool:
+    """True for the first caller only, so each future is counted once (fit, failure or timeout)."""
+    with _record_lock:
+        if getattr(fut, '_pool_recorded', False):
+            return False
+        fut._pool_recorded = True
+        return True
+
+
+def _time_out(fut: Future) -> ForecastTimeout:
+    # a fit already running cannot be cancelled; its done callback then skips counting it again
+    fut.cancel()
+    if _claim(fut):
+        _record(0.0, None, ForecastTimeout())
+    return ForecastTimeout(f'Forecast did not finish within {fit_timeout():g} seconds.')
+
+
+def submit(df, periods: int, method: str) -> Future:
+    """Queue one fit; the future resolves to (forecast_data, fit_seconds)."""
+    submitted = time.perf_counter()
+    try:
+        future = get_pool().submit(pool_workers.timed_fit, df, periods, method)
+    except BrokenProcessPool:
+        # a worker died (e.g. killed for memory); start over once
+        shutdown(wait=False)
+        future = get_pool().submit(pool_workers.timed_fit, df, periods, method)
+    _incr('in_flight')
+
+    def done(fut):
+        _incr('in_flight', -1)
+        if fut.cancelled() or not _claim(fut):
+            return
+        exc = fut.exception()
+        _record(time.perf_counter() - submitted, None if exc else fut.result()[1], exc)
+
+    future.add_done_callback(done)
+    return future
+
+
+def _fit_inline(df, periods: int, method: str):
+    if method not in POOLED_ENGINES:
+        return fit_inline(df, periods=periods, method=method)
+    # pool disabled or unavailable: still counted, with no queue wait
+    start = time.perf_counter()
+    try:
+        data = fit_inline(df, periods=periods, method=method)
+    except Exception as exc:
+        _record(time.perf_counter() - start, None, exc)
+        raise
+    elapsed = time.perf_counter() - start
+    _record(elapsed, elapsed, None)
+    return data
+
+
+def fit_forecast(df, periods=30, method='prophet'):
+    """`forecast_engine.fit_forecast`, run in the pool for pooled engines.
+
+    Raises `ForecastTimeout` when a pooled fit takes longer than
+    `FORECAST_POOL_TIMEOUT_SECONDS`.
+    """
+    if not uses_pool(method):
+        return _fit_inline(df, periods, method)
+    future = submit(df, periods, method)
+    try:
+        data, _ = future.result(timeout=fit_timeout())
+    except FuturesTimeoutError:
+        raise _time_out(future)
+    return data
+
+
+def iter_fits(series: dict, periods: int, method: str):
+    """Fit every {key: df} in the pool; yields (key, forecast_data, error) as fits finish.
+
+    The wait is bounded by one timeout per round of `pool_size()` fits; fits
+    still unfinished then are cancelled and yielded with a `ForecastTimeout`.
+    """
+    futures = {submit(df, periods, method): key for key, df in series.items()}
+    rounds = math.ceil(len(futures) / max(1, pool_size()))
+    pending = set(futures)
+    try:
+        for fut in as_completed(futures, timeout=fit_timeout() * rounds):
+            pending.discard(fut)
+            exc = fut.exception()
+            yield (futures[fut], None, exc) if exc else (futures[fut], fut.result()[0], None)
+    except FuturesTimeoutError:
+        for fut in pending:
+            yield futures[fut], None, _time_out(fut)
+
+
+def pool_metrics() -> dict:
+    """Pool settings, counters and latency histogram (seconds, cumulative per bucket as in Prometheus)."""
+    bucket_names = [str(b) for b in LATENCY_BUCKETS] + ['+Inf']
+    keys = [f'{METRIC_PREFIX}:{name}' for name in COUNTERS] + [f'{METRIC_PREFIX}:latency:{b}' for b in bucket_names]
+    values = cache.get_many(keys)
+    counters = {name: values.get(f'{METRIC_PREFIX}:{name}', 0) for name in COUNTERS}
+    size = pool_size()
+    in_flight = max(0, counters['in_flight'])
+    fits = counters['fits']
+    cumulative, histogram = 0, {}
+    for b in bucket_names:
+        cumulative += values.get(f'{METRIC_PREFIX}:latency:{b}', 0)
+        histogram[b] = cumulative
+    return {
+        'pool_size': size,
+        'max_fits_per_worker': max_fits_per_worker(),
+        'timeout_seconds': fit_timeout(),
+        'in_flight': in_flight,
+        'queue_depth': max(0, in_flight - size),
+        'fits': fits,
+        'failures': counters['failures'],
+        'timeouts': counters['timeouts'],
+        'mean_fit_seconds': round(counters['fit_ms'] / fits / 1000, 3) if fits else None,
+        'mean_wait_seconds': round(counters['wait_ms'] / fits / 1000, 3) if fits else None,
+        'latency_buckets': histogram,
+    }
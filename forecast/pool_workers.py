@@ -0,0 +1,41 @@
+"""Process-pool workers for Prophet fits (see `forecast.pool`).
+
+Like `api.import_workers`, this module does not import Django, so spawned
+workers start without configuring it. `warm_up` runs once when a worker
+starts: it imports Prophet and fits a tiny series, which loads cmdstanpy's
+backend and the compiled Stan model. Every later fit in that worker reuses
+them instead of paying the start-up cost per request.
+"""
+from __future__ import annotations
+
+import logging
+import time
+
+import pandas as pd
+
+from .utils.forecast_engine import fit_forecast
+
+logger = logging.getLogger(__name__)
+
+WARM_UP_POINTS = 30
+
+
+def warm_up() -> None:
+    """ProcessPoolExecutor initializer: load Prophet before the first real fit."""
+    series = pd.DataFrame({
+        'ds': pd.date_range('2024-01-01', periods=WARM_UP_POINTS, freq='D'),
+        'y': [float(i % 7) for i in range(WARM_UP_POINTS)],
+    })
+    try:
+        fit_forecast(series, periods=1, method='prophet')
+    except ImportError:
+        logger.warning('Prophet is not installed; forecast pool workers start cold')
+    except Exception:
+        logger.warning('Prophet warm-up fit failed', exc_info=True)
+
+
+def timed_fit(df, periods: int, method: str):
+    """Fit one series; returns (forecast_data, fit_seconds)."""
+    start = time.perf_counter()
+    data = fit_forecast(df, periods=periods, method=method)
+    return data, time.perf_counter() - start
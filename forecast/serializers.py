@@ -1,4 +1,26 @@
 from rest_framework import serializers
 
+from .models import ForecastJob
+
+
 class ForecastUploadSerializer(serializers.Serializer):
     file = serializers.FileField()
+
+
+class ForecastJobSerializer(serializers.ModelSerializer):
+    dataset = serializers.CharField(source='dataset.name', read_only=True)
+    result = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ForecastJob
+        fields = [
+            'id', 'status', 'progress', 'periods', 'method', 'dataset', 'error_message',
+            'created_at', 'started_at', 'finished_at', 'result',
+        ]
+        read_only_fields = fields
+
+    def get_result(self, job):
+        # only a finished job exposes its stored ForecastResult
+        if job.status != job.STATUS_SUCCEEDED or job.result is None:
+            return None
+        return {'summary': job.result.summary, 'forecast': job.result.forecast_data}
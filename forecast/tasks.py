@@ -0,0 +1,131 @@
+"""Background forecast jobs.
+
+`run_forecast_job` moves a `ForecastJob` through queued -> running ->
+succeeded/failed. The output is stored as a `ForecastResult`, or an existing
+one is reused from the forecast cache (`forecast.cache`). Every status write
+is a conditional `update()` on the job's current status, so a job cancelled
+while its model is fitting stays cancelled and its output is discarded.
+"""
+from __future__ import annotations
+
+import logging
+
+from celery import shared_task
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import cache as forecast_cache
+from .models import ForecastJob
+from .utils.ai_summary import generate_ai_summary
+from .pool import ForecastTimeout, fit_forecast
+from .utils.forecast_engine import load_series, model_params
+
+logger = logging.getLogger(__name__)
+
+# Progress (percent) reported at each stage of a job.
+PROGRESS_STARTED = 10
+PROGRESS_FITTED = 80
+PROGRESS_SUMMARIZED = 95
+PROGRESS_DONE = 100
+
+
+@shared_task(bind=True)
+def run_forecast_job(self, job_id: str) -> str:
+    """Celery entry point; returns the job's final status."""
+    return run_forecast_job_sync(job_id)
+
+
+def _advance(job_id, from_status, **fields) -> bool:
+    """Apply `fields` only while the job is still in `from_status`; False when it moved on (e.g. cancelled)."""
+    return ForecastJob.objects.filter(pk=job_id, status=from_status).update(**fields) == 1
+
+
+def run_forecast_job_sync(job_id) -> str:
+    if not _advance(job_id, ForecastJob.STATUS_QUEUED, status=ForecastJob.STATUS_RUNNING, started_at=timezone.now(), progress=PROGRESS_STARTED):
+        # cancelled before a worker picked it up, or already handled by another worker
+        return ForecastJob.objects.filter(pk=job_id).values_list('status', flat=True).first() or 'missing'
+
+    job = ForecastJob.objects.select_related('dataset').get(pk=job_id)
+    running = ForecastJob.STATUS_RUNNING
+    try:
+        df = load_series(job.dataset.file.path)
+        params = model_params(job.periods, job.method)
+        key = forecast_cache.cache_key(df, params)
+        # an identical job may have finished since this one was queued
+        result = forecast_cache.lookup(key, job.org)
+        if result is not None:
+            _advance(job_id, running, status=ForecastJob.STATUS_SUCCEEDED, progress=PROGRESS_DONE, result=result, finished_at=timezone.now())
+            return ForecastJob.objects.filter(pk=job_id).values_list('status', flat=True).first()
+        forecast_data = fit_forecast(df, periods=job.periods, method=job.method)
+        if not _advance(job_id, running, progress=PROGRESS_FITTED):
+            return ForecastJob.STATUS_CANCELLED
+        summary = generate_ai_summary(forecast_data)
+        if not _advance(job_id, running, progress=PROGRESS_SUMMARIZED):
+            return ForecastJob.STATUS_CANCELLED
+        with transaction.atomic():
+            result = forecast_cache.store(job.dataset, key, params, forecast_data, summary, org=job.org)
+            done = _advance(
+                job_id, running,
+                status=ForecastJob.STATUS_SUCCEEDED, progress=PROGRESS_DONE, result=result, finished_at=timezone.now(),
+            )
+            if not done:
+                # cancelled between the last check and now; drop the orphan result
+                transaction.set_rollback(True)
+                return ForecastJob.STATUS_CANCELLED
+    except (ValueError, ForecastTimeout) as exc:
+        # data validation errors from the engine and pool timeouts are shown to the user as-is
+        _advance(job_id, running, status=ForecastJob.STATUS_FAILED, error_message=str(exc), finished_at=timezone.now())
+        return ForecastJob.STATUS_FAILED
+    except Exception:
+        logger.exception('Forecast job %s failed', job_id)
+        _advance(
+            job_id, running,
+            status=ForecastJob.STATUS_FAILED, error_message='An internal error occurred during forecasting.', finished_at=timezone.now(),
+        )
+        return ForecastJob.STATUS_FAILED
+    logger.info('Forecast job %s succeeded: result %s', job_id, result.pk)
+    return ForecastJob.STATUS_SUCCEEDED
+
+
+def enqueue_forecast_job(job: ForecastJob) -> None:
+    """Send the job to Celery once the creating transaction commits.
+
+    Falls back to a daemon thread when no broker is reachable, as uploads do.
+    """
+    def _send():
+        try:
+            async_result = run_forecast_job.delay(str(job.pk))
+            ForecastJob.objects.filter(pk=job.pk).update(task_id=async_result.id or '')
+            return
+        except Exception:
+            logger.warning('Could not enqueue forecast job %s; running it in a thread', job.pk, exc_info=True)
+
+        import threading
+
+        def _thread():
+            close_old_connections()
+            try:
+                run_forecast_job_sync(job.pk)
+            finally:
+                close_old_connections()
+
+        threading.Thread(target=_thread, daemon=True).start()
+
+    transaction.on_commit(_send)
+
+
+def cancel_forecast_job(job: ForecastJob) -> bool:
+    """Cancel a queued or running job; False when it had already finished.
+
+    A queued task is revoked so the worker skips it. A fit that is already
+    running completes in its worker, but its output is discarded.
+    """
+    cancelled = ForecastJob.objects.filter(pk=job.pk, status__in=ForecastJob.ACTIVE_STATUSES).update(
+        status=ForecastJob.STATUS_CANCELLED, finished_at=timezone.now(),
+    )
+    if cancelled and job.task_id:
+        try:
+            run_forecast_job.app.control.revoke(job.task_id)
+        except Exception:
+            logger.warning('Could not revoke task %s for forecast job %s', job.task_id, job.pk, exc_info=True)
+    return bool(cancelled)
@@ -1,3 +1,393 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.models import Organization
+from forecast.models import ForecastJob, ForecastResult
+from forecast.tasks import run_forecast_job_sync
+
+FORECAST = [{'ds': '2024-02-01 00:00:00', 'yhat': 1.0, 'yhat_lower': 0.5, 'yhat_upper': 1.5},
+            {'ds': '2024-02-02 00:00:00', 'yhat': 2.0, 'yhat_lower': 1.5, 'yhat_upper': 2.5}]
+
+
+@mock.patch('forecast.tasks.run_forecast_job.delay', return_value=mock.Mock(id='task-1'))
+class ForecastJobAPITests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name='FOrg', slug='forg')
+        self.user = get_user_model().objects.create_user(username='f', password='p')
+        self.user.profile.org = self.org
+        self.user.profile.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _post(self, periods='2', body=b'ds,y\n2024-01-01,1\n2024-01-02,2\n', **extra):
+        csv = SimpleUploadedFile('series.csv', body, content_type='text/csv')
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/forecast/jobs/', {'file': csv, 'periods': periods, **extra}, format='multipart')
+
+    def test_post_returns_202_and_status_reports_result(self, delay):
+        resp = self._post()
+        self.assertEqual(resp.status_code, 202)
+        job_id = resp.data['job_id']
+        self.assertEqual(resp['Location'], f'/api/forecast/jobs/{job_id}/')
+        delay.assert_called_once_with(job_id)
+        job = ForecastJob.objects.get(pk=job_id)
+        self.assertEqual((job.status, job.task_id, job.org), (ForecastJob.STATUS_QUEUED, 'task-1', self.org))
+
+        with mock.patch('forecast.tasks.fit_forecast', return_value=FORECAST) as fit:
+            self.assertEqual(run_forecast_job_sync(job_id), ForecastJob.STATUS_SUCCEEDED)
+        # a two-point series is too short for Prophet, so auto picks Holt
+        self.assertEqual(fit.call_args.kwargs, {'periods': 2, 'method': 'holt'})
+
+        data = self.client.get(f'/api/forecast/jobs/{job_id}/').data
+        self.assertEqual((data['status'], data['progress']), (ForecastJob.STATUS_SUCCEEDED, 100))
+        self.assertEqual(data['result']['forecast'], FORECAST)
+        self.assertEqual(ForecastResult.objects.get().jobs.get().pk, job.pk)
+
+    def test_engine_validation_error_fails_job(self, delay):
+        job_id = self._post().data['job_id']
+        with mock.patch('forecast.tasks.fit_forecast', side_effect=ValueError('Prophet failed to fit the model.')):
+            run_forecast_job_sync(job_id)
+        data = self.client.get(f'/api/forecast/jobs/{job_id}/').data
+        self.assertEqual(data['status'], ForecastJob.STATUS_FAILED)
+        self.assertIn('Prophet failed', data['error_message'])
+        self.assertIsNone(data['result'])
+
+    def test_cancel_queued_job_skips_fit(self, delay):
+        job_id = self._post().data['job_id']
+        with mock.patch('forecast.tasks.run_forecast_job.app.control.revoke') as revoke:
+            resp = self.client.post(f'/api/forecast/jobs/{job_id}/cancel/')
+        self.assertEqual(resp.data['status'], ForecastJob.STATUS_CANCELLED)
+        revoke.assert_called_once_with('task-1')
+        with mock.patch('forecast.tasks.fit_forecast') as fit:
+            self.assertEqual(run_forecast_job_sync(job_id), ForecastJob.STATUS_CANCELLED)
+        fit.assert_not_called()
+        self.assertEqual(self.client.post(f'/api/forecast/jobs/{job_id}/cancel/').status_code, 409)
+
+    def test_cancel_while_fitting_discards_result(self, delay):
+        job_id = self._post().data['job_id']
+
+        def fit_then_cancel(*args, **kwargs):
+            ForecastJob.objects.filter(pk=job_id).update(status=ForecastJob.STATUS_CANCELLED)
+            return FORECAST
+
+        with mock.patch('forecast.tasks.fit_forecast', side_effect=fit_then_cancel):
+            self.assertEqual(run_forecast_job_sync(job_id), ForecastJob.STATUS_CANCELLED)
+        self.assertFalse(ForecastResult.objects.exists())
+
+    def test_missing_columns_rejected_before_queueing(self, delay):
+        resp = self._post(body=b'date,value\n2024-01-01,1\n')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("'ds'", resp.data['error'])
+        self.assertFalse(ForecastJob.objects.exists())
+        delay.assert_not_called()
+
+    def test_method_is_stored_and_validated(self, delay):
+        job_id = self._post(method='linear').data['job_id']
+        self.assertEqual(ForecastJob.objects.get(pk=job_id).method, 'linear')
+        self.assertEqual(run_forecast_job_sync(job_id), ForecastJob.STATUS_SUCCEEDED)
+        self.assertEqual(ForecastResult.objects.get().params, {'method': 'linear', 'periods': 2})
+
+        resp = self._post(method='arima')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("Unknown forecast method 'arima'", resp.data['error'])
+
+    @override_settings(FORECAST_MAX_ACTIVE_JOBS_PER_ORG=1)
+    def test_per_org_cap(self, delay):
+        first = self._post().data['job_id']
+        self.assertEqual(self._post(body=b'ds,y\n2024-01-01,5\n').status_code, 429)
+        ForecastJob.objects.filter(pk=first).update(status=ForecastJob.STATUS_SUCCEEDED)
+        self.assertEqual(self._post(body=b'ds,y\n2024-01-01,5\n').status_code, 202)
+
+    def test_jobs_are_private_to_the_org(self, delay):
+        job_id = self._post().data['job_id']
+        other = get_user_model().objects.create_user(username='o', password='p')
+        other.profile.org = Organization.objects.create(name='Other', slug='other-f')
+        other.profile.save()
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(f'/api/forecast/jobs/{job_id}/').status_code, 404)
+        self.assertEqual(self.client.post(f'/api/forecast/jobs/{job_id}/cancel/').status_code, 404)
+
+
+SERIES = b'ds,y\n2024-01-01,1\n2024-01-02,2\n2024-01-03,4\n'
+SHUFFLED = b'Y,DS\n4,2024-01-03\n1,2024-01-01\n2,2024-01-02\n'
+
+
+@mock.patch('forecast.tasks.run_forecast_job.delay', return_value=mock.Mock(id='task-1'))
+class ForecastCacheTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name='COrg', slug='corg')
+        self.user = get_user_model().objects.create_user(username='c', password='p')
+        self.user.profile.org = self.org
+        self.user.profile.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _post(self, body, periods='3', url='/api/forecast/jobs/'):
+        csv = SimpleUploadedFile('upload.csv', body, content_type='text/csv')
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url, {'file': csv, 'periods': periods}, format='multipart')
+
+    def test_key_ignores_row_order_and_column_case(self, delay):
+        from forecast.cache import cache_key
+        from forecast.utils.forecast_engine import load_series, model_params
+        a = load_series(SimpleUploadedFile('a.csv', SERIES))
+        b = load_series(SimpleUploadedFile('b.csv', SHUFFLED))
+        self.assertEqual(cache_key(a, model_params(3)), cache_key(b, model_params(3)))
+        self.assertNotEqual(cache_key(a, model_params(3)), cache_key(a, model_params(4)))
+
+    def test_identical_job_is_served_without_refitting(self, delay):
+        first = self._post(SERIES).data['job_id']
+        with mock.patch('forecast.tasks.fit_forecast', return_value=FORECAST):
+            run_forecast_job_sync(first)
+        delay.reset_mock()
+
+        with mock.patch('forecast.tasks.fit_forecast') as fit:
+            resp = self._post(SHUFFLED)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['status'], ForecastJob.STATUS_SUCCEEDED)
+        self.assertEqual(resp.data['result']['forecast'], FORECAST)
+        fit.assert_not_called()
+        delay.assert_not_called()
+        cached = ForecastResult.objects.get()
+        self.assertEqual((cached.hit_count, cached.jobs.count()), (1, 2))
+
+        # other parameters are a different entry
+        self.assertEqual(self._post(SERIES, periods='5').status_code, 202)
+
+    def test_original_endpoint_queues_a_job(self, delay):
+        first = self._post(SERIES, url='/api/forecast/')
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(first['Location'], f"/api/forecast/jobs/{first.data['job_id']}/")
+        delay.assert_called_once_with(first.data['job_id'])
+        with mock.patch('forecast.tasks.fit_forecast', return_value=FORECAST) as fit:
+            run_forecast_job_sync(first.data['job_id'])
+            second = self._post(SHUFFLED, url='/api/forecast/')
+        self.assertEqual(fit.call_count, 1)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['result']['forecast'], FORECAST)
+        self.assertEqual(ForecastResult.objects.count(), 1)
+
+    def test_ttl_and_lru_eviction(self, delay):
+        from datetime import timedelta
+        from django.utils import timezone
+        from forecast import cache
+        from forecast.models import UploadedDataset
+
+        dataset = UploadedDataset.objects.create(name='d', file='datasets/d.csv')
+        other = Organization.objects.create(name='Other', slug='other-c')
+        old = cache.store(dataset, 'k-old', {}, FORECAST, 's', org=self.org)
+        ForecastResult.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=30))
+        self.assertIsNone(cache.lookup('k-old', self.org))
+
+        with self.settings(FORECAST_CACHE_MAX_ENTRIES=2, FORECAST_BATCH_MAX_SERIES=2):
+            cache.store(dataset, 'k-other', {}, FORECAST, 's', org=other)
+            cache.store(dataset, 'k1', {}, FORECAST, 's', org=self.org)
+            cache.store(dataset, 'k2', {}, FORECAST, 's', org=self.org)
+            cache.lookup('k1', self.org)
+            cache.store(dataset, 'k3', {}, FORECAST, 's', org=self.org)
+        live = set(ForecastResult.objects.exclude(cache_key='').values_list('cache_key', flat=True))
+        # the cap is per org
+        self.assertEqual(live, {'k-other', 'k1', 'k3'})
+        # evicted entries remain as history
+        self.assertEqual(ForecastResult.objects.count(), 5)
+
+    def test_entries_are_private_to_the_org(self, delay):
+        first = self._post(SERIES).data['job_id']
+        with mock.patch('forecast.tasks.fit_forecast', return_value=FORECAST):
+            run_forecast_job_sync(first)
+
+        other = get_user_model().objects.create_user(username='c2', password='p')
+        other.profile.org = Organization.objects.create(name='Other', slug='other-c2')
+        other.profile.save()
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self._post(SERIES).status_code, 202)
+
+        # without an org nothing is shared
+        self.client.force_authenticate(user=get_user_model().objects.create_user(username='c3', password='p'))
+        self.assertEqual(self._post(SERIES).status_code, 202)
+
+
+class ForecastEngineTests(SimpleTestCase):
+    def _monthly(self, values):
+        import pandas as pd
+        return pd.DataFrame({'ds': pd.date_range('2023-01-01', periods=len(values), freq='MS'), 'y': values})
+
+    def test_linear_extends_trend_by_calendar_month(self):
+        from forecast.utils.engines import linear_forecast
+        out = linear_forecast(self._monthly([10.0, 20.0, 30.0, 40.0]), periods=2)
+        self.assertEqual([r['ds'] for r in out], ['2023-05-01 00:00:00', '2023-06-01 00:00:00'])
+        self.assertEqual([r['yhat'] for r in out], [50.0, 60.0])
+        self.assertEqual((out[0]['yhat_lower'], out[0]['yhat_upper']), (50.0, 50.0))
+
+    def test_holt_grid_matches_scalar_recursion(self):
+        import numpy as np
+        from forecast.utils.engines import HOLT_GRID, holt_fit
+        y = np.array([100, 104, 103, 110, 118, 117, 125, 131], dtype='float64')
+
+        def sse(alpha, beta):
+            level, trend, total = y[0], y[1] - y[0], 0.0
+            for yt in y[1:]:
+                total += (yt - level - trend) ** 2
+                prev = level
+                level = alpha * yt + (1 - alpha) * (level + trend)
+                trend = beta * (level - prev) + (1 - beta) * trend
+            return total
+
+        best = min(((sse(a, b), a, b) for a in HOLT_GRID for b in HOLT_GRID), key=lambda t: t[0])
+        fit = holt_fit(y)
+        self.assertAlmostEqual(fit['alpha'], best[1])
+        self.assertAlmostEqual(fit['beta'], best[2])
+        self.assertAlmostEqual(fit['mse'], best[0] / (len(y) - 1))
+
+    def test_auto_reserves_prophet_for_long_daily_series(self):
+        import pandas as pd
+        from forecast.utils import engines
+        daily = pd.DataFrame({'ds': pd.date_range('2024-01-01', periods=90), 'y': range(90)})
+        with mock.patch.object(engines, '_prophet_available', return_value=True):
+            self.assertEqual(engines.resolve_method(self._monthly(range(36)), 'auto'), 'holt')
+            self.assertEqual(engines.resolve_method(daily.head(30), 'auto'), 'holt')
+            self.assertEqual(engines.resolve_method(daily, 'auto'), 'prophet')
+            self.assertEqual(engines.resolve_method(daily, 'linear'), 'linear')
+        with mock.patch.object(engines, '_prophet_available', return_value=False):
+            self.assertEqual(engines.resolve_method(daily, 'auto'), 'holt')
+        with self.assertRaises(ValueError):
+            engines.resolve_method(daily, 'arima')
+
+    def test_holt_many_matches_per_series_fits(self):
+        import pandas as pd
+        from forecast.utils.engines import holt_forecast, holt_forecast_many
+        a = self._monthly([100.0, 110.0, 125.0, 130.0, 150.0])
+        b = self._monthly([7.0, 5.0, 6.0])
+        c = self._monthly([42.0])
+        long = pd.concat([a.assign(series_id='a'), b.assign(series_id='b'), c.assign(series_id='c')])
+        many = holt_forecast_many(long, periods=3)
+        self.assertEqual(many, {sid: holt_forecast(df, periods=3) for sid, df in (('a', a), ('b', b), ('c', c))})
+
+
+BATCH = (b'series_id,ds,y\n'
+         b'007,2024-01-01,10\n007,2024-02-01,20\n007,2024-03-01,30\n'
+         b'b,2024-01-01,5\nb,2024-02-01,4\nb,2024-03-01,3\n')
+
+
+class ForecastBatchTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='b', password='p')
+        self.user.profile.org = Organization.objects.create(name='BOrg', slug='borg')
+        self.user.profile.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _post(self, body=BATCH, **data):
+        import json
+        csv = SimpleUploadedFile('batch.csv', body, content_type='text/csv')
+        resp = self.client.post('/api/forecast/batch/', {'file': csv, 'periods': '2', **data}, format='multipart')
+        if resp.status_code != 200:
+            return resp, None
+        return resp, [json.loads(line) for line in b''.join(resp.streaming_content).splitlines()]
+
+    def test_streams_one_line_per_series_and_writes_results(self):
+        resp, lines = self._post()
+        self.assertEqual(resp['Content-Type'], 'application/x-ndjson')
+        *series, done = lines
+        self.assertEqual([(s['series_id'], s['method'], s['cached']) for s in series], [('007', 'holt', False), ('b', 'holt', False)])
+        self.assertEqual(series[0]['forecast'][0]['ds'], '2024-04-01 00:00:00')
+        self.assertEqual((done['done'], done['series'], done['fitted'], done['cached']), (True, 2, 2, 0))
+        self.assertEqual(set(ForecastResult.objects.values_list('pk', flat=True)), {s['result_id'] for s in series})
+
+        # a resubmitted batch is served from the forecast cache
+        _, again = self._post()
+        self.assertTrue(all(s['cached'] for s in again[:-1]))
+        self.assertEqual((again[-1]['fitted'], again[-1]['cached']), (0, 2))
+        self.assertEqual(ForecastResult.objects.count(), 2)
+
+    @override_settings(FORECAST_POOL_SIZE=0)
+    def test_failed_series_is_reported_and_batch_continues(self):
+        def fit(df, periods, method):
+            if df['y'].iloc[0] == 5:
+                raise ValueError('Prophet failed to fit the model.')
+            return FORECAST
+
+        with mock.patch('forecast.batch.fit_forecast', side_effect=fit):
+            _, lines = self._post(method='prophet')
+        by_id = {line.get('series_id'): line for line in lines}
+        self.assertEqual(by_id['007']['forecast'], FORECAST)
+        self.assertEqual(by_id['b'], {'series_id': 'b', 'method': 'prophet', 'error': 'Prophet failed to fit the model.'})
+        self.assertEqual((lines[-1]['fitted'], lines[-1]['failed']), (1, 1))
+
+    def test_rejects_bad_uploads_before_streaming(self):
+        resp, _ = self._post(body=b'ds,y\n2024-01-01,1\n')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("'series_id'", resp.data['error'])
+        self.assertEqual(self._post(method='arima')[0].status_code, 400)
+        with self.settings(FORECAST_BATCH_MAX_SERIES=1):
+            self.assertEqual(self._post()[0].status_code, 400)
+
+
+class ForecastPoolTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def _series(self):
+        import pandas as pd
+        return pd.DataFrame({'ds': pd.date_range('2024-01-01', periods=4, freq='MS'), 'y': [1.0, 2.0, 3.0, 4.0]})
+
+    def test_worker_fits_in_spawned_process(self):
+        from forecast import pool
+        from forecast.utils.engines import linear_forecast
+        with self.settings(FORECAST_POOL_SIZE=1, FORECAST_POOL_MAX_FITS_PER_WORKER=1):
+            try:
+                data, fit_seconds = pool.submit(self._series(), 2, 'linear').result(timeout=60)
+                # the first worker retired after one fit; a fresh one takes the next
+                again, _ = pool.submit(self._series(), 2, 'linear').result(timeout=60)
+            finally:
+                pool.shutdown()
+        self.assertEqual(data, linear_forecast(self._series(), periods=2))
+        self.assertEqual(again, data)
+        self.assertGreaterEqual(fit_seconds, 0)
+        metrics = pool.pool_metrics()
+        self.assertEqual((metrics['fits'], metrics['in_flight'], metrics['latency_buckets']['+Inf']), (2, 0, 2))
+
+    def test_timeout_raises_and_is_counted(self):
+        from concurrent.futures import Future
+        from forecast import pool
+        with self.settings(FORECAST_POOL_SIZE=2, FORECAST_POOL_TIMEOUT_SECONDS=0.01), \
+                mock.patch.object(pool, 'get_pool') as get_pool:
+            get_pool.return_value.submit.return_value = Future()
+            with self.assertRaises(pool.ForecastTimeout):
+                pool.fit_forecast(self._series(), periods=2, method='prophet')
+            metrics = pool.pool_metrics()
+        self.assertEqual((metrics['timeouts'], metrics['in_flight'], metrics['queue_depth']), (1, 0, 0))
+
+    def test_timed_out_fit_that_finishes_later_is_counted_once(self):
+        from concurrent.futures import Future
+        from forecast import pool
+        running = Future()
+        # a running future cannot be cancelled, so its worker still reports back
+        running.set_running_or_notify_cancel()
+        with self.settings(FORECAST_POOL_SIZE=2, FORECAST_POOL_TIMEOUT_SECONDS=0.01), \
+                mock.patch.object(pool, 'get_pool') as get_pool:
+            get_pool.return_value.submit.return_value = running
+            with self.assertRaises(pool.ForecastTimeout):
+                pool.fit_forecast(self._series(), periods=2, method='prophet')
+            running.set_result((FORECAST, 5.0))
+            metrics = pool.pool_metrics()
+        self.assertEqual((metrics['timeouts'], metrics['fits'], metrics['in_flight']), (1, 0, 0))
+
+    @override_settings(FORECAST_POOL_SIZE=0)
+    def test_disabled_pool_fits_inline_and_metrics_are_staff_only(self):
+        from forecast import pool
+        with mock.patch('forecast.pool.fit_inline', return_value=FORECAST) as fit:
+            self.assertEqual(pool.fit_forecast(self._series(), periods=2, method='prophet'), FORECAST)
+        fit.assert_called_once()
+
+        client = APIClient()
+        client.force_authenticate(user=get_user_model().objects.create_user(username='u', password='p'))
+        self.assertEqual(client.get('/api/forecast/pool/').status_code, 403)
+        client.force_authenticate(user=get_user_model().objects.create_user(username='s', password='p', is_staff=True))
+        data = client.get('/api/forecast/pool/').data
+        self.assertEqual((data['pool_size'], data['fits'], data['failures']), (0, 1, 0))
@@ -1,7 +1,12 @@
 from django.urls import path
-from .views import ForecastAPIView
+from .views import ForecastAPIView, ForecastBatchAPIView, ForecastJobListCreateAPIView, ForecastJobDetailAPIView, ForecastJobCancelAPIView, ForecastPoolMetricsAPIView
 
 urlpatterns = [
     # Removed the trailing slash from the original to match the client path
     path('', ForecastAPIView.as_view(), name='forecast'), 
+    path('batch/', ForecastBatchAPIView.as_view(), name='forecast-batch'),
+    path('pool/', ForecastPoolMetricsAPIView.as_view(), name='forecast-pool-metrics'),
+    path('jobs/', ForecastJobListCreateAPIView.as_view(), name='forecast-jobs'),
+    path('jobs/<uuid:job_id>/', ForecastJobDetailAPIView.as_view(), name='forecast-job-detail'),
+    path('jobs/<uuid:job_id>/cancel/', ForecastJobCancelAPIView.as_view(), name='forecast-job-cancel'),
 ]
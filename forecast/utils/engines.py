@@ -0,0 +1,223 @@
+"""Forecast engine registry and the NumPy fast-path engines.
+
+An engine is a callable `engine(df, periods) -> [{'ds', 'yhat', 'yhat_lower',
+'yhat_upper'}, ...]`. It takes a normalized (ds, y) frame (see
+`forecast_engine.load_series`) and returns the `periods` steps after the last
+ds. Engines register themselves under a name with `register_engine`, and
+`get_engine(name)` looks one up. Requests select an engine with the `method`
+parameter.
+
+- linear: OLS trend on the time index. Mirrors the client's `linearForecast`.
+- holt:   Holt's linear (double exponential) smoothing. alpha and beta are
+          picked on the client's 0.05 grid by one-step-ahead MSE, and all 361
+          pairs are evaluated in one vectorized pass. Mirrors
+          `holtLinearForecast`.
+- prophet: registered by `forecast_engine`.
+
+`auto` resolves to Prophet only for daily (or finer) series with at least
+`PROPHET_MIN_POINTS` observations, where it can use weekly and yearly
+seasonality, and only when the `prophet` package is installed. Shorter and coarser series, such as monthly MRR, use Holt,
+which answers in about a millisecond.
+
+Intervals are +/- 1.96 residual standard deviations, as on the client.
+"""
+from __future__ import annotations
+
+import importlib.util
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+AUTO = 'auto'
+PROPHET_MIN_POINTS = 60
+HOLT_GRID = np.arange(1, 20) * 0.05
+Z_95 = 1.96
+DS_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_ENGINES: Dict[str, Callable] = {}
+
+
+def register_engine(name: str):
+    """Decorator registering `fn(df, periods)` as the engine called `name`."""
+    def decorator(fn):
+        _ENGINES[name] = fn
+        return fn
+    return decorator
+
+
+def available_engines() -> List[str]:
+    return sorted(_ENGINES)
+
+
+def get_engine(name: str) -> Callable:
+    try:
+        return _ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown forecast method '{name}'. Choose one of: {', '.join([AUTO] + available_engines())}.")
+
+
+def resolve_method(df, method: str | None) -> str:
+    """Concrete engine name for a request; `auto` (or empty) picks one from the series."""
+    if method and method != AUTO:
+        get_engine(method)
+        return method
+    ds = df['ds'].drop_duplicates().sort_values()
+    if len(ds) >= PROPHET_MIN_POINTS and ds.diff().median() <= pd.Timedelta(days=1) and _prophet_available():
+        return 'prophet'
+    return 'holt'
+
+
+def resolve_methods(df, method: str | None) -> pd.Series:
+    """`resolve_method` for each series of a long (series_id, ds, y) frame, indexed by series_id."""
+    if method and method != AUTO:
+        get_engine(method)
+        return pd.Series(method, index=pd.Index(df['series_id'].unique(), name='series_id'))
+    ds = df[['series_id', 'ds']].drop_duplicates().sort_values(['series_id', 'ds'])
+    same_series = ds['series_id'].eq(ds['series_id'].shift())
+    step = ds['ds'].diff().where(same_series).groupby(ds['series_id']).median()
+    counts = ds.groupby('series_id')['ds'].size()
+    prophet = (counts >= PROPHET_MIN_POINTS) & (step <= pd.Timedelta(days=1)) & _prophet_available()
+    return pd.Series(np.where(prophet, 'prophet', 'holt'), index=counts.index)
+
+
+def _prophet_available() -> bool:
+    return 'prophet' in _ENGINES and importlib.util.find_spec('prophet') is not None
+
+
+def _series(df):
+    """Observations ordered by ds, one per timestamp (duplicates averaged)."""
+    s = df.groupby('ds', sort=True)['y'].mean()
+    return s.index, s.to_numpy(dtype='float64')
+
+
+def future_dates(ds, periods: int) -> pd.DatetimeIndex:
+    """The `periods` timestamps after the last one, at the series' own spacing.
+
+    Month-start series (the usual MRR export) step by calendar month; other
+    series use the inferred frequency, or the median spacing when none is found.
+    """
+    ds = pd.DatetimeIndex(ds)
+    if len(ds) < 2:
+        return pd.date_range(ds[-1], periods=periods + 1, freq='D')[1:]
+    freq = pd.infer_freq(ds) if len(ds) >= 3 else None
+    if freq is None:
+        step = pd.Series(ds).diff().median()
+        if pd.Timedelta(days=28) <= step <= pd.Timedelta(days=31):
+            freq = 'MS' if (ds.day == 1).all() else pd.DateOffset(months=1)
+        else:
+            freq = step
+    return pd.date_range(ds[-1], periods=periods + 1, freq=freq)[1:]
+
+
+def _records(dates, predicted, residual_std) -> list:
+    margin = Z_95 * residual_std
+    labels = dates.strftime(DS_FORMAT) if isinstance(dates, pd.DatetimeIndex) else dates
+    return [
+        {'ds': d, 'yhat': round(float(p), 2), 'yhat_lower': round(float(p - margin), 2), 'yhat_upper': round(float(p + margin), 2)}
+        for d, p in zip(labels, predicted)
+    ]
+
+
+@register_engine('linear')
+def linear_forecast(df, periods: int = 30) -> list:
+    """OLS on the time index 0..n-1, extrapolated `periods` steps."""
+    ds, y = _series(df)
+    n = len(y)
+    x = np.arange(n, dtype='float64')
+    if n > 1:
+        slope, intercept = np.polyfit(x, y, 1)
+    else:
+        slope, intercept = 0.0, float(y[0])
+    rss = float(np.sum((y - (intercept + slope * x)) ** 2))
+    residual_std = np.sqrt(rss / (n - 1)) if n > 1 else 0.0
+    predicted = intercept + slope * np.arange(n, n + periods)
+    return _records(future_dates(ds, periods), predicted, residual_std)
+
+
+def holt_fit(y, alphas=HOLT_GRID, betas=HOLT_GRID) -> dict:
+    """Grid-search Holt's alpha/beta by one-step-ahead MSE, all pairs at once.
+
+    The recursion runs once over time on vectors of len(alphas) x len(betas)
+    candidate states. Ties go to the first pair in alpha-major order, as in
+    the client's loop. Returns the chosen alpha/beta with the final level, trend
+    and residual std.
+    """
+    y = np.asarray(y, dtype='float64')
+    fit = holt_fit_many(y[None, :], [len(y)], alphas, betas)
+    return {k: float(v[0]) for k, v in fit.items()}
+
+
+def holt_fit_many(Y, lengths, alphas=HOLT_GRID, betas=HOLT_GRID) -> dict:
+    """`holt_fit` for many series in one pass.
+
+    `Y` is (series, time), each row left-aligned and padded after its
+    `lengths[i]` observations. The state is (series, alpha x beta); a series
+    stops updating once its observations run out. Returns one array per key of
+    `holt_fit`.
+    """
+    Y = np.asarray(Y, dtype='float64')
+    n = np.asarray(lengths, dtype='int64')
+    a, b = (g.ravel() for g in np.meshgrid(np.asarray(alphas, dtype='float64'), np.asarray(betas, dtype='float64'), indexing='ij'))
+    first = Y[:, :1]
+    initial_trend = np.where(n[:, None] > 1, Y[:, 1:2] - first, 0.0) if Y.shape[1] > 1 else np.zeros_like(first)
+    level = np.repeat(first, a.size, axis=1)
+    trend = np.repeat(initial_trend, a.size, axis=1)
+    sse = np.zeros_like(level)
+    for t in range(1, Y.shape[1]):
+        active = (t < n)[:, None]
+        yt = Y[:, t:t + 1]
+        err = yt - (level + trend)
+        sse += np.where(active, err * err, 0.0)
+        new_level = a * yt + (1 - a) * (level + trend)
+        trend = np.where(active, b * (new_level - level) + (1 - b) * trend, trend)
+        level = np.where(active, new_level, level)
+    best = np.argmin(sse, axis=1)
+    rows = np.arange(len(n))
+    best_sse = sse[rows, best]
+    m = n - 1
+    return {
+        'alpha': a[best],
+        'beta': b[best],
+        'level': level[rows, best],
+        'trend': trend[rows, best],
+        'mse': np.where(m > 0, best_sse / np.maximum(m, 1), np.inf),
+        'residual_std': np.where(m > 1, np.sqrt(best_sse / np.maximum(m - 1, 1)), 0.0),
+    }
+
+
+@register_engine('holt')
+def holt_forecast(df, periods: int = 30) -> list:
+    """Holt's linear trend with grid-fitted alpha/beta."""
+    ds, y = _series(df)
+    fit = holt_fit(y)
+    predicted = fit['level'] + np.arange(1, periods + 1) * fit['trend']
+    return _records(future_dates(ds, periods), predicted, fit['residual_std'])
+
+
+def holt_forecast_many(df, periods: int = 30) -> dict:
+    """`holt_forecast` for every series of a long (series_id, ds, y) frame.
+
+    All series are fitted together by `holt_fit_many`. Series observed on
+    the same dates (e.g. per-segment MRR) share one `future_dates` call.
+    Returns {series_id: records}.
+    """
+    s = df.groupby(['series_id', 'ds'], sort=True)['y'].mean().reset_index()
+    codes, ids = pd.factorize(s['series_id'])
+    lengths = np.bincount(codes)
+    Y = np.full((len(ids), int(lengths.max())), np.nan)
+    Y[codes, s.groupby('series_id', sort=False).cumcount().to_numpy()] = s['y'].to_numpy(dtype='float64')
+    fit = holt_fit_many(Y, lengths)
+    steps = np.arange(1, periods + 1)
+    ends = np.cumsum(lengths)
+    ds_values = s['ds'].to_numpy(dtype='datetime64[ns]')
+    labels = {}
+    out = {}
+    for i, sid in enumerate(ids):
+        ds = ds_values[ends[i] - lengths[i]:ends[i]]
+        key = ds.tobytes()
+        if key not in labels:
+            labels[key] = list(future_dates(ds, periods).strftime(DS_FORMAT))
+        predicted = fit['level'][i] + steps * fit['trend'][i]
+        out[sid] = _records(labels[key], predicted, fit['residual_std'][i])
+    return out
@@ -1,20 +1,29 @@
 # forecast/utils/forecast_engine.py
 import pandas as pd
-from prophet import Prophet
 import logging
 
+from .engines import get_engine, register_engine, resolve_method
+
 logger = logging.getLogger(__name__)
 
-def generate_forecast(file_path, periods=30):
+def model_params(periods=30, method='prophet'):
+    """
+    Parameters that determine the fitted output; part of the forecast cache key (see `forecast.cache`).
+
+    `method` must already be resolved (see `engines.resolve_method`), never 'auto'.
+    """
+    return {'method': method, 'periods': int(periods)}
+
+
+def load_series(file_path):
     """
-    Generates a forecast using Prophet from a CSV file.
+    Reads and normalizes the (ds, y) series from a CSV file.
 
     Args:
         file_path (str): Path to the CSV file containing 'ds' and 'y' columns.
-        periods (int): Number of future periods to forecast.
 
     Returns:
-        List[Dict]: List of dictionaries with keys: 'ds', 'yhat', 'yhat_lower', 'yhat_upper'.
+        pd.DataFrame: 'ds' as datetime64 and 'y' as float, in file order.
     """
     # Load CSV
     df = pd.read_csv(file_path)
@@ -28,7 +37,53 @@ def generate_forecast(file_path, periods=30):
 
     # Ensure ds is datetime and y is numeric
     df['ds'] = pd.to_datetime(df['ds'])
-    df['y'] = pd.to_numeric(df['y'], errors='coerce').fillna(df['y'].mean()) # Handle NaNs in 'y'
+    df['y'] = pd.to_numeric(df['y'], errors='coerce')
+    df['y'] = df['y'].fillna(df['y'].mean()) # Handle NaNs in 'y'
+    return df[['ds', 'y']]
+
+
+def load_batch(file_path):
+    """
+    Reads a long-format CSV of many series: 'series_id', 'ds' and 'y' columns.
+
+    Returns:
+        pd.DataFrame: 'series_id' as str, 'ds' as datetime64 and 'y' as float
+        (NaNs filled with the series mean), in file order. Series without
+        any numeric value are dropped.
+    """
+    # read as text so ids like '007' keep their leading zeros
+    df = pd.read_csv(file_path, dtype=str)
+    df.columns = [col.lower() for col in df.columns]
+    missing = [col for col in ('series_id', 'ds', 'y') if col not in df.columns]
+    if missing:
+        raise ValueError("Batch CSV must contain 'series_id', 'ds' (date/time) and 'y' (value) columns")
+    df = df[df['series_id'].notna()].copy()
+    df['ds'] = pd.to_datetime(df['ds'])
+    df['y'] = pd.to_numeric(df['y'], errors='coerce')
+    df['y'] = df['y'].fillna(df.groupby('series_id')['y'].transform('mean'))
+    df = df[df['y'].notna()]
+    if df.empty:
+        raise ValueError("Batch CSV contains no numeric 'y' values")
+    return df[['series_id', 'ds', 'y']]
+
+
+def fit_forecast(df, periods=30, method='prophet'):
+    """
+    Forecasts a normalized series (see `load_series`) with the engine registered as `method`.
+
+    Returns:
+        List[Dict]: List of dictionaries with keys: 'ds', 'yhat', 'yhat_lower', 'yhat_upper'.
+    """
+    return get_engine(method)(df, periods=periods)
+
+
+@register_engine('prophet')
+def prophet_forecast(df, periods=30):
+    """
+    Fits Prophet on a normalized series. Prophet is imported on first use so
+    the NumPy engines work without it.
+    """
+    from prophet import Prophet
 
     # Initialize and fit Prophet model
     model = Prophet()
@@ -50,3 +105,19 @@ def generate_forecast(file_path, periods=30):
 
     # Convert to list of dicts, ensuring floats are rounded for cleaner JSON
     return result.round(2).to_dict(orient='records')
+
+
+def generate_forecast(file_path, periods=30, method='prophet'):
+    """
+    Generates a forecast from a CSV file (Prophet unless another `method` is given).
+
+    Args:
+        file_path (str): Path to the CSV file containing 'ds' and 'y' columns.
+        periods (int): Number of future periods to forecast.
+        method (str): Engine name, or 'auto' (see `engines.resolve_method`).
+
+    Returns:
+        List[Dict]: List of dictionaries with keys: 'ds', 'yhat', 'yhat_lower', 'yhat_upper'.
+    """
+    df = load_series(file_path)
+    return fit_forecast(df, periods=periods, method=resolve_method(df, method))
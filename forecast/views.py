@@ -1,68 +1,203 @@
 import os
+import json
 import logging
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .models import UploadedDataset, ForecastResult
-from .utils.forecast_engine import generate_forecast
-from .utils.ai_summary import generate_ai_summary
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from api.auth import CookieTokenAuthentication
+from api.models import Organization
+from django.utils import timezone
+from . import batch as forecast_batch
+from . import cache as forecast_cache
+from .models import UploadedDataset, ForecastJob
+from .serializers import ForecastJobSerializer
+from .tasks import cancel_forecast_job, enqueue_forecast_job
+from .utils.engines import AUTO, resolve_method, resolve_methods
+from .pool import pool_metrics
+from .utils.forecast_engine import load_batch, load_series, model_params
+
+DEFAULT_MAX_ACTIVE_JOBS_PER_ORG = 2
 
 # Configure logging for debugging
 logger = logging.getLogger(__name__)
 # The TestAPIView was not used, so removing it to clean up the code.
 
-class ForecastAPIView(APIView):
-    """
-    Handles CSV file upload and generates forecast + AI summary.
+class ForecastBatchAPIView(APIView):
+    """Forecast every series of a long-format CSV (series_id, ds, y) in one request.
+
+    The response streams NDJSON: one line per series with its forecast and
+    `result_id` (the ForecastResult row), then a `done` line with counts.
+    Fitting and storage are in `forecast.batch`. `method` applies to every
+    series; with `auto` each series gets its own engine. At most
+    `FORECAST_BATCH_MAX_SERIES` series are accepted per upload.
     """
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [CookieTokenAuthentication]
+    parser_classes = [MultiPartParser, FormParser]
 
     def post(self, request):
-        # Check if file is provided
         file = request.FILES.get('file')
-        periods_str = request.POST.get('periods', '30')
-        
         if not file:
-            logger.warning("No file received in request.")
             return Response({"error": "No file uploaded."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            periods = int(request.POST.get('periods', '30'))
+        except ValueError:
+            return Response({"error": "Invalid value for periods."}, status=status.HTTP_400_BAD_REQUEST)
+        if periods < 1:
+            return Response({"error": "Invalid value for periods."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            df = load_batch(file)
+            methods = resolve_methods(df, request.POST.get('method', AUTO))
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        limit = forecast_batch.max_series()
+        if len(methods) > limit:
+            return Response({"error": f"Too many series ({len(methods)}, limit {limit})."}, status=status.HTTP_400_BAD_REQUEST)
+        file.seek(0)
+
+        dataset = UploadedDataset.objects.create(name=file.name, file=file)
+        logger.info(f"Batch forecast of {len(methods)} series from {dataset.name}")
+        lines = (json.dumps(line, default=str) + '\n' for line in forecast_batch.iter_batch(dataset, df, periods, methods, org=_user_org(request.user)))
+        return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+
+class ForecastPoolMetricsAPIView(APIView):
+    """Queue depth, fit latency and failure counters of the Prophet process pool (`forecast.pool`), for staff monitoring."""
+    permission_classes = [IsAdminUser]
+    authentication_classes = [CookieTokenAuthentication]
+
+    def get(self, request):
+        return Response(pool_metrics(), status=status.HTTP_200_OK)
+
+
+def _user_org(user):
+    profile = getattr(user, 'profile', None)
+    return profile.org if profile and profile.org else None
+
+
+def _visible_jobs(user):
+    """Jobs of the user's org, or the user's own jobs when they have no org."""
+    org = _user_org(user)
+    jobs = ForecastJob.objects.select_related('dataset', 'result')
+    return jobs.filter(org=org) if org else jobs.filter(org__isnull=True, created_by=user)
+
+
+class ForecastJobListCreateAPIView(APIView):
+    """Queue a forecast (POST, 202 + job id) or list recent jobs (GET).
+
+    Fitting runs in a Celery worker (`forecast.tasks`), so the request returns
+    immediately. A series already fitted with the same parameters is answered
+    from the forecast cache (`forecast.cache`) with 200 and the finished job.
+    `method` is resolved from the series when the job is created (default
+    `auto`, see `forecast.utils.engines`) and stored on the job. At most `FORECAST_MAX_ACTIVE_JOBS_PER_ORG` jobs per org may
+    be queued or running; further requests get 429 until one finishes.
+    """
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [CookieTokenAuthentication]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def get(self, request):
+        jobs = _visible_jobs(request.user)[:50]
+        return Response(ForecastJobSerializer(jobs, many=True).data, status=status.HTTP_200_OK)
 
+    def post(self, request):
+        file = request.FILES.get('file')
+        if not file:
+            return Response({"error": "No file uploaded."}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            periods = int(periods_str)
+            periods = int(request.POST.get('periods', '30'))
         except ValueError:
             return Response({"error": "Invalid value for periods."}, status=status.HTTP_400_BAD_REQUEST)
+        if periods < 1:
+            return Response({"error": "Invalid value for periods."}, status=status.HTTP_400_BAD_REQUEST)
 
+        # validate and hash the upload before anything is stored
         try:
-            # Save uploaded dataset (optional, but good for history/debugging)
-            name = file.name
-            dataset = UploadedDataset.objects.create(name=name, file=file)
-            logger.info(f"File received: {name}")
-
-            # Generate forecast
-            forecast_data = generate_forecast(dataset.file.path, periods=periods)
-            logger.info(f"Forecast generated with {len(forecast_data)} periods.")
-
-            # Generate AI summary
-            summary = generate_ai_summary(forecast_data)
-            logger.info(f"Summary generated: {summary}")
-
-            # Save forecast result
-            result = ForecastResult.objects.create(
-                dataset=dataset,
-                forecast_data=forecast_data,
-                summary=summary
+            df = load_series(file)
+            method = resolve_method(df, request.POST.get('method', AUTO))
+            key = forecast_cache.cache_key(df, model_params(periods, method))
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        file.seek(0)
+
+        org = _user_org(request.user)
+        cap = getattr(settings, 'FORECAST_MAX_ACTIVE_JOBS_PER_ORG', DEFAULT_MAX_ACTIVE_JOBS_PER_ORG)
+        with transaction.atomic():
+            cached = forecast_cache.lookup(key, org)
+            if cached is not None:
+                # identical series and parameters: finished without queueing a fit
+                now = timezone.now()
+                dataset = UploadedDataset.objects.create(name=file.name, file=file)
+                job = ForecastJob.objects.create(
+                    org=org, created_by=request.user, dataset=dataset, periods=periods, method=method, result=cached,
+                    status=ForecastJob.STATUS_SUCCEEDED, progress=100, started_at=now, finished_at=now,
+                )
+                return Response(ForecastJobSerializer(job).data, status=status.HTTP_200_OK)
+
+            # lock the owner row so concurrent requests cannot both pass the cap check
+            if org:
+                Organization.objects.select_for_update().filter(pk=org.pk).first()
+            else:
+                get_user_model().objects.select_for_update().filter(pk=request.user.pk).first()
+            active = _visible_jobs(request.user).filter(status__in=ForecastJob.ACTIVE_STATUSES).count()
+            if active >= cap:
+                return Response(
+                    {"error": f"Too many forecasts in progress (limit {cap}). Wait for one to finish or cancel it."},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS,
+                )
+            dataset = UploadedDataset.objects.create(name=file.name, file=file)
+            job = ForecastJob.objects.create(org=org, created_by=request.user, dataset=dataset, periods=periods, method=method)
+            enqueue_forecast_job(job)
+
+        status_url = reverse('forecast-job-detail', args=[job.pk])
+        return Response(
+            {'job_id': str(job.pk), 'status': job.status, 'status_url': status_url},
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': status_url},
+        )
+
+
+class ForecastAPIView(ForecastJobListCreateAPIView):
+    """Original forecast endpoint, now an alias of POST `/api/forecast/jobs/`.
+
+    The fit no longer runs in the request: the response is 202 with the job
+    id and `status_url` (or 200 with the finished job on a cache hit), and
+    clients poll the job for the forecast and summary.
+    """
+    http_method_names = ['post', 'options']
+
+
+class ForecastJobDetailAPIView(APIView):
+    """Status and progress of a forecast job; `result` is filled from its ForecastResult once it succeeded."""
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [CookieTokenAuthentication]
+
+    def get(self, request, job_id):
+        job = get_object_or_404(_visible_jobs(request.user), pk=job_id)
+        return Response(ForecastJobSerializer(job).data, status=status.HTTP_200_OK)
+
+
+class ForecastJobCancelAPIView(APIView):
+    """Cancel a queued or running job; 409 when it already finished."""
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [CookieTokenAuthentication]
+
+    def post(self, request, job_id):
+        job = get_object_or_404(_visible_jobs(request.user), pk=job_id)
+        if not cancel_forecast_job(job):
+            job.refresh_from_db()
+            return Response(
+                {"error": f"Job already {job.status}.", **ForecastJobSerializer(job).data},
+                status=status.HTTP_409_CONFLICT,
             )
-            logger.info(f"ForecastResult saved: {result.id}")
-
-            # Return JSON response
-            return Response({
-                "summary": summary,
-                "forecast": forecast_data
-            }, status=status.HTTP_200_OK)
-
-        except ValueError as ve:
-            # Catch specific data validation errors from the engine
-            logger.error(f"Data Validation Error: {ve}", exc_info=True)
-            return Response({"error": str(ve)}, status=status.HTTP_400_BAD_REQUEST)
-
-        except Exception as e:
-            logger.error(f"Error processing forecast: {e}", exc_info=True)
-            return Response({"error": "An internal error occurred during forecasting."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        job.refresh_from_db()
+        return Response(ForecastJobSerializer(job).data, status=status.HTTP_200_OK)
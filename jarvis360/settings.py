@@ -18,8 +18,7 @@ if os.path.exists(env_file):
     # stdout clean, so raise the module logger to ERROR level before reading.
     logging.getLogger('environ.environ').setLevel(logging.ERROR)
     environ.Env.read_env(env_file)
-else:
-    raise FileNotFoundError(f".env file not found at {env_file}")
+# Without a .env file (CI, containers) settings come from the process environment.
 
 
 # Now fetch SECRET_KEY and others from env
@@ -189,6 +188,16 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# Django cache. Cached analytics are keyed per org and data version, but the
+# hit/miss counters behind /api/cache-stats/ and the forecast pool metrics are
+# kept in this cache too: with the default per-process LocMemCache each web,
+# worker and pool process counts only its own traffic. Point CACHE_URL at a
+# shared backend (e.g. redis://localhost:6379/1) for numbers that sum every
+# process.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
 # Celery configuration
 # Broker URL (default to local Redis if not provided)
 CELERY_BROKER_URL = env('CELERY_BROKER_URL', default='redis://localhost:6379/0')
@@ -199,6 +208,13 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 
+# Queue for forecast jobs. Prophet fits only use the forecast process pool
+# (forecast/pool.py) in a worker started with --pool=threads or --pool=solo;
+# prefork children are daemonic and fit inline. Set this to e.g. 'forecasts'
+# and run `celery -A jarvis360 worker -Q forecasts --pool=threads` for them.
+FORECAST_CELERY_QUEUE = env('FORECAST_CELERY_QUEUE', default='celery')
+CELERY_TASK_ROUTES = {'forecast.tasks.run_forecast_job': {'queue': FORECAST_CELERY_QUEUE}}
+
 # When developing without a broker (Redis), allow running Celery tasks eagerly
 # (synchronously) by setting environment variables:
 #   CELERY_TASK_ALWAYS_EAGER=true
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""Benchmark Subscription bulk-load backends (rows/sec).
+
+Creates a throwaway test database for the configured DATABASES['default']
+engine, inserts N synthetic rows with each backend from `api.bulkload` that the
+engine supports, and prints rows/sec. COPY only runs on PostgreSQL.
+
+Usage:
+  python scripts/bench_bulkload.py [--rows 200000] [--chunk-size N]
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'jarvis360.settings')
+import django
+django.setup()
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark Subscription bulk-load backends')
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--chunk-size', type=int, default=None, help='Rows per chunk (default: per-backend default)')
+    args = parser.parse_args()
+
+    from api import bulkload
+    from api.models import Organization, Customer, Subscription, UploadedCSV
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        org = Organization.objects.create(name='Bench', slug='bench')
+        upload = UploadedCSV.objects.create(org=org, filename='bench.csv')
+        Customer.objects.bulk_create([Customer(org=org, external_id=f'c{i}', name=f'c{i}') for i in range(1000)])
+        pks = list(Customer.objects.filter(org=org).values_list('pk', flat=True))
+        start = datetime.date(2024, 1, 1)
+        rows = [(pks[i % len(pks)], (i % 5000) + 0.99, start + datetime.timedelta(days=i % 365), upload.pk, '') for i in range(args.rows)]
+
+        backends = ['orm', 'executemany'] + (['copy'] if connection.vendor == 'postgresql' else [])
+        print(f'{connection.vendor}: {args.rows} rows (auto-selected backend: {bulkload.get_backend_name()})')
+        for name in backends:
+            Subscription.objects.all().delete()
+            chunk = args.chunk_size or bulkload.DEFAULT_CHUNK_SIZES[name]
+            started = time.perf_counter()
+            written = bulkload.BACKENDS[name](rows, 'default', chunk)
+            elapsed = time.perf_counter() - started
+            assert Subscription.objects.count() == written == args.rows
+            print(f'{name:<12} chunk={chunk:<6} {elapsed:7.2f}s  {written / elapsed:10.0f} rows/s')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""Measure peak RSS and wall time of CSV normalization per `raw` projection.
+
+Generates a synthetic billing CSV (1M rows by default, with a few extra source
+columns) and normalizes it in a fresh subprocess per mode so each peak RSS
+reading is independent:
+
+  all      normalize_csv_text(raw=RAW_ALL)      legacy behaviour, every column kept
+  importer normalize_csv_text(raw=['name'])     what the importer keeps
+  none     normalize_csv_text(raw=None)         what ARRSummaryAPIView keeps
+  columns  normalize_csv_columns(raw=None)      column batch, no record dicts
+
+Usage:
+  python scripts/bench_normalize_memory.py [--rows 1000000]
+
+Peak RSS comes from resource.getrusage, so this runs on Linux/macOS only.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+MODES = ('all', 'importer', 'none', 'columns')
+
+
+def write_csv(path: str, rows: int) -> None:
+    rnd = random.Random(42)
+    with open(path, 'w', encoding='utf-8') as fh:
+        fh.write('customer_id,name,MRR,signup_date,plan,region,notes\n')
+        for i in range(rows):
+            fh.write(f'c{i % 50000},Customer {i % 50000},"${rnd.randint(10, 9000)}.00",'
+                     f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d},pro,emea,renewal note {i}\n')
+
+
+def run_mode(mode: str, path: str) -> None:
+    from analysis.normalize import RAW_ALL, normalize_csv_columns, normalize_csv_text
+    with open(path, encoding='utf-8') as fh:
+        text = fh.read()
+    base_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    if mode == 'columns':
+        out = normalize_csv_columns(text, raw=None)
+    else:
+        raw = {'all': RAW_ALL, 'importer': ['name'], 'none': None}[mode]
+        out = normalize_csv_text(text, raw=raw)
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    assert out is not None
+    print(f'{mode:<9} peak_rss={peak_kb / 1024:8.1f} MB  (+{(peak_kb - base_kb) / 1024:8.1f} MB over input)  time={elapsed:6.2f}s')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--csv', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.csv)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.csv')
+        write_csv(path, args.rows)
+        print(f'{args.rows} rows, {os.path.getsize(path) / 1e6:.1f} MB CSV')
+        for mode in MODES:
+            subprocess.run([sys.executable, __file__, '--mode', mode, '--csv', path], check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""RSS and latency of ARR / top customers / cohorts over a snapshot, 8 workers.
+
+Writes a synthetic Arrow snapshot (see `analysis.snapshots`) and starts
+`--workers` processes, like gunicorn workers serving one tenant. Each one
+loads the snapshot and runs `compute_mrr_and_arr`, `top_customers_by_mrr` and
+`cohortize` `--repeat` times, in one of three modes:
+
+  records  snapshot read onto the heap, converted to a list of dicts (legacy input)
+  heap     snapshot read onto the heap (OSFile), Arrow columns passed directly
+  mmap     snapshot memory-mapped, Arrow columns passed directly
+
+Memory is read from /proc/self/smaps_rollup before the first run (after
+imports) and after the last one; the growth is reported. Rss counts
+shared page-cache pages in every worker. Pss splits them between the workers
+that map them, so the summed Pss is the real footprint of the pool.
+
+Usage:
+  python scripts/bench_snapshot_workers.py [--rows 1000000] [--customers 100000] [--workers 8] [--repeat 5]
+
+Linux only (smaps_rollup). `records` costs roughly 300 MB per worker per
+million rows; use `--modes heap,mmap` for larger snapshots.
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+MODES = ('records', 'heap', 'mmap')
+SMAPS_FIELDS = ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty')
+
+
+def write_dataset(directory: str, rows: int, customers: int) -> None:
+    from analysis import snapshots
+    rng = np.random.default_rng(11)
+    pks = rng.integers(0, customers, rows)
+    ids = np.char.add('cust-', pks.astype(str)).astype(object)
+    mrr = np.round(rng.pareto(1.5, rows) * 100, 2)
+    dates = np.datetime64('2020-01-01') + rng.integers(0, 5 * 365, rows).astype('timedelta64[D]')
+    snapshots.write_snapshot(os.path.join(directory, 'compacted.arrow'), ids, pks, mrr, dates.astype(object))
+
+
+def smaps_kb() -> dict:
+    out = {}
+    with open('/proc/self/smaps_rollup') as fh:
+        for line in fh:
+            name, _, rest = line.partition(':')
+            if name in SMAPS_FIELDS:
+                out[name] = int(rest.split()[0])
+    return out
+
+
+def worker(mode: str, directory: str, repeat: int, start, results) -> None:
+    from analysis import snapshots
+    from analysis.arr import compute_mrr_and_arr, top_customers_by_mrr
+    from analysis.cohorts import cohortize
+
+    baseline = smaps_kb()
+    start.wait()
+    timings = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        table = snapshots.load_snapshot(directory, memory_map=(mode == 'mmap'))
+        if mode == 'records':
+            source = table.select(['customer_id', 'mrr']).to_pylist()
+            dates = table.column('start_date').to_pylist()
+        else:
+            source = table
+            dates = table.column('start_date')
+        compute_mrr_and_arr(source)
+        top_customers_by_mrr(source, limit=10)
+        cohortize(dates)
+        timings.append(time.perf_counter() - began)
+    mem = {field: value - baseline.get(field, 0) for field, value in smaps_kb().items()}
+    # keep the last load alive until memory is sampled
+    del table, source, dates
+    results.put((timings, mem))
+
+
+def run_mode(mode: str, directory: str, workers: int, repeat: int) -> None:
+    ctx = mp.get_context('spawn')
+    start = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(mode, directory, repeat, start, results)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    collected = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    timings = np.array([t for ts, _ in collected for t in ts])
+    totals = {field: sum(mem.get(field, 0) for _, mem in collected) / 1024 for field in SMAPS_FIELDS}
+    print(
+        f'{mode:<8} p50={np.percentile(timings, 50) * 1000:8.1f} ms  p95={np.percentile(timings, 95) * 1000:8.1f} ms  '
+        + '  '.join(f'{field.lower()}={value:8.1f} MB' for field, value in totals.items())
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--customers', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--modes', default=','.join(MODES), help='Comma-separated subset of ' + ', '.join(MODES))
+    args = parser.parse_args()
+
+    from analysis import snapshots
+    if not snapshots.available():
+        sys.exit('pyarrow is required')
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_dataset(directory, args.rows, args.customers)
+        size = os.path.getsize(os.path.join(directory, 'compacted.arrow')) / 2**20
+        print(f'{args.rows} rows, {args.customers} customers, snapshot {size:.1f} MB, {args.workers} workers x {args.repeat} runs (memory growth summed over workers)')
+        for mode in args.modes.split(','):
+            run_mode(mode, directory, args.workers, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""Compare top-K strategies for `analysis.arr` at growing customer counts.
+
+For each customer count, a synthetic MRR stream (three rows per customer, in
+shuffled chunks) is ranked by:
+
+  full-sort  dict of sums, list of dicts, full sort   (previous top_customers_by_mrr)
+  heap       dict of sums, heapq.nlargest             (top_customers_chunked, exact)
+  sketch     two-pass count-min sketch + exact pass   (top_customers_sketch)
+
+Usage:
+  python scripts/bench_topk.py [--customers 100000,1000000,10000000] [--limit 10]
+
+Peak RSS is measured in a fresh subprocess per (size, strategy) pair, so it
+runs on Linux/macOS only. 10M customers needs several GB for the dict-based
+strategies.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+STRATEGIES = ('full-sort', 'heap', 'sketch')
+ROWS_PER_CUSTOMER = 3
+CHUNK_ROWS = 500_000
+
+
+def make_chunks(customers: int):
+    """Zero-arg callable yielding the same column batches on every call."""
+    def chunks():
+        rng = np.random.default_rng(7)
+        total = customers * ROWS_PER_CUSTOMER
+        for start in range(0, total, CHUNK_ROWS):
+            n = min(CHUNK_ROWS, total - start)
+            ids = rng.integers(0, customers, n)
+            yield {
+                'customer_id': np.char.add('c', ids.astype(str)).astype(object),
+                'mrr': rng.pareto(1.5, n) * 100,
+            }
+    return chunks
+
+
+def full_sort(chunks, limit):
+    from collections import defaultdict
+    from analysis.arr import _chunk_sums
+    by_id = defaultdict(float)
+    for chunk in chunks():
+        for cid, mrr in _chunk_sums(chunk).items():
+            by_id[cid] += mrr
+    out = sorted([{'customer_id': k, 'mrr': v} for k, v in by_id.items()], key=lambda x: x['mrr'], reverse=True)
+    return out[:limit]
+
+
+def run(strategy: str, customers: int, limit: int) -> None:
+    from analysis.arr import top_customers_chunked, top_customers_sketch
+    chunks = make_chunks(customers)
+    base_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    if strategy == 'full-sort':
+        tops = full_sort(chunks, limit)
+    elif strategy == 'heap':
+        tops = top_customers_chunked(chunks(), limit=limit)
+    else:
+        tops = top_customers_sketch(chunks, limit=limit)
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    leader = tops[0]['customer_id'] if tops else '-'
+    print(f'{customers:>10} {strategy:<9} time={elapsed:7.2f}s  peak_rss=+{(peak_kb - base_kb) / 1024:8.1f} MB  leader={leader}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--customers', default='100000,1000000,10000000', help='Comma-separated customer counts')
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--strategy', choices=STRATEGIES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.strategy:
+        run(args.strategy, int(args.customers), args.limit)
+        return
+
+    for customers in (int(c) for c in args.customers.split(',')):
+        for strategy in STRATEGIES:
+            subprocess.run([sys.executable, __file__, '--strategy', strategy, '--customers', str(customers), '--limit', str(args.limit)], check=True)
+
+
+if __name__ == '__main__':
+    main()